@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Union, Dict, List, Optional, Any, Callable
+from typing import Union, Dict, List, Optional, Any, Callable, Tuple
 from case_convert import camel_case, snake_case
 import os
 
@@ -115,6 +115,16 @@ class Language(ABC):
         """Split a string into a list of strings based on a delimiter"""
         raise NotImplementedError
 
+    @abstractmethod
+    def substring(self, s: str, start, length):
+        """The `length` characters of a string from index `start`"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def string_to_int(self, s: str):
+        """Parse a string of decimal digits into an integer"""
+        raise NotImplementedError
+
     @abstractmethod
     def array(self, t: Type, elements: List[Any]):
         """Create an array in a language
@@ -140,6 +150,17 @@ class Language(ABC):
         """Delete the item at index idx from the array called id"""
         raise NotImplementedError
 
+    @abstractmethod
+    def array_pop(self, id: str):
+        """Delete the last item from the array called id"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def array_clear(self, id: str):
+        """Delete every item from the array called id, keeping the memory it has
+        so it can be filled again without growing"""
+        raise NotImplementedError
+
     @abstractmethod
     def array_iterate(
         self,
@@ -195,12 +216,25 @@ class Language(ABC):
         return f"{expression}({', '.join(str(a) for a in list(args))})"
 
     @abstractmethod
-    def declare(self, id: str, type: Type):
+    def declare(self, id: str, type: Type, value=None):
         """Declare a variable
 
         Args:
             id (str): identifier of the variable to declare
             type (Type): the type of the variable
+            value (Expression): optional initial value of the variable
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def constant(self, id: str, type: Type, value):
+        """Declare a constant, a variable whose value never changes. Where the
+        language supports it this is a compile time constant.
+
+        Args:
+            id (str): identifier of the constant
+            type (Type): the type of the constant
+            value (Expression): value of the constant
         """
         raise NotImplementedError
 
@@ -231,6 +265,56 @@ class Language(ABC):
         """  # noqa
         raise NotImplementedError
 
+    @abstractmethod
+    def struct(self, id: str, fields: Dict[str, Type], *methods):
+        """A struct (or class) with fields and methods. Each field starts as the
+        zero value of its type
+        Arguments:
+            id: str - name of the struct
+            fields: Dict[str, Type] - name and type of each field
+            *methods - methods of the struct, made with `method`
+        """  # noqa
+        raise NotImplementedError
+
+    @abstractmethod
+    def method(
+        self,
+        struct: str,
+        id: str,
+        return_type: Optional[Type],
+        arguments: Union[Dict[str, Type], List[Type], None],
+        *statements,
+    ):
+        """A method of a struct, inside which `this` refers to the struct it's called on
+        Arguments:
+            struct: str - name of the struct the method belongs to
+            id: str - name of the method
+            return_type: Optional[Type] - return type of the method
+            arguments: Union[Dict[str, Type], List[Type], None] - arguments to the method
+            *statements - all statements that should be in the body of the method
+        """  # noqa
+        raise NotImplementedError
+
+    @abstractmethod
+    def this(self, member: str):
+        """A field or method of the struct a method was called on, from inside it"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def instance(self, struct: str):
+        """A new instance of a struct"""
+        raise NotImplementedError
+
+    @expression
+    def verbatim(self, source: str):
+        """Source code written directly in the language, indented to wherever it's
+        used in a block"""
+        prefix = self.indent("")
+        return "\n".join(
+            (prefix + line if line and idx > 0 else line)
+            for idx, line in enumerate(str(source).splitlines())
+        )
+
     @abstractmethod
     def block(self, *statements):
         """Block concept in a language,
@@ -314,6 +398,21 @@ class Language(ABC):
         """
         raise NotImplementedError
 
+    @abstractmethod
+    def switch(
+        self,
+        expression: Expression,
+        cases: List[Tuple[List[Any], List[Expression]]],
+        default: List[Expression] = None,
+    ) -> Expression:
+        """Switch on the value of an expression.
+        Each case is a list of values and the statements to execute if the
+        expression is equal to any of them, if none are equal the default
+        statements are executed (optional). Values must be constants and there is
+        no fall through between cases.
+        """
+        raise NotImplementedError
+
     # TODO: add loads of non-abstract common things like
     # equals, less than, array indexing, calling (), addition
     @convert_case(0)
@@ -386,7 +485,11 @@ class Language(ABC):
 
     @abstractmethod
     def command(
-        self, command: str, suppress_output: bool = True, exit_on_failure: bool = True
+        self,
+        command: str,
+        suppress_output: bool = True,
+        exit_on_failure: bool = True,
+        on_failure: Optional[List[Any]] = None,
     ):
         """Invoke an operating system command
         Arguments:
@@ -395,6 +498,27 @@ class Language(ABC):
         Optional Arguments:
             suppress_output: bool - show/supress the output of the command on stdout [default True]
             exit_on_failure: bool - whether the code should exit on failure [default True]
+            on_failure: Optional[List[Any]] - statements to run if it fails instead of exiting
+        """  # noqa: E501
+        raise NotImplementedError
+
+    @abstractmethod
+    def execute(
+        self,
+        args: List[Any],
+        suppress_output: bool = True,
+        exit_on_failure: bool = True,
+        on_failure: Optional[List[Any]] = None,
+    ):
+        """Run a program directly rather than through a shell, so each argument
+        is passed to it as it is, spaces and quotes and all
+        Arguments:
+            args: List[Any] - the program to run then its arguments
+
+        Optional Arguments:
+            suppress_output: bool - show/supress the output of the program on stdout [default True]
+            exit_on_failure: bool - whether the code should exit on failure [default True]
+            on_failure: Optional[List[Any]] - statements to run if it fails instead of exiting
         """  # noqa: E501
         raise NotImplementedError
 
@@ -403,6 +527,12 @@ class Language(ABC):
         """Exit the program with an optional status code, defaulting to 0"""
         raise NotImplementedError
 
+    @abstractmethod
+    def throw(self, error: str, *args):
+        """Raise an error, an instance of the struct `error` made from the
+        arguments, which unwinds the stack to wherever it's caught"""
+        raise NotImplementedError
+
     @abstractmethod
     def read_lines(self, file: str):
         """Open a file and read the lines into a list of strings"""
@@ -413,6 +543,35 @@ class Language(ABC):
         """Open a file and read the contents into a string"""
         raise NotImplementedError
 
+    @abstractmethod
+    def read_ints(self, file: str):
+        """Open a binary file of 32 bit integers in the host's byte order and read
+        it into a list of ints"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def map_file(self, file: str):
+        """Map a file into memory read only and return a view of its bytes,
+        which `substring` slices without copying. An empty file is an empty view
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def unmap_file(self, view: str):
+        """Release a view returned by `map_file`, after which neither it nor any
+        slice of it can be used"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def temp_file(self):
+        """Create a new empty file with a unique name and return its path"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def remove_file(self, file: str):
+        """Delete a file"""
+        raise NotImplementedError
+
     @abstractmethod
     def read_file_stdin(self):
         """Read until EOF from standard input"""
@@ -1,9 +1,9 @@
 from ..language import Language
-from ..types import Type, Primitive, Composite
+from ..types import Type, Primitive, Composite, Expression
 from ..utils import imports, expression, convert_case
 from ..errors import MissingTypeError
 from .utils import format_function_arguments
-from typing import Dict, Union, Optional, List, Any
+from typing import Dict, Union, Optional, List, Any, Tuple
 import regex
 
 
@@ -55,12 +55,22 @@ class Cpp(Language):
             if t.base is Composite.CType.Array:
                 self.import_package("vector")
                 return f"std::vector<{self.types(t.sub)}>"
+            elif t.base is Composite.CType.Struct:
+                return t.sub
         else:
             return str(t)
 
     def string(self, s: str, double: bool = True):
         return f'"{s}"' if double else f"'{s}'"
 
+    @imports("string")
+    def substring(self, s: str, start, length):
+        return f"{s}.{self.call('substr', start, length)}"
+
+    @imports("string")
+    def string_to_int(self, s: str):
+        return self.call("std::stoi", s, no_cc=True)
+
     @imports("sstream")
     def string_split(self, s: str, delim: str):
         func_name = "split_string"
@@ -103,6 +113,14 @@ class Cpp(Language):
             + self.terminator
         )
 
+    @convert_case(0)
+    def array_pop(self, id: str):
+        return self.call(f"{id}.pop_back") + self.terminator
+
+    @convert_case(0)
+    def array_clear(self, id: str):
+        return self.call(f"{id}.clear") + self.terminator
+
     @convert_case(0, 1)
     @expression
     def array_iterate(
@@ -165,8 +183,13 @@ class Cpp(Language):
         return self.linesep.join(stmts)
 
     @convert_case(0)
-    def declare(self, id: str, type: Type):
-        return f"{self.types(type)} {id}{self.terminator}"
+    def declare(self, id: str, type: Type, value=None):
+        initial = "" if value is None else f" = {value}"
+        return f"{self.types(type)} {id}{initial}{self.terminator}"
+
+    @convert_case(0)
+    def constant(self, id: str, type: Type, value):
+        return f"const {self.types(type)} {id} = {value}{self.terminator}"
 
     @convert_case(0)
     def assign(self, id: str, expr):
@@ -203,6 +226,44 @@ class Cpp(Language):
         func = f"{ret_part} {id}({arg_list}) {stmts}"
         return func
 
+    @expression
+    def struct(self, id: str, fields: Dict[str, Type], *methods):
+        # methods are defined in the class so they don't need declaring first,
+        # and fields are value initialised to their zero values
+        self.indent_lvl += 1
+        members = [
+            self.indent(f"{self.types(t)} {self.cc(name)}{{}}{self.terminator}")
+            for name, t in fields.items()
+        ]
+        members.extend(self.linesep + self.indent(str(m)) for m in methods)
+        self.indent_lvl -= 1
+        body = "".join(member + self.linesep for member in members)
+        return (
+            f"class {id} {{{self.linesep}public:{self.linesep}{body}}}{self.terminator}"
+        )
+
+    @convert_case(1)
+    @expression
+    def method(
+        self,
+        struct: str,
+        id: str,
+        return_type: Optional[Type],
+        arguments: Union[Dict[str, Type], List[Type], None],
+        *statements,
+    ):
+        args = format_function_arguments(arguments)
+        arg_list = ", ".join([f"{self.types(t)} {name}" for name, t in args.items()])
+        ret_part = "void" if return_type is None else self.types(return_type)
+        return f"{ret_part} {id}({arg_list}) {self.block(*statements)}"
+
+    def this(self, member: str):
+        # members are in scope in a method
+        return self.cc(member)
+
+    def instance(self, struct: str):
+        return f"{struct}()"
+
     def do_return(self, expression=None):
         if expression is None:
             return f"return{self.terminator}"
@@ -269,10 +330,38 @@ class Cpp(Language):
 
         return f"if ({condition}) {self.block(*true_stmts)}{(' else ' + self.block(*false_stmts)) if false_stmts else ''}"  # noqa
 
+    @expression
+    def switch(
+        self,
+        expression,
+        cases: List[Tuple[List[Any], List[Any]]],
+        default=None,
+    ):
+        clauses = [([f"case {v}:" for v in values], stmts) for values, stmts in cases]
+        if default is not None:
+            clauses.append((["default:"], default))
+        lines = [f"switch ({expression}) {{"]
+        self.indent_lvl += 1
+        for labels, stmts in clauses:
+            # each case gets its own block so it can declare variables
+            lines.extend(self.indent(label) for label in labels[:-1])
+            lines.append(
+                self.indent(
+                    f"{labels[-1]} {self.block(*stmts, 'break' + self.terminator)}"
+                )
+            )
+        self.indent_lvl -= 1
+        lines.append(self.indent("}"))
+        return self.linesep.join(lines)
+
     @imports("stdlib.h")
     @expression
     def command(
-        self, command: str, suppress_output: bool = True, exit_on_failure: bool = True
+        self,
+        command: str,
+        suppress_output: bool = True,
+        exit_on_failure: bool = True,
+        on_failure: Optional[List[Any]] = None,
     ):
         stmts = []
         stmts.append(self.declare("cmd", Primitive.String))
@@ -287,14 +376,111 @@ class Cpp(Language):
         else:
             stmts.append(self.call("system", self.call("cmd.c_str")) + self.terminator)
         if exit_on_failure:
-            stmts.append(self.if_else(self.neq("rc", 0), [self.exit(1)]))
+            stmts.append(self.if_else(self.neq("rc", 0), on_failure or [self.exit(1)]))
 
         return self.linesep.join([stmts[0]] + [self.indent(s) for s in stmts[1:]])
 
+    @imports("fcntl.h", "spawn.h", "string", "sys/wait.h", "unistd.h", "vector")
+    def execute(
+        self,
+        args: List[Any],
+        suppress_output: bool = True,
+        exit_on_failure: bool = True,
+        on_failure: Optional[List[Any]] = None,
+    ):
+        func_name = "execute"
+
+        def lib():
+            s1 = self.declare("argv", "std::vector<char*>")
+            s2 = self.array_iterate(
+                "args",
+                "arg",
+                self.array_append("argv", "const_cast<char*>(arg.c_str())"),
+                iterate_items=True,
+                type="const std::string&",
+            )
+            s3 = self.array_append("argv", "NULL")
+            s4 = "posix_spawn_file_actions_t actions;"
+            s5 = (
+                self.call("posix_spawn_file_actions_init", "&actions") + self.terminator
+            )
+            # the output goes nowhere if it's suppressed
+            s6 = self.if_else(
+                "quiet",
+                [
+                    self.call(
+                        "posix_spawn_file_actions_addopen",
+                        "&actions",
+                        1,
+                        self.string("/dev/null"),
+                        "O_WRONLY",
+                        0,
+                    )
+                    + self.terminator,
+                    self.call("posix_spawn_file_actions_adddup2", "&actions", 1, 2)
+                    + self.terminator,
+                ],
+            )
+            s7 = "pid_t pid;"
+            s8 = self.declare(
+                "rc",
+                Primitive.Int,
+                self.call(
+                    "posix_spawnp",
+                    "&pid",
+                    "argv[0]",
+                    "&actions",
+                    "NULL",
+                    "argv.data()",
+                    "environ",
+                ),
+            )
+            s9 = self.call("posix_spawn_file_actions_destroy", "&actions")
+            s10 = self.if_else(self.neq("rc", 0), [self.do_return(expression=-1)])
+            s11 = self.declare("status", Primitive.Int)
+            s12 = self.if_else(
+                self.lt(self.call("waitpid", "pid", "&status", 0), 0),
+                [self.do_return(expression=-1)],
+            )
+            s13 = self.do_return(
+                expression="WIFEXITED(status) ? WEXITSTATUS(status) : -1"
+            )
+            stmts = [s1, s2, s3, s4, s5, s6, s7, s8, s9 + self.terminator]
+            stmts += [s10, s11, s12, s13]
+            return self.function(
+                func_name,
+                Primitive.Int,
+                {"args": "const std::vector<std::string>&", "quiet": Primitive.Bool},
+                *stmts,
+            )
+
+        self.register_helper(func_name, lib())
+        run = self.call(
+            func_name,
+            "{" + ", ".join(str(a) for a in args) + "}",
+            self.true() if suppress_output else self.false(),
+        )
+        if not exit_on_failure:
+            return run + self.terminator
+
+        # the helper is registered now, the statements are indented once placed
+        def stmts():
+            lines = [
+                self.declare("rc", Primitive.Int),
+                self.assign("rc", run),
+                self.if_else(self.neq("rc", 0), on_failure or [self.exit(1)]),
+            ]
+            return self.linesep.join([lines[0]] + [self.indent(s) for s in lines[1:]])
+
+        return Expression(stmts)
+
     @imports("stdlib.h")
     def exit(self, code: int = 0):
         return self.call("exit", code) + self.terminator
 
+    def throw(self, error: str, *args):
+        return f"throw {error}({', '.join(str(a) for a in args)}){self.terminator}"
+
     @imports("iostream", "fstream")
     def read_lines(self, file: str):
         func_name = "read_lines"
@@ -327,31 +513,30 @@ class Cpp(Language):
         self.register_helper(func_name, lib())
         return self.call(func_name, file)
 
-    @imports("iostream", "fstream")
+    @imports("cstring", "cerrno", "fstream", "iostream", "sstream", "stdlib.h")
     def read_file(self, file: str):
         func_name = "read_file"
 
         def lib():
-            s1 = self.declare("f", "std::fstream")
-            s2 = self.declare("content", Primitive.String)
-            s3 = self.call("f.open", "file", "std::ios::in") + self.terminator
-            s4 = self.if_else(
-                self.call("f.is_open"),
+            # the file is read in one go and its bytes are kept as they are
+            s1 = self.declare("f", "std::ifstream")
+            s2 = self.call("f.open", "file", "std::ios::binary") + self.terminator
+            s3 = self.if_else(
+                self.negate(self.call("f.is_open")),
                 [
-                    self.declare("line", Primitive.String),
-                    self.while_loop(
-                        self.increment(
-                            "content",
-                            inc=self.add("line", self.string(r"\n")),
-                        ),
-                        condition=self.call("getline", "f", "line"),
+                    self.println(
+                        self.string("open "),
+                        "file",
+                        self.string(": "),
+                        self.call("strerror", "errno"),
                     ),
-                    self.call("f.close") + self.terminator,
+                    self.exit(1),
                 ],
-                false_stmts=[self.exit(1)],
             )
-            s5 = self.do_return(expression="content")
-            stmts = [s1, s2, s3, s4, s5]
+            s4 = self.declare("content", "std::stringstream")
+            s5 = f"content << f.rdbuf(){self.terminator}"
+            s6 = self.do_return(expression=self.call("content.str"))
+            stmts = [s1, s2, s3, s4, s5, s6]
             return self.function(
                 func_name,
                 Primitive.String,
@@ -362,6 +547,131 @@ class Cpp(Language):
         self.register_helper(func_name, lib())
         return self.call(func_name, file)
 
+    @imports("cstdint", "fcntl.h", "stdlib.h", "sys/mman.h", "sys/stat.h", "unistd.h")
+    def read_ints(self, file: str):
+        func_name = "read_ints"
+
+        def lib():
+            s1 = self.declare("fd", Primitive.Int)
+            s2 = self.assign("fd", self.call("open", "file.c_str()", "O_RDONLY"))
+            s3 = self.if_else(self.lt("fd", 0), [self.exit(1)])
+            s4 = "struct stat st;"
+            s5 = self.call("fstat", "fd", "&st") + self.terminator
+            s6 = self.declare(
+                "data",
+                "void*",
+                self.call(
+                    "mmap", "NULL", "st.st_size", "PROT_READ", "MAP_PRIVATE", "fd", 0
+                ),
+            )
+            s7 = self.call("close", "fd") + self.terminator
+            s8 = self.if_else(self.eq("data", "MAP_FAILED"), [self.exit(1)])
+            s9 = self.declare(
+                "records",
+                "const int32_t*",
+                "static_cast<const int32_t*>(data)",
+            )
+            s10 = self.declare(
+                "ints",
+                Composite.array(Primitive.Int),
+            )
+            s11 = (
+                self.call(
+                    "ints.assign", "records", "records + st.st_size / sizeof(int32_t)"
+                )
+                + self.terminator
+            )
+            s12 = self.call("munmap", "data", "st.st_size") + self.terminator
+            s13 = self.do_return(expression="ints")
+            stmts = [s1, s2, s3, s4, s5, s6, s7, s8, s9, s10, s11, s12, s13]
+            return self.function(
+                func_name,
+                Composite.array(Primitive.Int),
+                {"file": Primitive.String},
+                *stmts,
+            )
+
+        self.register_helper(func_name, lib())
+        return self.call(func_name, file)
+
+    @imports(
+        "fcntl.h", "stdlib.h", "string_view", "sys/mman.h", "sys/stat.h", "unistd.h"
+    )
+    def map_file(self, file: str):
+        func_name = "map_file"
+
+        def lib():
+            s1 = self.declare("fd", Primitive.Int)
+            s2 = self.assign("fd", self.call("open", "file.c_str()", "O_RDONLY"))
+            s3 = self.if_else(self.lt("fd", 0), [self.exit(1)])
+            s4 = "struct stat st;"
+            s5 = self.call("fstat", "fd", "&st") + self.terminator
+            # an empty file can't be mapped
+            s6 = self.if_else(
+                self.eq("st.st_size", 0),
+                [
+                    self.call("close", "fd") + self.terminator,
+                    self.do_return(expression="std::string_view()"),
+                ],
+            )
+            s7 = self.declare(
+                "data",
+                "void*",
+                self.call(
+                    "mmap", "NULL", "st.st_size", "PROT_READ", "MAP_PRIVATE", "fd", 0
+                ),
+            )
+            s8 = self.call("close", "fd") + self.terminator
+            s9 = self.if_else(self.eq("data", "MAP_FAILED"), [self.exit(1)])
+            s10 = self.do_return(
+                expression=self.call(
+                    "std::string_view",
+                    "static_cast<const char*>(data)",
+                    "st.st_size",
+                    no_cc=True,
+                )
+            )
+            stmts = [s1, s2, s3, s4, s5, s6, s7, s8, s9, s10]
+            return self.function(
+                func_name, "std::string_view", {"file": Primitive.String}, *stmts
+            )
+
+        self.register_helper(func_name, lib())
+        return self.call(func_name, file)
+
+    @imports("string_view", "sys/mman.h")
+    def unmap_file(self, view: str):
+        return self.if_else(
+            self.negate(f"{view}.empty()"),
+            [
+                self.call(
+                    "munmap", f"const_cast<char*>({view}.data())", f"{view}.size()"
+                )
+                + self.terminator
+            ],
+        )
+
+    @imports("stdlib.h", "string", "unistd.h")
+    def temp_file(self):
+        func_name = "temp_file"
+
+        def lib():
+            s1 = 'char path[] = "/tmp/tokensXXXXXX";'
+            s2 = self.declare("fd", Primitive.Int)
+            s3 = self.assign("fd", self.call("mkstemp", "path"))
+            s4 = self.if_else(self.lt("fd", 0), [self.exit(1)])
+            s5 = self.call("close", "fd") + self.terminator
+            s6 = self.do_return(expression="path")
+            stmts = [s1, s2, s3, s4, s5, s6]
+            return self.function(func_name, Primitive.String, None, *stmts)
+
+        self.register_helper(func_name, lib())
+        return self.call(func_name)
+
+    @imports("cstdio")
+    def remove_file(self, file: str):
+        return self.call("std::remove", f"{file}.c_str()") + self.terminator
+
     @imports("iostream")
     def read_file_stdin(self):
         func_name = "read_file_stdin"
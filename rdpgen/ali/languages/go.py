@@ -3,9 +3,12 @@ from ..types import Type, Primitive, Composite, Expression
 from ..utils import imports, expression, convert_case
 from ..errors import MissingTypeError
 from .utils import format_function_arguments
-from typing import Dict, Union, Optional, List, Any
+from typing import Dict, Union, Optional, List, Any, Tuple
 import regex
 
+# name a method refers to the struct it was called on by
+RECEIVER = "p"
+
 
 class Go(Language):
     def __init__(
@@ -49,6 +52,9 @@ class Go(Language):
         elif isinstance(t, Composite):
             if t.base is Composite.CType.Array:
                 return f"[]{self.types(t.sub)}"
+            elif t.base is Composite.CType.Struct:
+                # structs are passed around by pointer so methods can change them
+                return f"*{t.sub}"
         else:
             # allow special types in certain functions
             # e.g. command() needs type Cmd
@@ -61,6 +67,35 @@ class Go(Language):
     def string_split(self, s: str, delim: str):
         return self.call("strings.Split", s, delim, no_cc=True)
 
+    def substring(self, s: str, start, length):
+        return f"{s}[{start} : {self.add(start, length)}]"
+
+    @imports("strconv", "fmt", "os")
+    def string_to_int(self, s: str):
+        func_name = "stringToInt"
+
+        def lib():
+            s1 = self.declare("n", Primitive.Int)
+            s2 = self.declare("err", "error")
+            s3 = self.assign("n, err", self.call("strconv.Atoi", "s", no_cc=True))
+            s4 = self.if_else(
+                self.neq("err", "nil"), [self.println("err"), self.exit(1)]
+            )
+            s5 = self.do_return(expression="n")
+            return self.function(
+                func_name,
+                Primitive.Int,
+                {"s": Primitive.String},
+                s1,
+                s2,
+                s3,
+                s4,
+                s5,
+            )
+
+        self.register_helper(func_name, lib())
+        return self.call(func_name, s)
+
     def array(self, t: Type, elements: List[Any]):
         joined = ", ".join(str(e) for e in elements)
         return f"[]{self.types(t)}{{{joined}}}"
@@ -83,6 +118,14 @@ class Go(Language):
             ),
         )
 
+    @convert_case(0)
+    def array_pop(self, id: str):
+        return self.assign(id, self.index(id, f":{self.array_length(id)}-1"))
+
+    @convert_case(0)
+    def array_clear(self, id: str):
+        return self.assign(id, self.index(id, ":0"))
+
     @convert_case(0)
     def array_iterate(
         self,
@@ -128,8 +171,13 @@ class Go(Language):
         return self.linesep.join(stmts)
 
     @convert_case(0)
-    def declare(self, id: str, type: Type):
-        return f"var {id} {self.types(type)}"
+    def declare(self, id: str, type: Type, value=None):
+        initial = "" if value is None else f" = {value}"
+        return f"var {id} {self.types(type)}{initial}"
+
+    @convert_case(0)
+    def constant(self, id: str, type: Type, value):
+        return f"const {id} {self.types(type)} = {value}"
 
     @convert_case(0)
     def assign(self, id: str, expr):
@@ -152,6 +200,41 @@ class Go(Language):
         func = f"func {id}({arg_list}){ret_part} {stmts}"
         return func
 
+    @expression
+    def struct(self, id: str, fields: Dict[str, Type], *methods):
+        # go starts fields as their zero values already
+        self.indent_lvl += 1
+        lines = [
+            self.indent(f"{self.cc(name)} {self.types(t)}")
+            for name, t in fields.items()
+        ]
+        self.indent_lvl -= 1
+        struct = f"type {id} struct {{{self.linesep}"
+        struct += "".join(line + self.linesep for line in lines) + "}"
+        return (self.linesep * 2).join([struct, *[str(m) for m in methods]])
+
+    @convert_case(1)
+    @expression
+    def method(
+        self,
+        struct: str,
+        id: str,
+        return_type: Optional[Type],
+        arguments: Union[Dict[str, Type], List[Type], None],
+        *statements,
+    ):
+        args = format_function_arguments(arguments)
+        arg_list = ", ".join([f"{name} {self.types(t)}" for name, t in args.items()])
+        ret_part = "" if return_type is None else " " + self.types(return_type)
+        stmts = self.block(*statements)
+        return f"func ({RECEIVER} *{struct}) {id}({arg_list}){ret_part} {stmts}"
+
+    def this(self, member: str):
+        return f"{RECEIVER}.{self.cc(member)}"
+
+    def instance(self, struct: str):
+        return f"&{struct}{{}}"
+
     def block(self, *statements):
         block = f"{{{self.linesep}"
         self.indent_lvl += 1
@@ -210,10 +293,37 @@ class Go(Language):
             return f"if {condition} {self.block(*true_stmts)} else {false_stmts[0]}"
         return f"if {condition} {self.block(*true_stmts)}{(' else ' + self.block(*false_stmts)) if false_stmts else ''}"  # noqa
 
+    @expression
+    def switch(
+        self,
+        expression,
+        cases: List[Tuple[List[Any], List[Any]]],
+        default=None,
+    ):
+        clauses = [
+            (f"case {', '.join(str(v) for v in values)}:", stmts)
+            for values, stmts in cases
+        ]
+        if default is not None:
+            clauses.append(("default:", default))
+        lines = [f"switch {expression} {{"]
+        for label, stmts in clauses:
+            lines.append(self.indent(label))
+            self.indent_lvl += 1
+            for stmt in stmts:
+                lines.append(self.indent(str(stmt)))
+            self.indent_lvl -= 1
+        lines.append(self.indent("}"))
+        return self.linesep.join(lines)
+
     @imports("os/exec")
     @expression
     def command(
-        self, command: str, suppress_output: bool = True, exit_on_failure: bool = True
+        self,
+        command: str,
+        suppress_output: bool = True,
+        exit_on_failure: bool = True,
+        on_failure: Optional[List[Any]] = None,
     ):
         stmts = []
         if suppress_output:
@@ -237,7 +347,9 @@ class Go(Language):
             to_assign = "err" if exit_on_failure else "_"
             stmts.append(self.assign(to_assign, self.call("cmd.Run", no_cc=True)))
             if exit_on_failure:
-                stmts.append(self.if_else(self.neq("err", "nil"), [self.exit(1)]))
+                stmts.append(
+                    self.if_else(self.neq("err", "nil"), on_failure or [self.exit(1)])
+                )
 
         else:
             stmts.append(self.declare("out", Composite.array("byte")))
@@ -257,16 +369,51 @@ class Go(Language):
                     + f".{self.call('Output', no_cc=True)}",
                 )
             )
+            # the output already ends in a newline, and it's shown even when
+            # the command fails as it's likely to say why
+            stmts.append(self.print("string(out)"))
             if exit_on_failure:
-                stmts.append(self.if_else(self.neq("err", "nil"), [self.exit(1)]))
-            stmts.append(self.println("string(out)"))
+                stmts.append(
+                    self.if_else(self.neq("err", "nil"), on_failure or [self.exit(1)])
+                )
+
+        return self.linesep.join([stmts[0]] + [self.indent(s) for s in stmts[1:]])
 
+    @imports("os", "os/exec")
+    @expression
+    def execute(
+        self,
+        args: List[Any],
+        suppress_output: bool = True,
+        exit_on_failure: bool = True,
+        on_failure: Optional[List[Any]] = None,
+    ):
+        stmts = [
+            self.declare("cmd", "*exec.Cmd"),
+            self.assign("cmd", self.call("exec.Command", *args, no_cc=True)),
+        ]
+        if not suppress_output:
+            # the fields are exported so their case isn't converted
+            stmts.append("cmd.Stdout = os.Stdout")
+            stmts.append("cmd.Stderr = os.Stderr")
+        if exit_on_failure:
+            stmts.append(self.declare("err", "error"))
+            stmts.append(self.assign("err", self.call("cmd.Run", no_cc=True)))
+            stmts.append(
+                self.if_else(self.neq("err", "nil"), on_failure or [self.exit(1)])
+            )
+        else:
+            stmts.append(self.call("cmd.Run", no_cc=True))
         return self.linesep.join([stmts[0]] + [self.indent(s) for s in stmts[1:]])
 
     @imports("os")
     def exit(self, code: int = 0):
         return self.call("os.Exit", code, no_cc=True)
 
+    def throw(self, error: str, *args):
+        # panics are recovered where the error is caught and returned from there
+        return f"panic(&{error}{{{', '.join(str(a) for a in args)}}})"
+
     @imports("bufio", "os")
     def read_lines(self, file: str):
         func_name = "readLines"
@@ -321,6 +468,163 @@ class Go(Language):
         self.register_helper(func_name, lib())
         return self.call(func_name, file)
 
+    @imports("encoding/binary", "fmt", "os", "syscall")
+    def read_ints(self, file: str):
+        func_name = "readInts"
+
+        def lib():
+            s1 = self.declare("f", "*os.File")
+            s2 = self.declare("err", "error")
+            s3 = self.assign("f, err", self.call("os.Open", "file", no_cc=True))
+            s4 = self.if_else(
+                self.neq("err", "nil"), [self.println("err"), self.exit(1)]
+            )
+            s5 = self.declare("info", "os.FileInfo")
+            s6 = self.assign("info, err", self.call("f.Stat", no_cc=True))
+            s7 = self.if_else(
+                self.neq("err", "nil"), [self.println("err"), self.exit(1)]
+            )
+            s8 = self.declare("data", Composite.array("byte"))
+            s9 = self.assign(
+                "data, err",
+                self.call(
+                    "syscall.Mmap",
+                    self.call("int", self.call("f.Fd", no_cc=True)),
+                    0,
+                    self.call("int", self.call("info.Size", no_cc=True)),
+                    "syscall.PROT_READ",
+                    "syscall.MAP_PRIVATE",
+                    no_cc=True,
+                ),
+            )
+            s10 = self.call("f.Close", no_cc=True)
+            s11 = self.if_else(
+                self.neq("err", "nil"), [self.println("err"), self.exit(1)]
+            )
+            s12 = self.declare("n", Primitive.Int)
+            s13 = self.assign("n", f"{self.array_length('data')} / 4")
+            s14 = self.declare("ints", Composite.array(Primitive.Int))
+            s15 = self.assign("ints", self.call("make", "[]int", "n"))
+            # each int is a little endian int32
+            record = self.call("binary.LittleEndian.Uint32", "data[4*i:]", no_cc=True)
+            s16 = self.declare("i", Primitive.Int)
+            s17 = self.for_loop(
+                "i",
+                0,
+                self.lt("i", "n"),
+                self.increment("i"),
+                self.assign(
+                    self.index("ints", "i"),
+                    self.call("int", self.call("int32", record)),
+                ),
+            )
+            s18 = self.call("syscall.Munmap", "data", no_cc=True)
+            s19 = self.do_return(expression="ints")
+            stmts = [s1, s2, s3, s4, s5, s6, s7, s8, s9, s10, s11, s12, s13]
+            stmts += [s14, s15, s16, s17, s18, s19]
+            return self.function(
+                func_name,
+                Composite.array(Primitive.Int),
+                {"file": Primitive.String},
+                *stmts,
+            )
+
+        self.register_helper(func_name, lib())
+        return self.call(func_name, file)
+
+    @imports("fmt", "os", "syscall")
+    def map_file(self, file: str):
+        func_name = "mapFile"
+
+        def lib():
+            s1 = self.declare("f", "*os.File")
+            s2 = self.declare("err", "error")
+            s3 = self.assign("f, err", self.call("os.Open", "file", no_cc=True))
+            s4 = self.if_else(
+                self.neq("err", "nil"), [self.println("err"), self.exit(1)]
+            )
+            s5 = self.declare("info", "os.FileInfo")
+            s6 = self.assign("info, err", self.call("f.Stat", no_cc=True))
+            s7 = self.if_else(
+                self.neq("err", "nil"), [self.println("err"), self.exit(1)]
+            )
+            s8 = self.declare("size", Primitive.Int)
+            s9 = self.assign(
+                "size", self.call("int", self.call("info.Size", no_cc=True))
+            )
+            # an empty file can't be mapped
+            s10 = self.if_else(
+                self.eq("size", 0),
+                [self.call("f.Close", no_cc=True), self.do_return(expression="nil")],
+            )
+            s11 = self.declare("data", Composite.array("byte"))
+            s12 = self.assign(
+                "data, err",
+                self.call(
+                    "syscall.Mmap",
+                    self.call("int", self.call("f.Fd", no_cc=True)),
+                    0,
+                    "size",
+                    "syscall.PROT_READ",
+                    "syscall.MAP_PRIVATE",
+                    no_cc=True,
+                ),
+            )
+            s13 = self.call("f.Close", no_cc=True)
+            s14 = self.if_else(
+                self.neq("err", "nil"), [self.println("err"), self.exit(1)]
+            )
+            # slicing the mapped bytes gives views of them without copying
+            s15 = self.do_return(expression="data")
+            stmts = [s1, s2, s3, s4, s5, s6, s7, s8, s9, s10, s11, s12, s13, s14, s15]
+            return self.function(
+                func_name,
+                Composite.array("byte"),
+                {"file": Primitive.String},
+                *stmts,
+            )
+
+        self.register_helper(func_name, lib())
+        return self.call(func_name, file)
+
+    @imports("syscall")
+    def unmap_file(self, view: str):
+        return self.if_else(
+            self.gt(self.array_length(view), 0),
+            [self.call("syscall.Munmap", view, no_cc=True)],
+        )
+
+    @imports("fmt", "io/ioutil", "os")
+    def temp_file(self):
+        func_name = "tempFile"
+
+        def lib():
+            s1 = self.declare("f", "*os.File")
+            s2 = self.declare("err", "error")
+            s3 = self.assign(
+                "f, err",
+                self.call(
+                    "ioutil.TempFile",
+                    self.string(""),
+                    self.string("tokens"),
+                    no_cc=True,
+                ),
+            )
+            s4 = self.if_else(
+                self.neq("err", "nil"), [self.println("err"), self.exit(1)]
+            )
+            s5 = self.call("f.Close", no_cc=True)
+            s6 = self.do_return(expression=self.call("f.Name", no_cc=True))
+            stmts = [s1, s2, s3, s4, s5, s6]
+            return self.function(func_name, Primitive.String, None, *stmts)
+
+        self.register_helper(func_name, lib())
+        return self.call(func_name)
+
+    @imports("os")
+    def remove_file(self, file: str):
+        return self.call("os.Remove", file, no_cc=True)
+
     @imports("bufio", "os")
     def read_file_stdin(self):
         func_name = "readFileStdin"
@@ -3,7 +3,7 @@ from ..types import Type, Composite, Primitive, Expression
 from ..utils import imports, expression, convert_case
 from ..errors import MissingTypeError
 from .utils import format_function_arguments
-from typing import Dict, Union, Optional, List, Any
+from typing import Dict, Union, Optional, List, Any, Tuple
 import regex as re
 
 
@@ -20,6 +20,10 @@ class Python(Language):
         super().__init__(expand_tabs, tab_size, case, imports)
         self.__main_func: bool = False
         self.declare_vars = declare_vars
+        # the name of each dict switches look up the case of a value in by its
+        # entries, defined at the end of the module once the constants they use
+        # are. switches with the same cases share one
+        self.__switch_tables: Dict[str, str] = {}
 
     @property
     def name(self) -> str:
@@ -50,11 +54,17 @@ class Python(Language):
         return includes + "\n\n"
 
     def postlude(self, **kwargs):
+        tables = "".join(
+            f"{name} = {{{entries}}}\n\n"
+            for entries, name in self.__switch_tables.items()
+        )
         if self.__main_func:
-            return self.if_else(
-                self.eq("__name__", self.string("__main__")), [self.call("main")]
+            return tables + str(
+                self.if_else(
+                    self.eq("__name__", self.string("__main__")), [self.call("main")]
+                )
             )
-        return ""
+        return tables
 
     def types(self, t: Type) -> str:
         if isinstance(t, Primitive):
@@ -70,6 +80,11 @@ class Python(Language):
             if t.base is Composite.CType.Array:
                 self.import_package("typing.List")
                 return f"List[{self.types(t.sub)}]"
+            elif t.base is Composite.CType.Struct:
+                return t.sub
+        else:
+            # allow special types, e.g. a class from an imported module
+            return str(t)
 
     def string(self, s: str, double: bool = True):
         return f'"{s}"' if double else f"'{s}'"
@@ -77,6 +92,12 @@ class Python(Language):
     def string_split(self, s: str, delim: str):
         return f"{s}.{self.call('split', delim)}"
 
+    def substring(self, s: str, start, length):
+        return f"{s}[{start} : {self.add(start, length)}]"
+
+    def string_to_int(self, s: str):
+        return self.call("int", s)
+
     def array(self, t: Type, elements: List[Any]):
         joined = ", ".join(str(e) for e in elements)
         return f"[{joined}]"
@@ -92,6 +113,14 @@ class Python(Language):
     def array_remove(self, id: str, idx: int):
         return self.call(f"{id}.pop", idx)
 
+    @convert_case(0)
+    def array_pop(self, id: str):
+        return self.call(f"{id}.pop")
+
+    @convert_case(0)
+    def array_clear(self, id: str):
+        return self.call(f"{id}.clear")
+
     @convert_case(0, 1)
     @expression
     def array_iterate(
@@ -147,12 +176,17 @@ class Python(Language):
 
     @convert_case(0)
     @imports("typing.get_type_hints")
-    def declare(self, id: str, type: Type):
+    def declare(self, id: str, type: Type, value=None):
+        initial = "" if value is None else f" = {value}"
         if self.declare_vars:
-            return f"{id}: {self.types(type)}"
+            return f"{id}: {self.types(type)}{initial}"
         else:
             self.imports.discard("typing.get_type_hints")
-            return ""
+            return "" if value is None else f"{id}{initial}"
+
+    def constant(self, id: str, type: Type, value):
+        # python has no constants, it's a variable that is never assigned to again
+        return self.declare(id, type, value)
 
     @convert_case(0)
     def assign(self, id: str, expr):
@@ -178,6 +212,61 @@ class Python(Language):
         func = f"def {id}({arg_list}){ret_part}{stmts}"
         return func
 
+    def zero(self, t: Type):
+        """Value a field of a type starts as"""
+        if t is Primitive.Int:
+            return "0"
+        elif t is Primitive.Float:
+            return "0.0"
+        elif t is Primitive.String:
+            return self.string("")
+        elif t is Primitive.Bool:
+            return self.false()
+        elif isinstance(t, Composite) and t.base is Composite.CType.Array:
+            return "[]"
+        elif isinstance(t, Composite) and t.base is Composite.CType.Struct:
+            return self.instance(t.sub)
+        return "None"
+
+    @expression
+    def struct(self, id: str, fields: Dict[str, Type], *methods):
+        # fields are set to their zero values in the constructor
+        self.indent_lvl += 1
+        init = self.block(
+            *[
+                self.declare(f"self.{name}", t, self.zero(t))
+                for name, t in fields.items()
+            ]
+            or [self.do_nothing()]
+        )
+        members = [self.indent(f"def __init__(self){init}")]
+        members.extend(self.indent(str(m)) for m in methods)
+        self.indent_lvl -= 1
+        return f"class {id}:{self.linesep}" + (self.linesep * 2).join(members)
+
+    @convert_case(1)
+    @expression
+    def method(
+        self,
+        struct: str,
+        id: str,
+        return_type: Optional[Type],
+        arguments: Union[Dict[str, Type], List[Type], None],
+        *statements,
+    ):
+        args = format_function_arguments(arguments)
+        arg_list = ", ".join(
+            ["self", *[f"{name}: {self.types(t)}" for name, t in args.items()]]
+        )
+        ret_part = "" if return_type is None else " -> " + self.types(return_type)
+        return f"def {id}({arg_list}){ret_part}{self.block(*statements)}"
+
+    def this(self, member: str):
+        return f"self.{self.cc(member)}"
+
+    def instance(self, struct: str):
+        return f"{struct}()"
+
     def block(self, *statements):
         block = f":{self.linesep}"
         self.indent_lvl += 1
@@ -282,6 +371,48 @@ class Python(Language):
             expr += self.linesep + self.indent(f"{('else' + self.block(*false_stmts))}")
         return expr
 
+    @expression
+    def switch(
+        self,
+        expression,
+        cases: List[Tuple[List[Any], List[Any]]],
+        default=None,
+    ):
+        # there's no switch before python 3.10, so the case of the value is
+        # looked up in a dict made once, and then picked by halving the range of
+        # cases it can be in rather than testing each case in turn
+        if not cases:
+            stmts = default or [self.do_nothing()]
+            return self.linesep.join(
+                [str(stmts[0])] + [self.indent(str(s)) for s in stmts[1:]]
+            )
+        entries = ", ".join(
+            f"{value}: {idx}"
+            for idx, (values, _) in enumerate(cases)
+            for value in values
+        )
+        table = self.__switch_tables.setdefault(
+            entries, f"switch_cases{len(self.__switch_tables)}"
+        )
+        # a value in none of the cases is the default's, after the last case
+        branches = [stmts or [self.do_nothing()] for _, stmts in cases]
+        branches.append(default or [self.do_nothing()])
+
+        def pick(first: int, last: int) -> List[Any]:
+            if first == last:
+                return branches[first]
+            middle = (first + last + 1) // 2
+            return [
+                self.if_else(
+                    self.lt("case", middle),
+                    pick(first, middle - 1),
+                    false_stmts=pick(middle, last),
+                )
+            ]
+
+        lookup = self.assign("case", f"{table}.get({expression}, {len(cases)})")
+        return self.linesep.join([lookup, self.indent(str(pick(0, len(cases))[0]))])
+
     def negate(self, expr: Expression):
         return f"not ({expr})"
 
@@ -300,7 +431,11 @@ class Python(Language):
     @imports("subprocess")
     @expression
     def command(
-        self, command: str, suppress_output: bool = True, exit_on_failure: bool = True
+        self,
+        command: str,
+        suppress_output: bool = True,
+        exit_on_failure: bool = True,
+        on_failure: Optional[List[Any]] = None,
     ):
         cmd = command.replace('"', '"')
         subprocess_opts = [
@@ -320,15 +455,46 @@ class Python(Language):
                 )
             )
             stmts.append(
-                self.if_else(self.neq("response.returncode", 0), [self.exit(code=1)])
+                self.if_else(
+                    self.neq("response.returncode", 0),
+                    on_failure or [self.exit(code=1)],
+                )
             )
         else:
             stmts.append(self.call("subprocess.run", cmd, *subprocess_opts))
         return self.linesep.join([stmts[0]] + [self.indent(s) for s in stmts[1:]])
 
+    @imports("subprocess")
+    @expression
+    def execute(
+        self,
+        args: List[Any],
+        suppress_output: bool = True,
+        exit_on_failure: bool = True,
+        on_failure: Optional[List[Any]] = None,
+    ):
+        argv = "[" + ", ".join(str(a) for a in args) + "]"
+        subprocess_opts = []
+        if suppress_output:
+            subprocess_opts = ["stdout=subprocess.DEVNULL", "stderr=subprocess.DEVNULL"]
+
+        run = self.call("subprocess.run", argv, *subprocess_opts)
+        if not exit_on_failure:
+            return run
+        stmts = [
+            self.assign("response", run),
+            self.if_else(
+                self.neq("response.returncode", 0), on_failure or [self.exit(code=1)]
+            ),
+        ]
+        return self.linesep.join([stmts[0]] + [self.indent(s) for s in stmts[1:]])
+
     def exit(self, code: int = 0):
         return self.call("exit", code)
 
+    def throw(self, error: str, *args):
+        return f"raise {error}({', '.join(str(a) for a in args)})"
+
     def read_lines(self, file: str):
         func_name = "read_lines"
 
@@ -364,6 +530,81 @@ class Python(Language):
         self.register_helper(func_name, lib())
         return self.call(func_name, file)
 
+    @imports("mmap")
+    def read_ints(self, file: str):
+        func_name = "read_ints"
+
+        def lib():
+            # the memory map stays open for as long as the view of it is used
+            s1 = self.assign("f", self.call("open", "file", self.string("rb")))
+            s2 = self.assign(
+                "data",
+                self.call(
+                    "mmap.mmap", self.call("f.fileno"), 0, "access=mmap.ACCESS_READ"
+                ),
+            )
+            s3 = self.call("f.close")
+            s4 = self.do_return(expression='memoryview(data).cast("i")')
+            stmts = [s1, s2, s3, s4]
+            return self.function(
+                func_name,
+                Composite.array(Primitive.Int),
+                {"file": Primitive.String},
+                *stmts,
+            )
+
+        self.register_helper(func_name, lib())
+        return self.call(func_name, file)
+
+    @imports("mmap", "os")
+    def map_file(self, file: str):
+        func_name = "map_file"
+
+        def lib():
+            s1 = self.assign("f", self.call("open", "file", self.string("rb")))
+            # an empty file can't be mapped
+            s2 = self.if_else(
+                self.eq(self.call("os.fstat", self.call("f.fileno")) + ".st_size", 0),
+                [self.call("f.close"), self.do_return(expression='memoryview(b"")')],
+            )
+            # the memory map stays open for as long as a view of it is used
+            s3 = self.assign(
+                "data",
+                self.call(
+                    "mmap.mmap", self.call("f.fileno"), 0, "access=mmap.ACCESS_READ"
+                ),
+            )
+            s4 = self.call("f.close")
+            s5 = self.do_return(expression=self.call("memoryview", "data"))
+            stmts = [s1, s2, s3, s4, s5]
+            return self.function(
+                func_name, "memoryview", {"file": Primitive.String}, *stmts
+            )
+
+        self.register_helper(func_name, lib())
+        return self.call(func_name, file)
+
+    def unmap_file(self, view: str):
+        # the map is closed once nothing views it, a slice of it may still be
+        return f"del {view}"
+
+    @imports("os", "tempfile")
+    def temp_file(self):
+        func_name = "temp_file"
+
+        def lib():
+            s1 = self.assign("fd, path", self.call("tempfile.mkstemp"))
+            s2 = self.call("os.close", "fd")
+            s3 = self.do_return(expression="path")
+            return self.function(func_name, Primitive.String, None, s1, s2, s3)
+
+        self.register_helper(func_name, lib())
+        return self.call(func_name)
+
+    @imports("os")
+    def remove_file(self, file: str):
+        return self.call("os.remove", file)
+
     @expression
     @imports("sys")
     def read_file_stdin(self):
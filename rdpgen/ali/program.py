@@ -5,8 +5,11 @@ from typing import List
 
 
 class Program:
-    def __init__(self, lang: Language):
+    def __init__(self, lang: Language, **options):
         self.lang = lang
+        # passed to the language's prelude and postlude, e.g. the package of a
+        # go program
+        self.options = options
         # TODO: get a better way than add statments via prog.lang
         # maybe program inherits language and proxies all methods to the .lang instance
         # and adds it to __statements
@@ -24,8 +27,8 @@ class Program:
         for stmt in self.__statements:
             program += str(stmt) + "\n\n"
         # generate language prelude
-        program = f"{self.lang.prelude()}" + program
-        program += str(self.lang.postlude())
+        program = f"{self.lang.prelude(**self.options)}" + program
+        program += str(self.lang.postlude(**self.options))
         return program
 
     def write_file(self, filename: str):
@@ -25,6 +25,21 @@ IF_NO_ELSE = """if (mode == "debug") {
   std::cout << "=== RUNNING IN DEBUG MODE ===" << std::endl;
 }"""
 
+SWITCH = """switch (kind) {
+  case 1:
+  case 2: {
+    std::cout << "one or two" << std::endl;
+    break;
+  }
+  case 3: {
+    break;
+  }
+  default: {
+    std::cout << "other" << std::endl;
+    break;
+  }
+}"""
+
 ARRAY_DECLARE_ASSIGN = """int main(int argc, char* argv[]) {
   std::vector<int> mylist;
   mylist = {1, 2, 3};
@@ -127,6 +142,12 @@ if (rc != 0) {
   exit(1);
 }"""
 
+EXECUTE_OUTPUT_WITH_EXIT = """int rc;
+rc = execute({"ls", "a b;c"}, false);
+if (rc != 0) {
+  exit(1);
+}"""
+
 READ_LINES_FUNC = """std::vector<std::string> read_lines(std::string file) {
   std::fstream f;
   std::vector<std::string> lines;
@@ -183,27 +204,26 @@ STRING_SPLIT_FUNC = """std::vector<std::string> split_string(std::string s, char
 
 
 def READ_FILE_PROGRAM(fname: str):
-    return rf"""#include <fstream>
+    return rf"""#include <cerrno>
+#include <cstring>
+#include <fstream>
 #include <iostream>
+#include <sstream>
 #include <stdlib.h>
 #include <string>
 
 std::string read_file(std::string file);
 
 std::string read_file(std::string file) {{
-  std::fstream f;
-  std::string content;
-  f.open(file, std::ios::in);
-  if (f.is_open()) {{
-    std::string line;
-    while (getline(f, line)) {{
-      content = content + line + "\n";
-    }}
-    f.close();
-  }} else {{
+  std::ifstream f;
+  f.open(file, std::ios::binary);
+  if (!(f.is_open())) {{
+    std::cout << "open " << file << ": " << strerror(errno) << std::endl;
     exit(1);
   }}
-  return content;
+  std::stringstream content;
+  content << f.rdbuf();
+  return content.str();
 }}
 
 int main(int argc, char* argv[]) {{
@@ -53,6 +53,17 @@ def test_cpp_if_else():
     assert second == IF_NO_ELSE
 
 
+def test_cpp_switch():
+    g = Cpp(expand_tabs=True)
+    cases = [([1, 2], [g.println(g.string("one or two"))]), ([3], [])]
+    assert g.switch("kind", cases, default=[g.println(g.string("other"))]) == SWITCH
+
+
+def test_cpp_constant():
+    g = Cpp(expand_tabs=True)
+    assert g.constant("KIND_EOF", Primitive.Int, 0) == "const int kind_eof = 0;"
+
+
 def test_cpp_types_array():
     g = Cpp(expand_tabs=True)
     assert g.types(Composite.array(Primitive.Int)) == "std::vector<int>"
@@ -154,6 +165,14 @@ def test_cpp_command_with_exit():
     assert c == COMMAND_OUTPUT_WITH_EXIT
 
 
+def test_cpp_execute():
+    cpp = Cpp(expand_tabs=True)
+    c = cpp.execute([cpp.string("ls"), cpp.string("a b;c")], suppress_output=False)
+    assert "spawn.h" in cpp.imports
+    assert "execute" in cpp.helper_funcs
+    assert c == EXECUTE_OUTPUT_WITH_EXIT
+
+
 def test_cpp_exit():
     cpp = Cpp(expand_tabs=True)
     assert cpp.exit() == "exit(0);"
@@ -163,6 +182,11 @@ def test_cpp_exit():
         assert cpp.exit(c) == f"exit({c});"
 
 
+def test_cpp_throw():
+    cpp = Cpp(expand_tabs=True)
+    assert cpp.throw("ParseError", 3, cpp.s("oops")) == 'throw ParseError(3, "oops");'
+
+
 def test_cpp_read_lines():
     cpp = Cpp(expand_tabs=True)
     cpp.read_lines("myfile.txt")
@@ -175,6 +199,41 @@ def test_cpp_read_lines():
     assert f == READ_LINES_FUNC
 
 
+def test_cpp_temp_file():
+    cpp = Cpp(expand_tabs=True)
+    assert cpp.assign("path", cpp.temp_file()) == "path = temp_file();"
+    assert "mkstemp(path)" in str(cpp.helper_funcs["temp_file"])
+    assert cpp.remove_file("path") == "std::remove(path.c_str());"
+
+
+def test_cpp_struct():
+    cpp = Cpp(expand_tabs=True)
+    s = cpp.struct(
+        "Counter",
+        {"count": Primitive.Int},
+        cpp.method(
+            "Counter",
+            "add",
+            None,
+            {"by": Primitive.Int},
+            cpp.increment(cpp.this("count"), "by"),
+        ),
+    )
+    assert (
+        s
+        == """class Counter {
+public:
+  int count{};
+
+  void add(int by) {
+    count = count + by;
+  }
+};"""
+    )
+    c = cpp.declare("c", Composite.struct("Counter"), cpp.instance("Counter"))
+    assert c == "Counter c = Counter();"
+
+
 def test_cpp_boolean_and():
     cpp = Cpp(expand_tabs=True)
     assert cpp.bool_and(cpp.gt("x", 10), cpp.lt("x", 20)) == "x > 10 && x < 20"
@@ -286,12 +345,44 @@ def test_cpp_string_split():
         assert imp in cpp.imports
 
 
+def test_cpp_substring():
+    cpp = Cpp(expand_tabs=True)
+    assert cpp.substring("text", "i", "n") == "text.substr(i, n)"
+
+
+def test_cpp_string_to_int():
+    cpp = Cpp(expand_tabs=True, tab_size=2)
+    assert cpp.string_to_int(cpp.index("record", 0)) == "std::stoi(record[0])"
+    assert "string" in cpp.imports
+
+
 def test_cpp_array_remove():
     cpp = Cpp(expand_tabs=True)
     assert cpp.array_remove("mylist", 0) == "mylist.erase(mylist.begin() + 0);"
     assert cpp.array_remove("mylist", 10) == "mylist.erase(mylist.begin() + 10);"
 
 
+def test_cpp_array_pop():
+    cpp = Cpp(expand_tabs=True, tab_size=2)
+    assert cpp.array_pop("mylist") == "mylist.pop_back();"
+
+
+def test_cpp_array_clear():
+    cpp = Cpp(expand_tabs=True, tab_size=2)
+    assert cpp.array_clear("mylist") == "mylist.clear();"
+
+
+def test_cpp_declare_with_value():
+    cpp = Cpp(expand_tabs=True, tab_size=2)
+    assert cpp.declare("x", Primitive.Int, 10) == "int x = 10;"
+    assert (
+        cpp.declare(
+            "xs", Composite.array(Primitive.Int), cpp.array(Primitive.Int, [1, 2])
+        )
+        == "std::vector<int> xs = {1, 2};"
+    )
+
+
 def test_cpp_booleans():
     cpp = Cpp(expand_tabs=True)
     assert cpp.types(Primitive.Bool) == "bool"
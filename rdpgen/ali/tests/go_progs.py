@@ -29,6 +29,14 @@ IF_NO_ELSE = """if mode == "debug" {
   fmt.Println("=== RUNNING IN DEBUG MODE ===")
 }"""
 
+SWITCH = """switch kind {
+case 1, 2:
+  fmt.Println("one or two")
+case 3:
+default:
+  fmt.Println("other")
+}"""
+
 ARRAY_DECLARE_ASSIGN = """func main() {
   var mylist []int
   mylist = []int{1, 2, 3}
@@ -128,15 +136,25 @@ if err != nil {
 
 COMMAND_OUTPUT = """var out []byte
 out, _ = exec.Command("bash", "-c", "ls -l").Output()
-fmt.Println(string(out))"""
+fmt.Print(string(out))"""
 
 COMMAND_OUTPUT_WITH_EXIT = """var out []byte
 var err error
 out, err = exec.Command("bash", "-c", "ls -l").Output()
+fmt.Print(string(out))
 if err != nil {
   os.Exit(1)
-}
-fmt.Println(string(out))"""
+}"""
+
+EXECUTE_OUTPUT_WITH_EXIT = """var cmd *exec.Cmd
+cmd = exec.Command("ls", "a b;c")
+cmd.Stdout = os.Stdout
+cmd.Stderr = os.Stderr
+var err error
+err = cmd.Run()
+if err != nil {
+  os.Exit(1)
+}"""
 
 READ_LINES_FUNC = """func readLines(file string) []string {
   var f *os.File
@@ -1,4 +1,4 @@
-from rdpgen.ali import Go, Type, Primitive, Composite, MissingTypeError
+from rdpgen.ali import Go, Program, Type, Primitive, Composite, MissingTypeError
 
 from .go_progs import *
 import pytest
@@ -65,6 +65,17 @@ def test_go_if_else():
     assert second == IF_NO_ELSE
 
 
+def test_go_switch():
+    g = Go(expand_tabs=True, tab_size=2)
+    cases = [([1, 2], [g.println(g.string("one or two"))]), ([3], [])]
+    assert g.switch("kind", cases, default=[g.println(g.string("other"))]) == SWITCH
+
+
+def test_go_constant():
+    g = Go(expand_tabs=True, tab_size=2)
+    assert g.constant("KIND_EOF", Primitive.Int, 0) == "const kindEof int = 0"
+
+
 def test_go_types_array():
     g = Go(expand_tabs=True, tab_size=2)
     assert g.types(Composite.array(Primitive.Int)) == "[]int"
@@ -90,6 +101,13 @@ def test_go_prelude():
     assert g.prelude() == HELLO_WORLD_PRELUDE
 
 
+def test_go_program_package():
+    g = Go(expand_tabs=True, tab_size=2)
+    prog = Program(g, package="parser")
+    prog.add(g.function("greet", None, None, g.println(g.string("hello world"))))
+    assert prog.generate().startswith("package parser\n")
+
+
 def test_go_comment_oneline():
     g = Go(expand_tabs=True, tab_size=2)
     assert g.comment("i am a comment") == "// i am a comment"
@@ -156,6 +174,13 @@ def test_go_command_exit_on_failure():
     assert c == COMMAND_OUTPUT_WITH_EXIT
 
 
+def test_go_execute():
+    g = Go(expand_tabs=True, tab_size=2)
+    c = g.execute([g.string("ls"), g.string("a b;c")], suppress_output=False)
+    assert "os/exec" in g.imports
+    assert c == EXECUTE_OUTPUT_WITH_EXIT
+
+
 def test_go_exit():
     g = Go(expand_tabs=True, tab_size=2)
     assert g.exit() == "os.Exit(0)"
@@ -165,6 +190,11 @@ def test_go_exit():
         assert g.exit(c) == f"os.Exit({c})"
 
 
+def test_go_throw():
+    g = Go(expand_tabs=True, tab_size=2)
+    assert g.throw("ParseError", 3, g.s("oops")) == 'panic(&ParseError{3, "oops"})'
+
+
 def test_go_read_lines():
     g = Go(expand_tabs=True, tab_size=2)
     g.read_lines("myfile.txt")
@@ -177,6 +207,40 @@ def test_go_read_lines():
     assert f == READ_LINES_FUNC
 
 
+def test_go_temp_file():
+    g = Go(expand_tabs=True, tab_size=2)
+    assert g.assign("path", g.temp_file()) == "path = tempFile()"
+    assert 'ioutil.TempFile("", "tokens")' in str(g.helper_funcs["tempFile"])
+    assert g.remove_file("path") == "os.Remove(path)"
+
+
+def test_go_struct():
+    g = Go(expand_tabs=True, tab_size=2)
+    s = g.struct(
+        "Counter",
+        {"count": Primitive.Int},
+        g.method(
+            "Counter",
+            "add",
+            None,
+            {"by": Primitive.Int},
+            g.increment(g.this("count"), "by"),
+        ),
+    )
+    assert (
+        s
+        == """type Counter struct {
+  count int
+}
+
+func (p *Counter) add(by int) {
+  p.count = p.count + by
+}"""
+    )
+    c = g.declare("c", Composite.struct("Counter"), g.instance("Counter"))
+    assert c == "var c *Counter = &Counter{}"
+
+
 def test_go_array_append():
     g = Go(expand_tabs=True, tab_size=2)
     assert g.array_append("mylist", 5) == "mylist = append(mylist, 5)"
@@ -282,6 +346,19 @@ def test_go_string_split():
     assert "strings" in g.imports
 
 
+def test_go_substring():
+    g = Go(expand_tabs=True, tab_size=2)
+    assert g.substring("text", "i", "n") == "text[i : i + n]"
+
+
+def test_go_string_to_int():
+    g = Go(expand_tabs=True, tab_size=2)
+    assert g.string_to_int(g.index("record", 0)) == "stringToInt(record[0])"
+    assert "stringToInt" in g.helper_funcs
+    assert "strconv.Atoi(s)" in str(g.helper_funcs["stringToInt"])
+    assert "strconv" in g.imports
+
+
 def test_go_array_remove():
     g = Go(expand_tabs=True, tab_size=2)
     assert g.array_remove("mylist", 0) == "mylist = append(mylist[:0], mylist[1:]...)"
@@ -290,6 +367,25 @@ def test_go_array_remove():
     )
 
 
+def test_go_array_pop():
+    g = Go(expand_tabs=True, tab_size=2)
+    assert g.array_pop("mylist") == "mylist = mylist[:len(mylist)-1]"
+
+
+def test_go_array_clear():
+    g = Go(expand_tabs=True, tab_size=2)
+    assert g.array_clear("my_list") == "myList = myList[:0]"
+
+
+def test_go_declare_with_value():
+    g = Go(expand_tabs=True, tab_size=2)
+    assert g.declare("x", Primitive.Int, 10) == "var x int = 10"
+    assert (
+        g.declare("xs", Composite.array(Primitive.Int), g.array(Primitive.Int, [1, 2]))
+        == "var xs []int = []int{1, 2}"
+    )
+
+
 def test_go_booleans():
     g = Go(expand_tabs=True, tab_size=2)
     assert g.types(Primitive.Bool) == "bool"
@@ -0,0 +1,66 @@
+from rdpgen.ali import *
+from .common import run_cmd
+from tempfile import NamedTemporaryFile
+from pathlib import Path
+
+VIEWS = {"python": "memoryview", "golang": Composite.array("byte"), "c++": "std::string_view"}
+
+
+def create_mapfile_program(lang, filename, start, length):
+    prog = Program(lang)
+    p = prog.lang
+    main = p.function(
+        "main",
+        None,
+        None,
+        p.declare("text", VIEWS[p.name]),
+        p.assign("text", p.map_file(p.string(filename))),
+        p.println(p.array_length("text")),
+        p.println(p.array_length(p.substring("text", start, length))),
+        p.unmap_file("text"),
+    )
+    prog.add(main)
+    return prog
+
+
+def test_map_file_program():
+    f1 = NamedTemporaryFile("w", delete=False)
+    f1.write("line1\nline2\n")
+    f1.close()
+    empty = NamedTemporaryFile("w", delete=False)
+    empty.close()
+    tests = {
+        "python": {
+            "lang": Python(expand_tabs=True, tab_size=2),
+            "suffix": ".py",
+            "cmd": "python3 _",
+        },
+        "go": {
+            "lang": Go(expand_tabs=True, tab_size=2),
+            "suffix": ".go",
+            "cmd": "go run _",
+        },
+        "cpp": {
+            "lang": Cpp(expand_tabs=True, tab_size=2),
+            "suffix": ".cpp",
+            "cmd": "cd ~ && g++ _ && ./a.out",
+        },
+    }
+
+    for opts in tests.values():
+        # slices are kept in bounds, which go and c++ don't clamp them to
+        for file, start, length, output in [
+            (f1.name, 2, 3, "12\n3\n"),
+            (empty.name, 0, 0, "0\n0\n"),
+        ]:
+            prog = create_mapfile_program(opts["lang"], file, start, length)
+
+            # write out and run asserting the output from the program is as expected
+            f2 = NamedTemporaryFile("w", suffix=opts["suffix"], delete=False)
+            prog.write_file(f2.name)
+
+            cmd = opts["cmd"].replace("_", f2.name)
+            cmd = cmd.replace("~", str(Path(f2.name).parent))
+            assert run_cmd(cmd) == output
+
+            f2.close()
@@ -32,6 +32,18 @@ else:
 IF_NO_ELSE = """if mode == "debug":
   print("=== RUNNING IN DEBUG MODE ===")"""
 
+SWITCH = """case = switch_cases0.get(kind, 2)
+if case < 1:
+  print("one or two")
+elif case < 2:
+  pass
+else:
+  print("other")"""
+
+SWITCH_CASES = """switch_cases0 = {1: 0, 2: 0, 3: 1}
+
+"""
+
 ARRAY_DECLARE_ASSIGN = """def main():
   mylist: List[int]
   mylist = [1, 2, 3]
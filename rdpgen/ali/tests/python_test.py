@@ -106,6 +106,19 @@ def test_python_if_else():
     assert second == IF_NO_ELSE
 
 
+def test_python_switch():
+    p = Python(expand_tabs=True, tab_size=2)
+    cases = [([1, 2], [p.println(p.string("one or two"))]), ([3], [])]
+    assert p.switch("kind", cases, default=[p.println(p.string("other"))]) == SWITCH
+    # the dict of cases is defined at the end of the module
+    assert p.postlude() == SWITCH_CASES
+
+
+def test_python_constant():
+    p = Python(expand_tabs=True, tab_size=2)
+    assert p.constant("KIND_EOF", Primitive.Int, 0) == "kind_eof: int = 0"
+
+
 def test_python_types_array():
     p = Python(expand_tabs=True, tab_size=2)
     assert p.types(Composite.array(Primitive.Int)) == "List[int]"
@@ -220,6 +233,22 @@ def test_python_command_exit_on_failure():
     )
 
 
+def test_python_execute():
+    p = Python(expand_tabs=True, tab_size=2)
+    c = p.execute([p.string("ls"), p.string("a b;c")], exit_on_failure=False)
+    assert "subprocess" in p.imports
+    assert (
+        c
+        == """subprocess.run(["ls", "a b;c"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)"""  # noqa: E501
+    )
+
+    c = p.execute([p.string("ls"), p.string("a b;c")], suppress_output=False)
+    assert (
+        str(c)
+        == """response = subprocess.run(["ls", "a b;c"])\nif response.returncode != 0:\n  exit(1)"""  # noqa: E501
+    )
+
+
 def test_python_exit():
     p = Python(expand_tabs=True, tab_size=2)
     assert p.exit() == "exit(0)"
@@ -228,6 +257,11 @@ def test_python_exit():
         assert p.exit(c) == f"exit({c})"
 
 
+def test_python_throw():
+    p = Python(expand_tabs=True, tab_size=2)
+    assert p.throw("ParseError", 3, p.s("oops")) == 'raise ParseError(3, "oops")'
+
+
 def test_python_read_lines():
     p = Python(expand_tabs=True, tab_size=2)
     p.read_lines("myfile.txt")
@@ -240,6 +274,39 @@ def test_python_read_lines():
     assert f == READ_LINES_FUNC
 
 
+def test_python_temp_file():
+    p = Python(expand_tabs=True, tab_size=2)
+    assert p.assign("path", p.temp_file()) == "path = temp_file()"
+    assert "tempfile.mkstemp()" in str(p.helper_funcs["temp_file"])
+    assert p.remove_file("path") == "os.remove(path)"
+
+
+def test_python_struct():
+    p = Python(expand_tabs=True, tab_size=2)
+    s = p.struct(
+        "Counter",
+        {"count": Primitive.Int},
+        p.method(
+            "Counter",
+            "add",
+            None,
+            {"by": Primitive.Int},
+            p.increment(p.this("count"), "by"),
+        ),
+    )
+    assert (
+        s
+        == """class Counter:
+  def __init__(self):
+    self.count: int = 0
+
+  def add(self, by: int):
+    self.count = self.count + by"""
+    )
+    c = p.declare("c", Composite.struct("Counter"), p.instance("Counter"))
+    assert c == "c: Counter = Counter()"
+
+
 def test_python_array_append():
     p = Python(expand_tabs=True, tab_size=2)
     assert p.array_append("mylist", 5) == "mylist.append(5)"
@@ -339,12 +406,40 @@ def test_python_string_split():
     assert p.string_split("list", p.string(":")) == """list.split(":")"""
 
 
+def test_python_substring():
+    p = Python(expand_tabs=True, tab_size=2)
+    assert p.substring("text", "i", "n") == "text[i : i + n]"
+
+
+def test_python_string_to_int():
+    p = Python(expand_tabs=True, tab_size=2)
+    assert p.string_to_int(p.index("record", 0)) == "int(record[0])"
+
+
 def test_python_array_remove():
     p = Python(expand_tabs=True, tab_size=2)
     assert p.array_remove("mylist", 0) == "mylist.pop(0)"
     assert p.array_remove("mylist", 10) == "mylist.pop(10)"
 
 
+def test_python_array_pop():
+    p = Python(expand_tabs=True, tab_size=2)
+    assert p.array_pop("mylist") == "mylist.pop()"
+
+
+def test_python_array_clear():
+    p = Python(expand_tabs=True, tab_size=2)
+    assert p.array_clear("mylist") == "mylist.clear()"
+
+
+def test_python_declare_with_value():
+    p = Python(expand_tabs=True, tab_size=2)
+    assert p.declare("x", Primitive.Int, 10) == "x: int = 10"
+    p = Python(expand_tabs=True, tab_size=2, declare_vars=False)
+    assert p.declare("x", Primitive.Int, 10) == "x = 10"
+    assert p.declare("x", Primitive.Int) == ""
+
+
 def test_python_booleans():
     p = Python(expand_tabs=True, tab_size=2)
     assert p.types(Primitive.Bool) == "bool"
@@ -0,0 +1,63 @@
+from rdpgen.ali import *
+from .common import run_cmd
+from array import array
+from tempfile import NamedTemporaryFile
+from pathlib import Path
+
+
+def create_readints_program(lang, filename):
+    prog = Program(lang)
+    p = prog.lang
+    main = p.function(
+        "main",
+        None,
+        None,
+        p.declare("ints", Composite.array(Primitive.Int)),
+        p.assign("ints", p.read_ints(p.string(filename))),
+        p.declare("i", Primitive.Int),
+        p.for_loop(
+            "i",
+            0,
+            p.lt("i", p.array_length("ints")),
+            p.increment("i"),
+            p.println(p.index("ints", "i")),
+        ),
+    )
+    prog.add(main)
+    return prog
+
+
+def test_read_ints_program():
+    f1 = NamedTemporaryFile("wb", delete=False)
+    f1.write(array("i", [1, -1, 70000, 0]).tobytes())
+    f1.close()
+    tests = {
+        "python": {
+            "lang": Python(expand_tabs=True, tab_size=2),
+            "suffix": ".py",
+            "cmd": "python3 _",
+        },
+        "go": {
+            "lang": Go(expand_tabs=True, tab_size=2),
+            "suffix": ".go",
+            "cmd": "go run _",
+        },
+        "cpp": {
+            "lang": Cpp(expand_tabs=True, tab_size=2),
+            "suffix": ".cpp",
+            "cmd": "cd ~ && g++ _ && ./a.out",
+        },
+    }
+
+    for opts in tests.values():
+        prog = create_readints_program(opts["lang"], f1.name)
+
+        # write out and run asserting the output from the program is as expected
+        f2 = NamedTemporaryFile("w", suffix=opts["suffix"], delete=False)
+        prog.write_file(f2.name)
+
+        cmd = opts["cmd"].replace("_", f2.name)
+        cmd = cmd.replace("~", str(Path(f2.name).parent))
+        assert run_cmd(cmd) == "1\n-1\n70000\n0\n"
+
+        f2.close()
@@ -0,0 +1,79 @@
+from rdpgen.ali import *
+from .common import run_cmd
+from tempfile import NamedTemporaryFile
+from pathlib import Path
+
+
+def create_struct_program(lang):
+    prog = Program(lang)
+    p = prog.lang
+    counter = Composite.struct("Counter")
+    prog.add(
+        p.struct(
+            "Counter",
+            {"count": Primitive.Int, "seen": Composite.array(Primitive.Int)},
+            p.method(
+                "Counter",
+                "add",
+                None,
+                {"by": Primitive.Int},
+                p.increment(p.this("count"), "by"),
+                p.array_append(p.this("seen"), "by"),
+            ),
+            p.method(
+                "Counter",
+                "add_twice",
+                Primitive.Int,
+                {"by": Primitive.Int},
+                p.call(p.this("add"), "by") + p.terminator,
+                p.call(p.this("add"), "by") + p.terminator,
+                p.do_return(expression=p.this("count")),
+            ),
+        )
+    )
+    # each instance has its own fields
+    main = p.function(
+        "main",
+        None,
+        None,
+        p.declare("a", counter, p.instance("Counter")),
+        p.declare("b", counter, p.instance("Counter")),
+        p.println(p.call("a.add_twice", 3)),
+        p.println(p.call("b.add_twice", 5)),
+        p.println(p.array_length("a.seen")),
+    )
+    prog.add(main)
+    return prog
+
+
+def test_struct_program():
+    tests = {
+        "python": {
+            "lang": Python(expand_tabs=True, tab_size=2),
+            "suffix": ".py",
+            "cmd": "python3 _",
+        },
+        "go": {
+            "lang": Go(expand_tabs=True, tab_size=2),
+            "suffix": ".go",
+            "cmd": "go run _",
+        },
+        "cpp": {
+            "lang": Cpp(expand_tabs=True, tab_size=2),
+            "suffix": ".cpp",
+            "cmd": "cd ~ && g++ _ && ./a.out",
+        },
+    }
+
+    for opts in tests.values():
+        prog = create_struct_program(opts["lang"])
+
+        # write out and run asserting the output from the program is as expected
+        f = NamedTemporaryFile("w", suffix=opts["suffix"], delete=False)
+        prog.write_file(f.name)
+
+        cmd = opts["cmd"].replace("_", f.name)
+        cmd = cmd.replace("~", str(Path(f.name).parent))
+        assert run_cmd(cmd) == "6\n10\n2\n"
+
+        f.close()
@@ -12,6 +12,7 @@ class Primitive(Enum):
 class Composite:
     class CType(Enum):
         Array = auto()
+        Struct = auto()
 
     def __init__(self, base: CType, sub):
         self.base = base
@@ -24,6 +25,10 @@ class Composite:
     def array(cls, t):
         return cls(Composite.CType.Array, t)
 
+    @classmethod
+    def struct(cls, name: str):
+        return cls(Composite.CType.Struct, name)
+
 
 Type = Union[Primitive, Composite, str]
 
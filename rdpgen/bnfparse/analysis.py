@@ -0,0 +1,192 @@
+from collections import deque
+from typing import Dict, List, Set, Tuple
+from .parse import Node, NodeType, Terminal, EOF, EPSILON
+
+
+class GrammarAnalysis:
+    """Nullable, FIRST and FOLLOW sets for every rule of a grammar.
+
+    Everything is computed once up front with a worklist that only revisits
+    the rules affected by a change, so the cost grows with the size of the
+    grammar rather than being repeated for every rule that is queried.
+
+    Sets of terminals are stored as bitsets (python ints) where bit i is set if
+    `terminals[i]` is in the set, EOF is always bit 0.
+    """
+
+    def __init__(self, productions: Dict[str, List[List[Node]]], start: str) -> None:
+        """
+        Args:
+            productions (Dict[str, List[List[Node]]]): the alternatives of each
+                rule as sequences of symbols, epsilon alternatives are empty
+            start (str): start symbol of the grammar
+        """
+        self.productions = productions
+        self.terminals: List[Terminal] = [EOF]
+        self.__terminal_bits: Dict[Terminal, int] = {EOF: 1}
+        for alternatives in productions.values():
+            for alternative in alternatives:
+                for symbol in alternative:
+                    if symbol != NodeType.NONTERMINAL:
+                        self.__add_terminal((symbol._type, symbol.value))
+
+        self.__nullable: Set[str] = set()
+        self.__first: Dict[str, int] = {rule: 0 for rule in productions}
+        self.__follow: Dict[str, int] = {rule: 0 for rule in productions}
+        self.__compute_nullable()
+        self.__compute_first()
+        self.__compute_follow(start)
+
+    def __add_terminal(self, terminal: Terminal):
+        if terminal not in self.__terminal_bits:
+            self.__terminal_bits[terminal] = 1 << len(self.terminals)
+            self.terminals.append(terminal)
+
+    def __is_rule(self, symbol: Node) -> bool:
+        # rules without a production are semantic actions the user provides,
+        # they don't consume any input
+        return symbol == NodeType.NONTERMINAL and symbol.value in self.productions
+
+    def __users(self) -> Dict[str, List[str]]:
+        """The rules that refer to each rule in their productions"""
+        users: Dict[str, List[str]] = {rule: [] for rule in self.productions}
+        for rule, alternatives in self.productions.items():
+            for alternative in alternatives:
+                for symbol in alternative:
+                    if self.__is_rule(symbol) and rule not in users[symbol.value]:
+                        users[symbol.value].append(rule)
+        return users
+
+    def __compute_nullable(self):
+        users = self.__users()
+        work = deque(self.productions)
+        while work:
+            rule = work.popleft()
+            if rule in self.__nullable:
+                continue
+            for alternative in self.productions[rule]:
+                if all(
+                    symbol == NodeType.NONTERMINAL
+                    and (not self.__is_rule(symbol) or symbol.value in self.__nullable)
+                    for symbol in alternative
+                ):
+                    self.__nullable.add(rule)
+                    work.extend(users[rule])
+                    break
+
+    def __compute_first(self):
+        # FIRST(rule) is the union of the terminals that start its alternatives
+        # and the FIRST sets of the rules that can start them, so when a rule's
+        # set grows only the rules that can start with it need looking at again
+        starts: Dict[str, int] = {rule: 0 for rule in self.productions}
+        dependants: Dict[str, List[str]] = {rule: [] for rule in self.productions}
+        for rule, alternatives in self.productions.items():
+            for alternative in alternatives:
+                for symbol in alternative:
+                    if symbol == NodeType.NONTERMINAL:
+                        if not self.__is_rule(symbol):
+                            continue
+                        if rule not in dependants[symbol.value]:
+                            dependants[symbol.value].append(rule)
+                        if symbol.value not in self.__nullable:
+                            break
+                    else:
+                        starts[rule] |= self.bit((symbol._type, symbol.value))
+                        break
+
+        first = self.__first
+        work = deque()
+        for rule in self.productions:
+            first[rule] = starts[rule]
+            work.append(rule)
+        queued = set(work)
+        while work:
+            rule = work.popleft()
+            queued.discard(rule)
+            for dependant in dependants[rule]:
+                if first[rule] & ~first[dependant]:
+                    first[dependant] |= first[rule]
+                    if dependant not in queued:
+                        queued.add(dependant)
+                        work.append(dependant)
+
+    def __compute_follow(self, start: str):
+        # FOLLOW(rule) is made of the FIRST sets of whatever comes after it, and
+        # the FOLLOW sets of the rules it ends, which are propagated like FIRST
+        follow = self.__follow
+        if start in follow:
+            follow[start] |= self.bit(EOF)
+        dependants: Dict[str, List[str]] = {rule: [] for rule in self.productions}
+        for rule, alternatives in self.productions.items():
+            for alternative in alternatives:
+                # walk backwards keeping track of what can follow each symbol
+                rest, empty = 0, True
+                for symbol in reversed(alternative):
+                    if self.__is_rule(symbol):
+                        follow[symbol.value] |= rest
+                        if empty and symbol.value not in (rule, *dependants[rule]):
+                            dependants[rule].append(symbol.value)
+                        rest = (
+                            rest | self.__first[symbol.value]
+                            if symbol.value in self.__nullable
+                            else self.__first[symbol.value]
+                        )
+                        empty = empty and symbol.value in self.__nullable
+                    elif symbol == NodeType.NONTERMINAL:
+                        continue
+                    else:
+                        rest, empty = self.bit((symbol._type, symbol.value)), False
+
+        work = deque(self.productions)
+        queued = set(work)
+        while work:
+            rule = work.popleft()
+            queued.discard(rule)
+            for dependant in dependants[rule]:
+                if follow[rule] & ~follow[dependant]:
+                    follow[dependant] |= follow[rule]
+                    if dependant not in queued:
+                        queued.add(dependant)
+                        work.append(dependant)
+
+    def bit(self, terminal: Terminal) -> int:
+        """Bitset containing just the terminal"""
+        return self.__terminal_bits[terminal]
+
+    def terminals_of(self, bits: int) -> List[Terminal]:
+        """The terminals in a bitset, in the order they were numbered"""
+        terminals = []
+        idx = 0
+        while bits:
+            if bits & 1:
+                terminals.append(self.terminals[idx])
+            bits >>= 1
+            idx += 1
+        return terminals
+
+    def nullable(self, rule: str) -> bool:
+        """Whether the rule can derive the empty string"""
+        return rule in self.__nullable
+
+    def first(self, rule: str) -> int:
+        """Bitset of the terminals that can begin a string derived from the rule"""
+        return self.__first[rule]
+
+    def follow(self, rule: str) -> int:
+        """Bitset of the terminals that can immediately follow the rule"""
+        return self.__follow[rule]
+
+    def first_of(self, symbols: List[Node]) -> Tuple[int, bool]:
+        """Bitset FIRST set of a sequence of symbols and whether it's nullable"""
+        bits = 0
+        for symbol in symbols:
+            if symbol == NodeType.TERMINAL and symbol.value == EPSILON:
+                continue
+            if symbol != NodeType.NONTERMINAL:
+                return bits | self.bit((symbol._type, symbol.value)), False
+            if not self.__is_rule(symbol):
+                continue
+            bits |= self.__first[symbol.value]
+            if symbol.value not in self.__nullable:
+                return bits, False
+        return bits, True
@@ -0,0 +1,104 @@
+import os
+from typing import Tuple
+from jinja2 import FileSystemLoader, Environment
+from rdpgen.ali import Language
+from rdpgen.lexgen.native import render_parts
+from .instrument import PROFILE
+
+# what the batch driver uses to find files, catch errors and time the parses
+PACKAGES = {
+    "python": [
+        "multiprocessing",
+        "os",
+        "sys",
+        "time",
+        "typing.List",
+        "typing.Optional",
+        "typing.Tuple",
+    ],
+    "golang": [
+        "bufio",
+        "fmt",
+        "io/fs",
+        "math",
+        "os",
+        "path/filepath",
+        "runtime",
+        "sort",
+        "strconv",
+        "strings",
+        "sync",
+        "time",
+    ],
+    "c++": [
+        "algorithm",
+        "atomic",
+        "chrono",
+        "cerrno",
+        "cstdio",
+        "cstdlib",
+        "filesystem",
+        "iostream",
+        "string",
+        "system_error",
+        "thread",
+        "vector",
+    ],
+}
+
+
+def batch_main(
+    language: Language,
+    parser: str = "Parser",
+    error: str = "ParseError",
+    instrument: bool = False,
+) -> Tuple[str, str]:
+    """Generate the main of a parser program, which parses the files it's given
+    with one parser.
+
+    Given a single file it parses it and, if it isn't valid, prints the error
+    and exits with 1. Given more than one path, a directory (the files under it
+    are parsed) or `-` (the paths are read from stdin, a line each) it parses
+    every file, printing whether each passed or failed, and then the number
+    that passed and failed and how many files and tokens it parsed per second.
+    A file that can't be read fails with the reason instead of stopping the
+    rest. It exits with 1 if any failed.
+
+    Go and c++ parsers parse the files on a pool of goroutines or threads, one
+    per cpu or as many as `-j N` (or `--jobs N`) asks for, each with a parser
+    of its own that it reuses for the files it takes. The results are still
+    printed in the order the files were given. Python parsers parse them one
+    after another unless given `-j N`, in which case they're sent in chunks to
+    a pool of processes, each with a parser of its own, and printed in the
+    order they finish.
+
+    If the parser is instrumented, the profile of every parser is added up and
+    reported once all the files are parsed, passed or not.
+
+    Args:
+        language   (Language): language the parser is being generated in
+        parser     (str):      name of the parser struct
+        error      (str):      error a parse raises or throws if the text
+                               isn't valid, made from the line and a message
+        instrument (bool):     whether the parser profiles its rules, see
+                               `instrument.profiler`
+
+    Returns:
+        Tuple[str, str]: source code of the driver's helper functions and the
+                         body of main
+    """
+    for pkg in PACKAGES[language.name]:
+        language.import_package(pkg)
+
+    this_dir = os.path.dirname(os.path.realpath(__file__))
+    loader = FileSystemLoader(os.path.join(this_dir, "templates", "driver"))
+    env = Environment(loader=loader, trim_blocks=True, lstrip_blocks=True)
+    template = env.get_template(f"{language.extension}.j2")
+    return render_parts(
+        template,
+        language,
+        ("definitions", "main"),
+        parser=parser,
+        error=error,
+        profile=PROFILE if instrument else None,
+    )
@@ -0,0 +1,88 @@
+import os
+from typing import Dict, List, Tuple
+from jinja2 import FileSystemLoader, Environment
+from rdpgen.ali import Composite, Language, Type
+from rdpgen.lexgen.native import render_parts
+
+# name of the struct a parser profiles its rules with
+PROFILE = "Profile"
+
+# file the folded stacks of a profile are written to, in the directory the
+# parser is run from
+PROFILE_FILE = "profile.folded"
+
+# what the profile uses to time the rules and write its report
+PACKAGES = {
+    "python": ["sys", "time"],
+    "golang": ["fmt", "os", "sort", "sync", "time"],
+    "c++": [
+        "algorithm",
+        "chrono",
+        "cstdio",
+        "fstream",
+        "mutex",
+        "string",
+        "unordered_map",
+        "vector",
+    ],
+}
+
+# field the parser keeps the profile of its parses in, python has to make one
+# for each parser where go and c++ start it as its zero value
+FIELDS = {
+    "python": {"profile": Composite.struct(PROFILE)},
+    "golang": {"profile": PROFILE},
+    "c++": {"profile": PROFILE},
+}
+
+
+def rule_constant(rule: str) -> str:
+    """Name of the constant for the id of a rule in a profile"""
+    return f"rule_{rule}"
+
+
+def profiler(
+    language: Language, rules: List[str], profile: str = PROFILE
+) -> Tuple[str, Dict[str, Type]]:
+    """Generate the code for a parser to profile the rules of its grammar.
+
+    Each rule method calls `profile.enter(rule)` when it's called and
+    `profile.leave()` when it returns, and `parse` calls `profile.begin()`
+    first. The profile counts the calls to each rule and times them with a
+    monotonic clock, both inclusive of the rules they call and exclusive, the
+    time spent in the rule itself. It also keeps the time spent in each stack
+    of rules, which `report()` writes to `PROFILE_FILE` as folded stacks, a
+    line of the rules separated by `;` and the nanoseconds spent in the last,
+    that flame graph tools read. The table of calls and times of each rule is
+    printed to stderr. `merge(other)` adds another parser's profile to it.
+
+    A rule left by an error is closed by the next `begin`, or by `merge` or
+    `report`, as of the last time a rule was entered or left.
+
+    Args:
+        language (Language):  language the parser is being generated in
+        rules    (List[str]): the rules of the grammar, their ids are their
+                              position in it
+        profile  (str):       name of the profile struct
+
+    Returns:
+        Tuple[str, Dict[str, Type]]: source code of the rule ids and the
+                                     profile, and the field it adds to the
+                                     parser
+    """
+    for pkg in PACKAGES[language.name]:
+        language.import_package(pkg)
+
+    this_dir = os.path.dirname(os.path.realpath(__file__))
+    loader = FileSystemLoader(os.path.join(this_dir, "templates", "profile"))
+    env = Environment(loader=loader, trim_blocks=True, lstrip_blocks=True)
+    template = env.get_template(f"{language.extension}.j2")
+    (definitions,) = render_parts(
+        template,
+        language,
+        ("definitions",),
+        profile=profile,
+        rules=[(language.cc(rule_constant(rule)), rule) for rule in rules],
+        profile_file=PROFILE_FILE,
+    )
+    return definitions, FIELDS[language.name]
@@ -0,0 +1,80 @@
+import os
+from typing import Optional, Tuple
+from jinja2 import FileSystemLoader, Environment, Template
+from rdpgen.ali import Cpp, Go, Language
+from rdpgen.lexgen.native import render_parts
+
+# error thrown out of a parse, made from the line it's on and a message
+PARSE_ERROR = "ParseError"
+
+# header a c++ library declares its entry point and error in
+HEADER = "parser.hpp"
+
+# package a go library is generated in
+PACKAGE = "parser"
+
+
+def template(language: Language) -> Template:
+    this_dir = os.path.dirname(os.path.realpath(__file__))
+    loader = FileSystemLoader(os.path.join(this_dir, "templates", "library"))
+    env = Environment(loader=loader, trim_blocks=True, lstrip_blocks=True)
+    return env.get_template(f"{language.extension}.j2")
+
+
+def parse_error(language: Language) -> str:
+    """Generate `PARSE_ERROR`, which a parse raises or throws (panics with in go)
+    when the text isn't in the language of the grammar. It's made from the line
+    of the error and a message.
+
+    Args:
+        language (Language): language the parser is being generated in
+
+    Returns:
+        str: source code of the error, which goes before the parser
+    """
+    if isinstance(language, Go):
+        language.import_package("fmt")
+    elif isinstance(language, Cpp):
+        language.import_package("stdexcept")
+        language.import_package("string")
+    (error,) = render_parts(template(language), language, ("error",), error=PARSE_ERROR)
+    return error
+
+
+def library_api(
+    language: Language, parser: str = "Parser"
+) -> Tuple[str, str, Optional[str]]:
+    """Generate the entry point of a parser generated as a library, to parse
+    text in-process and get an error back instead of the program exiting.
+
+    The entry point is a function `parse(text)` (`Parse` in go, as it's
+    exported) that parses the text with a new parser and returns the number of
+    tokens in it. When the text isn't in the language of the grammar it raises
+    or throws the error of `parse_error`; in go the parser panics with it and `Parse`
+    recovers it and returns it as an error.
+
+    Args:
+        language (Language): language the parser is being generated in
+        parser   (str):      name of the parser struct
+
+    Returns:
+        Tuple[str, str, Optional[str]]: source code of the error, which goes
+                                        before the parser, the entry point, and
+                                        the header declaring them for c++, in
+                                        which case the error is in the header
+                                        and is replaced by including it
+    """
+    if not isinstance(language, Cpp):
+        api = render_parts(
+            template(language), language, ("api",), parser=parser, error=PARSE_ERROR
+        )
+        return parse_error(language), api[0], None
+    language.import_package("string")
+    return render_parts(
+        template(language),
+        language,
+        ("include", "api", "header"),
+        parser=parser,
+        error=PARSE_ERROR,
+        header=HEADER,
+    )
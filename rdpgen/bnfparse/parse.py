@@ -1,12 +1,11 @@
+import re
 from enum import Enum, auto
-from typing import Dict
-from copy import deepcopy
+from typing import Dict, List, Set, Tuple
 
 """ EBNF grammar:
-   expression ::= term ( "|" term )+
-   term ::= factor  (" " factor )+
-   factor ::=  expression
-   factor ::= RULE
+   expression ::= term ( "|" term )*
+   term ::= factor ( " " factor )*
+   factor ::= ( "(" expression ")" | RULE ) ( "*" | "+" | "?" )*
 """
 
 
@@ -16,6 +15,27 @@ class NodeType(Enum):
     TOKEN = auto()
     OR = auto()
     TERM = auto()
+    # the child repeated any number of times, at least once, or at most once
+    STAR = auto()
+    PLUS = auto()
+    OPTIONAL = auto()
+
+
+# a terminal in quotes, a token in angle brackets, an operator or a rule name
+SYMBOL = re.compile(r'"[^"]*"|<[^>\s]*>|[()|*+?]|[^\s()|*+?"<]+')
+
+# operators written after a factor to repeat it or make it optional
+REPETITIONS = {"*": NodeType.STAR, "+": NodeType.PLUS, "?": NodeType.OPTIONAL}
+
+
+# a terminal symbol of the grammar, either a token (e.g. <NUMBER>) or a literal
+# terminal (e.g. "=") distinguished by the node type
+Terminal = Tuple[NodeType, str]
+
+# the terminal that represents the empty string in a production
+EPSILON = "¬"
+# the token the lexer emits at the end of the input
+EOF: Terminal = (NodeType.TOKEN, "EOF")
 
 
 class Node:
@@ -54,7 +74,7 @@ class Node:
 
 class Parser:
     def __init__(self, string: str):
-        self.tokens = string.split(" ")
+        self.tokens = SYMBOL.findall(string)
         self.tree = None
 
     @property
@@ -71,7 +91,7 @@ class Parser:
         self.tree = self.expression()
 
     def expression(self):
-        """expression ::= term ( "|" term )+"""
+        """expression ::= term ( "|" term )*"""
         node = self.term()
         while self.peek() == "|":
             if node != NodeType.OR:
@@ -85,21 +105,39 @@ class Parser:
         return node
 
     def term(self):
-        """term ::= factor  (" " factor )+"""
+        """term ::= factor ( " " factor )*"""
         node = self.factor()
 
-        while self.peek() not in ["|", None]:  # TODO: confirm this is right
+        while self.peek() not in ["|", ")", None]:
             if node != NodeType.TERM:
                 old = node
                 node = Node(NodeType.TERM)
                 node.add_children(old)
             next_node = self.factor()
-            node.add_children(next_node)
+            # a group that's just a sequence is part of the sequence it's in
+            if next_node == NodeType.TERM:
+                node.add_children(*next_node.children)
+            else:
+                node.add_children(next_node)
 
         return node
 
     def factor(self):
+        """factor ::= ( "(" expression ")" | RULE ) ( "*" | "+" | "?" )*"""
+        if self.peek() == "(":
+            self.next()
+            node = self.expression()
+            self.consume(")")
+        else:
+            node = self.symbol()
+        while self.peek() in REPETITIONS:
+            node = Node(REPETITIONS[self.next()], None, node)
+        return node
+
+    def symbol(self):
         value = self.next()
+        if value is None or value in "()|*+?":
+            raise Exception(f"expected a symbol, got {value or 'end of sequence'}")
         node_type = NodeType.NONTERMINAL
         if value[0] == value[-1] and value[0] == '"':
             node_type = NodeType.TERMINAL
@@ -148,6 +186,59 @@ class Grammar:
             production_parser.parse()
             self.productions[name] = production_parser.tree
         self.__start = list(rules.keys())[0]
+        self.__analysis = None
+
+        # the alternatives of each rule as sequences of symbols. repetitions,
+        # options and groups of alternatives inside a production stand for rules
+        # made up for them, named after the rule they're in, which the analysis
+        # and parse table treat like any other
+        self.__alternatives: Dict[str, List[List[Node]]] = {}
+        self.__generated: Dict[str, List[List[Node]]] = {}
+        self.__names: Dict[int, str] = {}
+        self.__made: Dict[str, int] = {}
+        for name, production in self.productions.items():
+            self.__alternatives[name] = self.__choices(name, production)
+        self.__alternatives.update(self.__generated)
+
+    def __choices(self, rule: str, node: Node) -> List[List[Node]]:
+        alternatives = node.children if node == NodeType.OR else [node]
+        return [self.__sequence(rule, alternative) for alternative in alternatives]
+
+    def __sequence(self, rule: str, node: Node) -> List[Node]:
+        symbols = node.children if node == NodeType.TERM else [node]
+        return [
+            self.__symbol(rule, s)
+            for s in symbols
+            if not (s == NodeType.TERMINAL and s.value == EPSILON)
+        ]
+
+    def __symbol(self, rule: str, node: Node) -> Node:
+        if not any(node == t for t in REPETITIONS.values()) and node != NodeType.OR:
+            return node
+        if id(node) not in self.__names:
+            self.__made[rule] = self.__made.get(rule, 0) + 1
+            name = f"{rule}.{self.__made[rule]}"
+            self.__names[id(node)] = name
+            # claim the name before making up rules for anything nested in it
+            self.__generated[name] = []
+            symbol = Node(NodeType.NONTERMINAL, name)
+            if node == NodeType.OR:
+                self.__generated[name] = self.__choices(rule, node)
+            else:
+                choices = self.__choices(rule, node.children[0])
+                if node == NodeType.STAR:
+                    # X* ::= X X* | "¬"
+                    self.__generated[name] = [c + [symbol] for c in choices] + [[]]
+                elif node == NodeType.PLUS:
+                    # X+ ::= X X*
+                    more = Node(NodeType.NONTERMINAL, name + "*")
+                    once = [c + [more] for c in choices]
+                    self.__generated[name] = once
+                    self.__generated[more.value] = once + [[]]
+                else:
+                    # X? ::= X | "¬"
+                    self.__generated[name] = choices + [[]]
+        return Node(NodeType.NONTERMINAL, self.__names[id(node)])
 
     def bnf_from_rule(self, rule: str) -> str:
         return f"{rule} ::= {self.__rules[rule]}"
@@ -163,81 +254,107 @@ class Grammar:
     @start.setter
     def start(self, new_start):
         self.__start = new_start
+        # follow sets depend on the start symbol
+        self.__analysis = None
 
     def __str__(self) -> str:
         return "\n".join(f"{k} ->\n{v}" for k, v in self.productions.items())
 
-    def __left_set(
-        self, node: Node, parent: Node, completed, terminals, or_term: Node
-    ) -> Dict[str, str]:
-        completed.append(node)
-        terminals = deepcopy(terminals)
-
-        if node == NodeType.TERMINAL or node == NodeType.TOKEN:
-            return {
-                **terminals,
-                node.value: {
-                    "parent": parent.value,
-                    "token": node == NodeType.TOKEN,
-                    "or_term": or_term,
-                },
-            }, True
-
-        if node == NodeType.NONTERMINAL:
-            next_node = self.productions.get(node.value)
-            used_epsilon_lookahead = True
-            if next_node not in completed:
-                nt_ls, used_epsilon_lookahead = self.__left_set(
-                    self.productions.get(node.value),
-                    node,
-                    completed,
-                    terminals,
-                    or_term,
-                )
-                terminals = {**terminals, **nt_ls}
-            return terminals, used_epsilon_lookahead
-
-        if node == NodeType.TERM:
-            i = 0
-            ls = {}
-            next_ls = {}
-            next_has_epsilon = True
-            while i < len(node.children) and next_has_epsilon:
-                next_has_epsilon = False
-                if node.children[i] not in completed:
-                    next_ls, used_epsilon_lookahead = self.__left_set(
-                        node.children[i], parent, completed, ls, or_term
-                    )
-                    next_has_epsilon = "¬" in next_ls
-                    if (next_has_epsilon or used_epsilon_lookahead) or (
-                        not next_has_epsilon or not used_epsilon_lookahead
-                    ):
-                        ls = {**ls, **next_ls}
-                if used_epsilon_lookahead:
-                    break
-                i += 1
-            return {**terminals, **ls}, True
-
-        if node == NodeType.OR:
-            ls = {}
-            for term in node.children:
-                if term not in completed:
-                    t_ls, _ = self.__left_set(
-                        term,
-                        parent,
-                        completed,
-                        ls,
-                        term if or_term is None else or_term,
-                    )
-                    ls = {**ls, **t_ls}
-            return {**terminals, **ls}, False
-
     def left_set(self, rule):
-        start = self.productions.get(rule, None)
-        if start is None:
+        """The terminals that can start the rule, by value, with the rule whose
+        production they appear in, whether they're a token and the alternative of
+        the first OR reached on the way to them. An epsilon reached on the way is
+        included under "¬".
+
+        Kept for compatibility, code generation uses `first` and `first_of` which
+        are computed once for the whole grammar.
+        """
+        if rule not in self.productions:
             raise ValueError(f"{rule} is not a production in the grammar")
 
-        ls, _ = self.__left_set(
-            start, Node(NodeType.NONTERMINAL, value=rule), [], {}, None
-        )
-        return ls
+        analysis = self.analysis
+        terminals = {}
+        visited = set()
+
+        def walk(name: str, or_term: Node):
+            visited.add(name)
+            production = self.productions[name]
+            alternatives = (
+                production.children if production == NodeType.OR else [production]
+            )
+            for alternative in alternatives:
+                if production == NodeType.OR and or_term is None:
+                    term_or = alternative
+                else:
+                    term_or = or_term
+                symbols = (
+                    alternative.children
+                    if alternative == NodeType.TERM
+                    else [alternative]
+                )
+                for symbol in symbols:
+                    if symbol != NodeType.NONTERMINAL:
+                        terminals.setdefault(
+                            symbol.value,
+                            {
+                                "parent": name,
+                                "token": symbol == NodeType.TOKEN,
+                                "or_term": term_or,
+                            },
+                        )
+                        break
+                    if symbol.value not in self.productions:
+                        continue
+                    if symbol.value not in visited:
+                        walk(symbol.value, term_or)
+                    if not analysis.nullable(symbol.value):
+                        break
+
+        walk(rule, None)
+        return terminals
+
+    @property
+    def rules(self) -> List[str]:
+        """Names of the rules of the grammar followed by the rules made up for the
+        repetitions, options and groups of alternatives in their productions"""
+        return list(self.__alternatives)
+
+    def alternatives(self, rule: str) -> List[List[Node]]:
+        """The alternatives of a rule's production, each as the list of symbols in
+        the sequence. Epsilon alternatives are empty lists. A repetition, option
+        or group of alternatives in the sequence is a nonterminal for the rule
+        made up for it."""
+        return self.__alternatives[rule]
+
+    def sequence(self, node: Node) -> List[Node]:
+        """The symbols of a node of a production, which is a sequence of them, a
+        single symbol or a repetition, option or group made up into a rule, in
+        the same form as `alternatives`"""
+        return self.__sequence("", node)
+
+    @property
+    def analysis(self):
+        """Nullable, FIRST and FOLLOW sets of the whole grammar as bitsets,
+        computed the first time they're needed"""
+        if self.__analysis is None:
+            from .analysis import GrammarAnalysis
+
+            self.__analysis = GrammarAnalysis(dict(self.__alternatives), self.start)
+        return self.__analysis
+
+    def first_of(self, symbols: List[Node]) -> Tuple[Set[Terminal], bool]:
+        """FIRST set of a sequence of symbols and whether the sequence is nullable"""
+        bits, empty = self.analysis.first_of(symbols)
+        return set(self.analysis.terminals_of(bits)), empty
+
+    def first(self, rule: str) -> Set[Terminal]:
+        """Terminals that can begin a string derived from the rule"""
+        return set(self.analysis.terminals_of(self.analysis.first(rule)))
+
+    def nullable(self, rule: str) -> bool:
+        """Whether the rule can derive the empty string"""
+        return self.analysis.nullable(rule)
+
+    def follow(self, rule: str) -> Set[Terminal]:
+        """Terminals that can immediately follow the rule, including EOF"""
+        return set(self.analysis.terminals_of(self.analysis.follow(rule)))
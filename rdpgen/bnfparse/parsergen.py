@@ -1,12 +1,27 @@
-from .parse import Grammar
-from rdpgen.lexgen import Token
+from .parse import Grammar, Terminal
+from .table import ParseTable
+from .driver import batch_main
+from .instrument import profiler, rule_constant
+from .library import HEADER, PACKAGE, PARSE_ERROR, library_api, parse_error
+from rdpgen.lexgen import (
+    Token,
+    TokenKinds,
+    dfa_lexer,
+    fused_reader,
+    native_lexer,
+    stream_reader,
+)
 from rdpgen.ali import Program, Language, Go, Python, Cpp, Composite, Primitive
-from rdpgen.bnfparse.parse import NodeType
+from rdpgen.bnfparse.parse import NodeType, Node
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 from copy import deepcopy
 
+# an OR rule that can start with at least this many terminals switches on the next
+# token's kind instead of comparing against each terminal in turn
+SWITCH_MIN_TERMINALS = 4
+
 
 def lang_from_name(name: str, options: Dict[str, Any]) -> Language:
     if name in options:
@@ -30,123 +45,584 @@ def lang_from_name(name: str, options: Dict[str, Any]) -> Language:
         exit(1)
 
 
+def token_kinds(grammar: Grammar, tokens: List[Token]) -> TokenKinds:
+    """Ids shared by the lexer and parser for the lexer's tokens and the terminals
+    of the grammar"""
+    terminals = grammar.analysis.terminals
+    return TokenKinds(
+        tokens,
+        literals=[value for t, value in terminals if t == NodeType.TERMINAL],
+        token_names=[value for t, value in terminals if t == NodeType.TOKEN],
+    )
+
+
+# a column of the token buffer for each field of a token, in the order the lexer
+# writes them
+TOKEN_COLUMNS = ["kinds", "literals", "starts", "lengths", "lines"]
+
+# number of tokens kept when streaming them from the lexer, a token's handle
+# stays valid until this many more tokens have been read after it
+RING_SIZE = 256
+
+# name of the struct that holds the state of a parse, its token buffer and
+# cursor, with a method for each rule. each parse has its own so any number
+# can run at the same time in one process
+PARSER = "Parser"
+
+# lexers generated in the target language, which lex the text in the parser
+IN_PROCESS_LEXERS = ("native", "dfa")
+
+# type of a view of an input mapped into memory, which the text of a token is
+# sliced from without copying when generating with `zero_copy`
+TEXT_VIEWS = {
+    "python": "memoryview",
+    "golang": Composite.array("byte"),
+    "c++": "std::string_view",
+}
+
+# command a parser runs before its first flex lexer, so one parser parsing many
+# files only builds the lexer once
+BUILD_LEXER = "make -C lexer --silent"
+
+
+def token_line(l: Language, token: str):  # noqa: E741
+    """Line number of the token with the handle `token`"""
+    return l.index(l.this("lines"), token)
+
+
+def table_driver(
+    l: Language, table: ParseTable  # noqa: E741
+) -> Tuple[List[Any], List[Any]]:
+    """Definitions of the parse table and the methods of the loop that drives it"""
+    ints = Composite.array(Primitive.Int)
+    strings = Composite.array(Primitive.String)
+    n_terminals = len(table.terminals)
+    n_symbols = n_terminals + len(table.rules)
+
+    # right hand sides are stored reversed, ready to push on to the stack
+    offsets = [0]
+    symbols = []
+    for _, rhs in table.productions:
+        symbols.extend(reversed(rhs))
+        offsets.append(len(symbols))
+
+    definitions = [
+        l.comment("LL(1) parse table, a row of productions for each rule"),
+        l.declare("parse_table", ints, l.array(Primitive.Int, table.table)),
+        l.declare("production_offsets", ints, l.array(Primitive.Int, offsets)),
+        l.declare("production_symbols", ints, l.array(Primitive.Int, symbols)),
+        l.declare(
+            "terminal_names",
+            strings,
+            l.array(Primitive.String, [l.s(t[1]) for t in table.terminals]),
+        ),
+        l.declare(
+            "expected_names",
+            strings,
+            l.array(
+                Primitive.String,
+                [l.s(",".join(t[1] for t in table.expected(r))) for r in table.rules],
+            ),
+        ),
+    ]
+
+    # rules without a production are implemented by the user
+    methods = []
+    call_actions = [
+        l.if_else(l.eq("symbol", n_symbols + idx), [l.call(action) + l.terminator])
+        for idx, action in enumerate(table.actions)
+    ]
+    if call_actions:
+        methods.append(
+            l.method(
+                PARSER, "call_action", None, {"symbol": Primitive.Int}, *call_actions
+            )
+        )
+
+    nt = l.cc("next_token")
+    row = f"({l.cc('top')} - {n_terminals}) * {n_terminals}"
+    match_terminal = l.if_else(
+        l.bool_or(l.eq("top", "lit"), l.eq("top", "kind")),
+        [l.call(l.this("get_token")) + l.terminator],
+        false_stmts=[
+            l.call(
+                l.this("expect"),
+                token_line(l, nt),
+                l.index(l.cc("terminal_names"), "top"),
+            )
+            + l.terminator
+        ],
+    )
+    expand_rule = [
+        l.assign("production", -1),
+        l.if_else(
+            l.geq("lit", 0),
+            [l.assign("production", l.index(l.cc("parse_table"), l.add(row, "lit")))],
+        ),
+        l.if_else(
+            l.lt("production", 0),
+            [l.assign("production", l.index(l.cc("parse_table"), l.add(row, "kind")))],
+        ),
+        l.if_else(
+            l.lt("production", 0),
+            [
+                l.call(
+                    l.this("expect"),
+                    token_line(l, nt),
+                    l.index(l.cc("expected_names"), l.sub("top", n_terminals)),
+                )
+                + l.terminator
+            ],
+        ),
+        l.for_loop(
+            "i",
+            l.index(l.cc("production_offsets"), "production"),
+            l.lt("i", l.index(l.cc("production_offsets"), l.add("production", 1))),
+            l.increment("i"),
+            l.array_append("stack", l.index(l.cc("production_symbols"), "i")),
+        ),
+    ]
+    methods.append(
+        l.method(
+            PARSER,
+            "table_parse",
+            None,
+            {"start": Primitive.Int},
+            l.declare("stack", ints),
+            l.assign("stack", l.array(Primitive.Int, ["start"])),
+            l.declare("top", Primitive.Int),
+            l.declare("kind", Primitive.Int),
+            l.declare("lit", Primitive.Int),
+            l.declare("production", Primitive.Int),
+            l.declare("i", Primitive.Int),
+            l.declare(nt, Primitive.Int),
+            l.while_loop(
+                l.assign("top", l.index("stack", l.sub(l.array_length("stack"), 1))),
+                l.array_pop("stack"),
+                l.assign(nt, l.call(l.this("peek"))),
+                # terminals are numbered the same as token kinds and literal ids
+                l.assign("kind", l.index(l.this("kinds"), nt)),
+                l.assign("lit", l.index(l.this("literals"), nt)),
+                l.if_else(
+                    l.lt("top", n_terminals),
+                    [match_terminal],
+                    false_stmts=[
+                        l.if_else(
+                            l.lt("top", n_symbols),
+                            expand_rule,
+                            false_stmts=[
+                                l.call(l.this("call_action"), "top") + l.terminator
+                            ],
+                        )
+                    ]
+                    if call_actions
+                    else expand_rule,
+                ),
+                condition=l.gt(l.array_length("stack"), 0),
+            ),
+        )
+    )
+    return definitions, methods
+
+
 def parser_from_grammar(
     grammar: Grammar,
     tokens: List[Token],
     language: str,
     language_options: Dict[str, Any],
     outdir: str,
+    lexer: str = "flex",
+    engine: str = "recursive",
+    token_format: str = "text",
+    stream: bool = False,
+    library: bool = False,
+    instrument: bool = False,
+    zero_copy: bool = False,
 ):
     outdir = Path(outdir)
+    if library and lexer not in IN_PROCESS_LEXERS:
+        raise ValueError(
+            "a parser generated as a library needs the native lexer or the dfa lexer"
+        )
+    if instrument and engine != "recursive":
+        raise ValueError("only the functions of the recursive engine can be profiled")
+    if instrument and library:
+        raise ValueError("a parser generated as a library can't be profiled")
+    if zero_copy and (lexer not in ("flex", "fused") or stream):
+        raise ValueError(
+            "only a parser given the offsets of tokens in its input can map it"
+        )
+    if stream and lexer != "flex":
+        raise ValueError("only the flex lexer run as its own program can stream")
+    # tokens are read from the lexer as the parser needs them, by streaming
+    # them from its process or calling into a scanner compiled into the parser
+    pull = stream or lexer == "fused"
     l = lang_from_name(language, language_options)  # noqa
-    prog = Program(l)
+    kinds = token_kinds(grammar, tokens)
+    table = None
+    if engine == "table":
+        table = ParseTable(grammar, kinds)
+        for conflict in table.conflicts:
+            print("warning: grammar is not LL(1),", conflict)
+    # a library has no main, so a go library is a package of its own
+    prog = Program(l, package=PACKAGE if library else "main")
+    # a parse raises or throws an error when the text isn't valid, which main
+    # or the caller of the library catches
+    if library:
+        error, api, header = library_api(l, PARSER)
+        if header is not None:
+            outdir.mkdir(parents=True, exist_ok=True)
+            (outdir / HEADER).write_text(header + "\n")
+    else:
+        error = parse_error(l)
+    prog.add(error)
 
     # setup lexing stuff
-    prog.add(l.declare("tokens", Composite.array(Composite.array(Primitive.String))))
+    this = l.this
+    # tokens are never removed from the buffer once loaded, instead `pos` is a
+    # cursor to the next unread token so consuming a token is constant time
+    fields: Dict[str, Any] = {"pos": Primitive.Int}
+    # the buffer is stored a column per field and each token is referred to by
+    # its position in it, so a token is a handful of integers and its text is
+    # only sliced out of the input when it's asked for
+    if pull:
+        # only the most recent tokens are kept, in a ring, so memory doesn't
+        # grow with the input. `filled` counts the tokens read into it so far
+        fields["filled"] = Primitive.Int
+    if stream:
+        # the lexer sends the text of each token as the input isn't loaded
+        fields["texts"] = Composite.array(Primitive.String)
+    elif zero_copy:
+        # the input is mapped into memory and the text of a token is a view of
+        # it, which stays valid until the parser parses another file
+        fields["text"] = TEXT_VIEWS[l.name]
+    else:
+        fields["text"] = Primitive.String
+    for column in TOKEN_COLUMNS:
+        fields[column] = Composite.array(Primitive.Int)
+    prog.add(
+        "\n".join(
+            str(l.constant(name, Primitive.Int, value))
+            for name, value in kinds.constants
+        )
+    )
+    methods = []
 
-    # shell out to the lexer to create tokens
-    call_lexer = l.function(
-        "generate_tokens",
-        None,
-        {"file": Primitive.String},
-        l.declare("command", Primitive.String),
-        l.assign(
-            "command",
-            l.s("""cd lexer && make --silent && ./lexer """),
-        ),
-        l.increment("command", inc="file"),
-        l.command("command", exit_on_failure=True, suppress_output=False),
+    def load_text() -> List[Any]:
+        """Statements to load the file being parsed into `text`, which the
+        lexer gives the offsets of tokens in"""
+        if zero_copy:
+            return [
+                l.unmap_file(this("text")),
+                l.assign(this("text"), l.map_file("file")),
+            ]
+        if isinstance(l, Python) and lexer == "flex":
+            return [l.assign(this("text"), 'open(file, "rb").read()')]
+        return [l.assign(this("text"), l.read_file("file"))]
+
+    # a library is given the text to parse, a program the path of a file
+    source = "source" if library else "file"
+    if lexer in IN_PROCESS_LEXERS:
+        # lex in-process with a lexer generated in the target language
+        load_tokens_stmts = [
+            l.assign(this("text"), "source" if library else l.read_file("file")),
+            l.call(this("lex"), this("text")) + l.terminator,
+            l.assign(this("pos"), 0),
+        ]
+    elif pull:
+        # start the lexer and read tokens from it as the parser needs them
+        if stream:
+            load_tokens_stmts = [l.call(this("start_lexer"), "file") + l.terminator]
+        else:
+            load_tokens_stmts = [
+                *load_text(),
+                l.call(this("start_lexer")) + l.terminator,
+            ]
+        load_tokens_stmts.extend(
+            [l.assign(this("pos"), 0), l.assign(this("filled"), 0)]
+        )
+        last_slot = f"({l.sub(this('filled'), 1)}) % {RING_SIZE}"
+        methods.append(
+            l.method(
+                PARSER,
+                "buffer_token",
+                None,
+                None,
+                # nothing comes after the EOF token
+                l.if_else(
+                    l.bool_and(
+                        l.gt(this("filled"), 0),
+                        l.eq(
+                            l.index(this("kinds"), last_slot),
+                            l.cc(kinds.constant(0)),
+                        ),
+                    ),
+                    [l.do_return()],
+                ),
+                l.if_else(
+                    l.negate(
+                        l.call(this("read_token"), f"{this('filled')} % {RING_SIZE}")
+                    ),
+                    [l.throw(PARSE_ERROR, 0, l.s("lexer stopped before EOF"))],
+                ),
+                l.increment(this("filled")),
+            )
+        )
+    else:
+        # run the lexer to create tokens
+        # each run gets its own file for the tokens so parsers can run at the
+        # same time, it's removed once the tokens are loaded
+        token_file = l.cc("token_file")
+        lexer_failed = [
+            l.remove_file(token_file),
+            l.throw(PARSE_ERROR, 0, l.s("lexer failed")),
+        ]
+        # the lexer is built, if it's out of date, before the first parse only
+        fields["lexer_built"] = Primitive.Bool
+        methods.append(
+            l.method(
+                PARSER,
+                "generate_tokens",
+                Primitive.String,
+                {"file": Primitive.String},
+                l.declare("token_file", Primitive.String),
+                l.assign("token_file", l.temp_file()),
+                # build the lexer with the first parse
+                l.if_else(
+                    l.negate(this("lexer_built")),
+                    [
+                        l.command(
+                            l.s(BUILD_LEXER),
+                            exit_on_failure=True,
+                            suppress_output=False,
+                            on_failure=lexer_failed,
+                        ),
+                        l.assign(this("lexer_built"), l.true()),
+                    ],
+                ),
+                # the lexer isn't run through a shell, so the name of the file is
+                # passed to it as it is
+                l.execute(
+                    [l.s("lexer/lexer"), "file", token_file],
+                    exit_on_failure=True,
+                    suppress_output=False,
+                    on_failure=lexer_failed,
+                ),
+                l.do_return(expression=token_file),
+            )
+        )
+        load_tokens_stmts = [
+            l.declare("token_file", Primitive.String),
+            l.assign("token_file", l.call(this("generate_tokens"), "file")),
+            *load_text(),
+            l.assign(this("pos"), 0),
+        ]
+        if token_format == "binary":
+            # the lexer writes a record of an int32 per column for each token
+            load_tokens_stmts.extend(
+                [
+                    l.declare("records", Composite.array(Primitive.Int)),
+                    l.assign("records", l.read_ints(token_file)),
+                ]
+            )
+            if isinstance(l, Python):
+                # HACK: slicing the memory mapped records gives views of each
+                # column without copying
+                load_tokens_stmts.extend(
+                    l.assign(this(column), f"records[{idx}::{len(TOKEN_COLUMNS)}]")
+                    for idx, column in enumerate(TOKEN_COLUMNS)
+                )
+            else:
+                load_tokens_stmts.extend(
+                    [
+                        *[l.array_clear(this(column)) for column in TOKEN_COLUMNS],
+                        l.declare("idx", Primitive.Int),
+                        l.for_loop(
+                            "idx",
+                            0,
+                            l.lt("idx", l.array_length("records")),
+                            l.increment("idx", inc=len(TOKEN_COLUMNS)),
+                            *[
+                                l.array_append(
+                                    this(column), l.index("records", l.add("idx", i))
+                                )
+                                for i, column in enumerate(TOKEN_COLUMNS)
+                            ],
+                        ),
+                    ]
+                )
+        else:
+            # the lexer writes a line per token of its kind, literal id, the
+            # byte offset and length of its text in the input, and its line
+            # number. python keeps the input as bytes so the offsets line up
+            load_tokens_stmts.extend(
+                [
+                    *[l.array_clear(this(column)) for column in TOKEN_COLUMNS],
+                    l.declare("token_lines", Composite.array(Primitive.String)),
+                    l.assign("token_lines", l.read_lines(token_file)),
+                    l.declare("fields", Composite.array(Primitive.String)),
+                    l.array_iterate(
+                        "token_lines",
+                        "idx",
+                        l.assign(
+                            "fields",
+                            l.string_split(
+                                l.index(l.cc("token_lines"), "idx"), l.s("\a")
+                            ),
+                        ),
+                        *[
+                            l.array_append(
+                                this(column), l.string_to_int(l.index("fields", idx))
+                            )
+                            for idx, column in enumerate(TOKEN_COLUMNS)
+                        ],
+                    ),
+                ]
+            )
+        load_tokens_stmts.append(l.remove_file(token_file))
+
+    methods.append(
+        l.method(
+            PARSER, "load_tokens", None, {source: Primitive.String}, *load_tokens_stmts
+        )
     )
 
-    load_tokens_stmts = [
-        l.assign("tokens", l.array(Composite.array(Primitive.String), [])),
-        l.declare("token_lines", Composite.array(Primitive.String)),
-        l.assign("token_lines", l.read_lines(l.s("lexer/out.jl"))),
-        l.array_iterate(
-            "token_lines",
-            "idx",
-            l.array_append(
-                "tokens",
-                l.string_split(l.index(l.cc("token_lines"), "idx"), l.s("\a")),
-            ),
-        ),
-    ]
-    # HACK: for python global tokens variable
-    if isinstance(l, Python):
-        load_tokens_stmts.insert(0, "global tokens")
-    load_tokens = l.function("load_tokens", None, None, *load_tokens_stmts)
-
-    peek = l.function(
-        "peek",
-        Composite.array(Primitive.String),
-        None,
-        l.if_else(
-            l.gt(l.array_length("tokens"), 0),
-            [l.do_return(expression=l.index("tokens", 0))],
-        ),
-        l.do_return(expression=l.array(Primitive.String, [])),
+    token_text_expr = l.substring(
+        this("text"),
+        l.index(this("starts"), "token"),
+        l.index(this("lengths"), "token"),
     )
-    get_token = l.function(
-        "get_token",
-        Composite.array(Primitive.String),
-        None,
-        l.if_else(
-            l.gt(l.array_length("tokens"), 0),
-            [
-                l.declare("next", Composite.array(Primitive.String)),
-                l.assign("next", l.index("tokens", 0)),
-                l.array_remove("tokens", 0),
-                l.do_return(expression="next"),
-            ],
-        ),
-        l.do_return(l.array(Primitive.String, [])),
+    if stream:
+        token_text_expr = l.index(this("texts"), "token")
+    elif isinstance(l, Python) and lexer == "flex" and not zero_copy:
+        token_text_expr = f"{token_text_expr}.decode()"
+    token_text = l.method(
+        PARSER,
+        "token_text",
+        fields["text"] if zero_copy else Primitive.String,
+        {"token": Primitive.Int},
+        l.do_return(expression=token_text_expr),
     )
 
-    expect = l.function(
-        "expect",
-        None,
-        {"line_num": Primitive.String, "e": Primitive.String},
-        l.println(
-            l.s("Error: line "),
-            "line_num",
-            l.s("- expected "),
-            "e",
-        ),
-        l.exit(code=1),
-    )
+    # past the end of the buffer the EOF token at the end is returned again
+    if pull:
+        peek = l.method(
+            PARSER,
+            "peek",
+            Primitive.Int,
+            None,
+            l.if_else(
+                l.eq(this("pos"), this("filled")),
+                [l.call(this("buffer_token")) + l.terminator],
+            ),
+            l.if_else(
+                l.lt(this("pos"), this("filled")),
+                [l.do_return(expression=f"{this('pos')} % {RING_SIZE}")],
+            ),
+            l.do_return(expression=last_slot),
+        )
+        get_token = l.method(
+            PARSER,
+            "get_token",
+            Primitive.Int,
+            None,
+            l.declare("token", Primitive.Int),
+            l.assign("token", l.call(this("peek"))),
+            l.if_else(l.lt(this("pos"), this("filled")), [l.increment(this("pos"))]),
+            l.do_return(expression="token"),
+        )
+    else:
+        peek = l.method(
+            PARSER,
+            "peek",
+            Primitive.Int,
+            None,
+            l.if_else(
+                l.lt(this("pos"), l.array_length(this("kinds"))),
+                [l.do_return(expression=this("pos"))],
+            ),
+            l.do_return(expression=l.sub(l.array_length(this("kinds")), 1)),
+        )
+        get_token = l.method(
+            PARSER,
+            "get_token",
+            Primitive.Int,
+            None,
+            l.if_else(
+                l.lt(this("pos"), l.array_length(this("kinds"))),
+                [
+                    l.increment(this("pos")),
+                    l.do_return(expression=l.sub(this("pos"), 1)),
+                ],
+            ),
+            l.do_return(expression=l.sub(l.array_length(this("kinds")), 1)),
+        )
 
-    parse = l.function(
-        "parse",
+    def terminal_constant(node_type: NodeType, value: str) -> str:
+        """Constant for the kind or literal id of a terminal"""
+        if node_type == NodeType.TOKEN:
+            return l.cc(kinds.constant(kinds.kind(value)))
+        return l.cc(kinds.constant(kinds.literal(value)))
+
+    def matches(terminal: Node, token: str):
+        """Condition for the token with the handle `token` being the terminal"""
+        array = "kinds" if terminal == NodeType.TOKEN else "literals"
+        return l.eq(
+            l.index(this(array), token),
+            terminal_constant(terminal._type, terminal.value),
+        )
+
+    expect = l.method(
+        PARSER,
+        "expect",
         None,
-        {"file": Primitive.String},
-        l.call("generate_tokens", "file") + l.terminator,
-        l.call("load_tokens") + l.terminator,
-        l.call(l.cc(grammar.start)) + l.terminator,
+        {"line_num": Primitive.Int, "e": Primitive.String},
+        l.throw(PARSE_ERROR, "line_num", l.add(l.s("expected "), "e")),
     )
 
     nt = l.cc("next_token")
-    main = l.function(
-        "main",
-        None,
+    # a profiled parser counts and times the calls to each rule's method
+    profile = this("profile")
+    parse = l.method(
+        PARSER,
+        "parse",
         None,
-        l.if_else(l.lt(l.argc(), 2), [l.println(l.s("usage: parser FILE")), l.exit(1)]),
-        l.declare("filename", Primitive.String),
-        l.assign("filename", l.index(l.argv(), 1)),
-        l.call("parse", "filename") + l.terminator,
+        {source: Primitive.String},
+        *([l.call(f"{profile}.begin") + l.terminator] if instrument else []),
+        l.call(this("load_tokens"), source) + l.terminator,
+        l.call(this(grammar.start)) + l.terminator
+        if engine == "recursive"
+        else l.call(
+            this("table_parse"),
+            table.symbol(Node(NodeType.NONTERMINAL, grammar.start)),
+        )
+        + l.terminator,
         # check for EOF
-        l.declare(nt, Composite.array(Primitive.String)),
-        l.assign(nt, l.call("get_token")),
+        l.declare(nt, Primitive.Int),
+        l.assign(nt, l.call(this("get_token"))),
         l.if_else(
-            l.neq(l.index(nt, 0), l.s("EOF")),
-            [l.call("expect", l.index(nt, 2), l.s("EOF")) + l.terminator],
+            l.neq(l.index(this("kinds"), nt), l.cc(kinds.constant(0))),
+            [l.call(this("expect"), token_line(l, nt), l.s("EOF")) + l.terminator],
         ),
     )
 
-    prog.add(call_lexer)
-    prog.add(load_tokens)
-    prog.add(peek)
-    prog.add(get_token)
-    prog.add(expect)
+    # the lexer's definitions, the fields it keeps its state in and its methods
+    if lexer == "native":
+        reader = native_lexer(tokens, l, kinds, PARSER, PARSE_ERROR)
+    elif lexer == "dfa":
+        reader = dfa_lexer(tokens, l, kinds, PARSER, PARSE_ERROR)
+    elif stream:
+        reader = stream_reader(l, RING_SIZE, PARSER, PARSE_ERROR)
+    elif pull:
+        reader = fused_reader(l, RING_SIZE, PARSE_ERROR, PARSER)
+    else:
+        reader = None
+    if reader is not None:
+        definitions, reader_fields, reader_methods = reader
+        prog.add(definitions)
+        fields.update(reader_fields)
+        methods.append(l.verbatim(reader_methods))
+    methods.extend([peek, get_token, token_text, expect])
 
     def handle_rule(t):
         if t == NodeType.TERM:
@@ -155,26 +631,42 @@ def parser_from_grammar(
             return handle_nonterminal(t)
         elif t == NodeType.TERMINAL or t == NodeType.TOKEN:
             return handle_terminal(t)
+        elif t == NodeType.OR:
+            # a group of alternatives in a sequence
+            return choose(t.children, l.cc(l.varn("next_token")))
+        elif t == NodeType.OPTIONAL:
+            return choose(
+                alternatives(t.children[0]), l.cc(l.varn("next_token")), optional=True
+            )
+        elif t == NodeType.STAR:
+            return repetition(t.children[0])
+        elif t == NodeType.PLUS:
+            return handle_rule(t.children[0]) + repetition(t.children[0])
 
     def handle_term(t):
+        return handle_factors(t.children)
+
+    def handle_factors(children):
         stmts = []
         idx = 0
         # loop through children, but if there's following non-terminals,
         # consume them too and skip ahead
-        while idx < len(t.children):
-            factor = t.children[idx]
+        while idx < len(children):
+            factor = children[idx]
             if factor == NodeType.TERMINAL or factor == NodeType.TOKEN:
                 following = []
-                if idx + 1 < len(t.children):
-                    for i in range(idx + 1, len(t.children)):
-                        if t.children[i] == NodeType.NONTERMINAL:
-                            following.append(t.children[i])
+                if idx + 1 < len(children):
+                    for i in range(idx + 1, len(children)):
+                        if children[i] == NodeType.NONTERMINAL:
+                            following.append(children[i])
                             idx += 1
                         else:
                             break
                 stmts.extend(handle_terminal(factor, *following))
             elif factor == NodeType.NONTERMINAL:
                 stmts.extend(handle_nonterminal(factor))
+            else:
+                stmts.extend(handle_rule(factor))
             idx += 1
         return stmts
 
@@ -184,18 +676,17 @@ def parser_from_grammar(
             following.extend(handle_nonterminal(f))
 
         next_term_name = l.cc(l.varn("next_token"))
-        s1 = l.declare(next_term_name, Composite.array(Primitive.String))
+        s1 = l.declare(next_term_name, Primitive.Int)
         s2 = l.assign(
             next_term_name,
-            l.call("get_token"),
+            l.call(this("get_token")),
         )
 
-        token_idx = 1 if factor == NodeType.TERMINAL else 0
         s3 = l.if_else(
-            l.eq(l.index(next_term_name, token_idx), l.s(factor.value)),
+            matches(factor, next_term_name),
             [l.do_nothing()] if len(following) == 0 else following,
             false_stmts=[
-                l.call("expect", l.index(next_term_name, 2), l.s(factor.value))
+                l.call(this("expect"), token_line(l, next_term_name), l.s(factor.value))
                 + l.terminator
             ],
         )
@@ -203,104 +694,257 @@ def parser_from_grammar(
         return [s1, s2, s3]
 
     def handle_nonterminal(factor):
-        return [l.call(factor.value) + l.terminator]
+        if id(factor) in inline:
+            return inline[id(factor)]
+        # rules without a production are actions the user provides as functions
+        if factor.value not in grammar.productions:
+            return [l.call(factor.value) + l.terminator]
+        return [l.call(this(factor.value)) + l.terminator]
 
-    for rule, prod in grammar.productions.items():
-        # either-or-construction
-        if prod == NodeType.OR:
-            left_set = grammar.left_set(rule)
-            tokens = list(left_set.keys())
-
-            has_epsilon = "¬" in left_set
-            if has_epsilon:
-                left_set.pop("¬")
-                tokens.remove("¬")
-
-            non_terminals = False
-            for child in prod.children:
-                if child == NodeType.TERM:
-                    for factor in child.children:
-                        non_terminals |= factor == NodeType.NONTERMINAL
-                else:
-                    non_terminals |= child == NodeType.NONTERMINAL
-
-            def recurse(left):
-                tok_idx = 0 if left_set[left[0]].get("token", False) else 1
-
-                next_tok = l.cc("next_token")
-                get_tok = l.cc("get_token")
-
-                or_term = left_set[left[0]]["or_term"]
-                if len(or_term.children) > 1:
-                    following_stuff = deepcopy(or_term)
-                    following_stuff._children.pop(0)
-
-                return l.if_else(
-                    l.eq(l.index(next_tok, tok_idx), l.s(left[0])),
-                    handle_rule(or_term)
-                    if non_terminals
-                    else [l.call(get_tok) + l.terminator]
-                    if has_epsilon
-                    else [l.do_nothing()]
-                    if len(or_term.children) <= 1
-                    else handle_rule(following_stuff),
-                    false_stmts=[recurse(left[1:])]
-                    if len(left) > 1
-                    else [
-                        l.call(
-                            "expect",
-                            l.index(next_tok, 2),
-                            l.s(",".join(tokens)),
-                        )
-                        + l.terminator
-                    ]
-                    if not has_epsilon
-                    else None,
+    if engine == "table":
+        definitions, table_methods = table_driver(l, table)
+        for stmt in definitions:
+            prog.add(stmt)
+        methods.extend(table_methods)
+        rules = {}
+    else:
+        # a function for each rule that calls the rules it's made of
+        rules = grammar.productions
+    if instrument:
+        definitions, profile_fields = profiler(l, list(rules))
+        prog.add(definitions)
+        fields.update(profile_fields)
+
+    # statements to use in place of calling a nonterminal, by the id of the node
+    # in the grammar, for the calls a rule generated as a loop makes in tail
+    # position
+    inline: Dict[int, List[str]] = {}
+
+    def alternatives(node: Node) -> List[Node]:
+        return node.children if node == NodeType.OR else [node]
+
+    def choose(
+        options: List[Node],
+        next_tok: str,
+        optional: bool = False,
+        after: Optional[List[str]] = None,
+    ) -> List[str]:
+        """Statements to look at the next token and parse the alternative it
+        starts, then the statements `after`. If none of them can start with it
+        and none can be empty it's an error, unless they're `optional`"""
+        # the alternative to take for each terminal that can start one, the
+        # first alternative listed wins if more than one can start with it
+        lookahead: Dict[Terminal, Node] = {}
+        has_epsilon = optional
+        for alternative in options:
+            bits, empty = grammar.analysis.first_of(grammar.sequence(alternative))
+            has_epsilon |= empty
+            for terminal in grammar.analysis.terminals_of(bits):
+                lookahead.setdefault(terminal, alternative)
+        left = list(lookahead.keys())
+        tokens = [value for _, value in left]
+
+        # whether any alternative is more than terminals
+        non_terminals = False
+        for child in options:
+            for factor in child.children if child == NodeType.TERM else [child]:
+                non_terminals |= (
+                    factor != NodeType.TERMINAL and factor != NodeType.TOKEN
                 )
 
-            f = l.function(
-                rule,
-                None,
-                None,
-                l.comment(grammar.bnf_from_rule(rule)),
-                l.declare(l.cc("next_token"), Composite.array(Primitive.String)),
-                l.assign(
-                    l.cc("next_token"),
-                    l.call("peek")
-                    if non_terminals or has_epsilon
-                    else l.call("get_token"),
-                ),
-                recurse(tokens),
-            )
-        elif prod == NodeType.TERM:
-            f = l.function(
-                rule,
-                None,
-                None,
-                l.comment(grammar.bnf_from_rule(rule)),
-                *handle_term(prod),
-            )
-        elif prod == NodeType.TERMINAL or prod == NodeType.TOKEN:
-            f = l.function(
-                rule,
-                None,
-                None,
-                l.comment(grammar.bnf_from_rule(rule)),
-                *handle_terminal(prod),
+        error = (
+            [
+                l.call(this("expect"), token_line(l, next_tok), l.s(",".join(tokens)))
+                + l.terminator
+            ]
+            if not has_epsilon
+            else None
+        )
+
+        def branch(or_term, keys):
+            """Statements to parse the rest of an alternative, taken when the
+            next token is one of the terminals `keys`"""
+            if non_terminals:
+                factors = or_term.children if or_term == NodeType.TERM else [or_term]
+                if (factors[0]._type, factors[0].value) not in keys:
+                    return handle_rule(or_term) + (after or [])
+                # the alternative starts with the terminal that was matched, so
+                # it's consumed without checking it again
+                return (
+                    [l.call(this("get_token")) + l.terminator]
+                    + handle_factors(factors[1:])
+                    + (after or [])
+                )
+            # the terminal the alternative starts with has been matched, and
+            # consumed unless it was only peeked at
+            stmts = [l.call(this("get_token")) + l.terminator] if has_epsilon else []
+            if len(or_term.children) > 1:
+                following_stuff = deepcopy(or_term)
+                following_stuff._children.pop(0)
+                stmts.extend(handle_rule(following_stuff))
+            stmts.extend(after or [])
+            return stmts or [l.do_nothing()]
+
+        def recurse(left):
+            node_type, value = left[0]
+            return l.if_else(
+                matches(Node(node_type, value), next_tok),
+                branch(lookahead[left[0]], left[:1]),
+                false_stmts=[recurse(left[1:])] if len(left) > 1 else error,
             )
-        elif prod == NodeType.NONTERMINAL:
-            f = l.function(
-                rule,
-                None,
-                None,
-                l.comment(grammar.bnf_from_rule(rule)),
-                *handle_nonterminal(prod),
+
+        def dispatch(left):
+            """Switch on the literal id then the kind of the next token, with a
+            case for each alternative matching all the terminals it starts
+            with, instead of comparing against each terminal in turn"""
+
+            def cases(node_type):
+                alternatives: Dict[int, Tuple[List[Terminal], Node]] = {}
+                for terminal in left:
+                    if terminal[0] != node_type:
+                        continue
+                    alternative = lookahead[terminal]
+                    keys, _ = alternatives.setdefault(
+                        id(alternative), ([], alternative)
+                    )
+                    keys.append(terminal)
+                return [
+                    ([terminal_constant(*key) for key in keys], branch(alt, keys))
+                    for keys, alt in alternatives.values()
+                ]
+
+            stmts = error
+            kind_cases = cases(NodeType.TOKEN)
+            if kind_cases:
+                switch = l.switch(l.index(this("kinds"), next_tok), kind_cases, stmts)
+                stmts = [switch]
+            literal_cases = cases(NodeType.TERMINAL)
+            if literal_cases:
+                switch = l.switch(
+                    l.index(this("literals"), next_tok), literal_cases, stmts
+                )
+                stmts = [switch]
+            return stmts[0]
+
+        return [
+            l.declare(next_tok, Primitive.Int),
+            l.assign(
+                next_tok,
+                l.call(this("peek"))
+                if non_terminals or has_epsilon
+                else l.call(this("get_token")),
+            ),
+            dispatch(left) if len(left) >= SWITCH_MIN_TERMINALS else recurse(left),
+        ]
+
+    def tail_calls(rule: str, callee: str) -> List[Node]:
+        """The nonterminals ending an alternative of the OR rule that call
+        `callee`, which are in tail position"""
+        prod = grammar.productions.get(rule)
+        if prod is None or prod != NodeType.OR:
+            return []
+        return [
+            alternative.children[-1]
+            for alternative in prod.children
+            if alternative == NodeType.TERM
+            and len(alternative.children) > 1
+            and alternative.children[-1] == NodeType.NONTERMINAL
+            and alternative.children[-1].value == callee
+        ]
+
+    def loop(rule: str) -> List[str]:
+        """Statements for an OR rule that calls itself in tail position, as in
+        `list ::= item list | "¬"`, or through another OR rule that it calls in
+        tail position and that calls it back in tail position, as in
+        `items ::= item items_tail | "¬"` and `items_tail ::= "," items | "¬"`.
+        Instead of calling itself for each item of the list the rule is a loop,
+        which goes round again where the call would have been, so a list of
+        any length is parsed without the stack growing. Returns no statements
+        for any other rule"""
+        again = l.cc(l.varn("again"))
+        repeat = [l.assign(again, l.true())]
+        for factor in tail_calls(rule, rule):
+            inline[id(factor)] = repeat
+        prod = grammar.productions[rule]
+        for alternative in prod.children:
+            if alternative != NodeType.TERM:
+                continue
+            callee = alternative.children[-1]
+            if callee != NodeType.NONTERMINAL or callee.value == rule:
+                continue
+            back = tail_calls(callee.value, rule)
+            if not back or id(callee) in inline:
+                continue
+            for factor in back:
+                inline[id(factor)] = repeat
+            inline[id(callee)] = choose(
+                alternatives(grammar.productions[callee.value]),
+                l.cc(l.varn("next_token")),
             )
+        if not inline:
+            return []
+        stmts = [
+            l.declare(again, Primitive.Bool),
+            l.assign(again, l.true()),
+            l.while_loop(
+                l.assign(again, l.false()),
+                *choose(prod.children, l.cc("next_token")),
+                condition=again,
+            ),
+        ]
+        inline.clear()
+        return stmts
+
+    def repetition(node: Node) -> List[str]:
+        """Statements to parse the node for as long as the next token can start
+        it, for a repetition in a production"""
+        again = l.cc(l.varn("again"))
+        return [
+            l.declare(again, Primitive.Bool),
+            l.assign(again, l.true()),
+            l.while_loop(
+                l.assign(again, l.false()),
+                *choose(
+                    alternatives(node),
+                    l.cc(l.varn("next_token")),
+                    optional=True,
+                    after=[l.assign(again, l.true())],
+                ),
+                condition=again,
+            ),
+        ]
+
+    for rule, prod in rules.items():
+        # either-or-construction
+        if prod == NodeType.OR:
+            stmts = loop(rule) or choose(prod.children, l.cc("next_token"))
         else:
-            f = l.function(rule, None, [], l.do_return(None))
-        prog.add(f)
+            stmts = handle_rule(prod)
+        if instrument:
+            # rules only return at their end, an error leaves them open until
+            # the profile's next parse or report
+            stmts = [
+                l.call(f"{profile}.enter", l.cc(rule_constant(rule))) + l.terminator,
+                *stmts,
+                l.call(f"{profile}.leave") + l.terminator,
+            ]
+        f = l.method(
+            PARSER,
+            rule,
+            None,
+            None,
+            l.comment(grammar.bnf_from_rule(rule)),
+            *stmts,
+        )
+        methods.append(f)
 
-    prog.add(parse)
-    prog.add(main)
+    methods.append(parse)
+    prog.add(l.struct(PARSER, fields, *methods))
+    if library:
+        prog.add(api)
+    else:
+        helpers, main = batch_main(l, PARSER, PARSE_ERROR, instrument)
+        prog.add(helpers)
+        prog.add(l.function("main", None, None, l.verbatim(main)))
 
     return prog
@@ -0,0 +1,90 @@
+from typing import Dict, List, Optional, Tuple
+from rdpgen.lexgen import TokenKinds
+from .parse import Grammar, Node, NodeType, Terminal, EOF
+
+
+class ParseTable:
+    """LL(1) parse table for a grammar.
+
+    Every symbol is numbered so the table can be emitted as integer arrays:
+    terminals first (EOF is always 0), then the rules, then the semantic actions
+    (rules without a production that the user implements themselves). Given the
+    kinds shared with the lexer, terminals are numbered the same as the kinds and
+    literal ids so tokens index the table directly.
+
+    Where the grammar isn't LL(1) the alternative listed first wins, like the
+    order the recursive descent parser tries them in, and the conflict is
+    recorded in `conflicts`.
+    """
+
+    def __init__(self, grammar: Grammar, kinds: Optional[TokenKinds] = None):
+        self.grammar = grammar
+        self.terminals: List[Terminal] = [EOF]
+        if kinds is not None:
+            self.terminals = [(NodeType.TOKEN, name) for name in kinds.names]
+            self.terminals += [(NodeType.TERMINAL, lit) for lit in kinds.literals]
+        self.rules: List[str] = grammar.rules
+        self.actions: List[str] = []
+        for rule in self.rules:
+            for alternative in grammar.alternatives(rule):
+                for symbol in alternative:
+                    if symbol == NodeType.NONTERMINAL:
+                        if symbol.value not in self.rules:
+                            if symbol.value not in self.actions:
+                                self.actions.append(symbol.value)
+                    elif (symbol._type, symbol.value) not in self.terminals:
+                        self.terminals.append((symbol._type, symbol.value))
+
+        self.__terminal_ids: Dict[Terminal, int] = {
+            t: idx for idx, t in enumerate(self.terminals)
+        }
+        self.__rule_ids: Dict[str, int] = {r: idx for idx, r in enumerate(self.rules)}
+        self.conflicts: List[str] = []
+        # (rule, symbols on the right hand side) for each production
+        self.productions: List[Tuple[str, List[int]]] = []
+        # row for each rule, column for each terminal, production number or -1
+        self.table: List[int] = [-1] * (len(self.rules) * len(self.terminals))
+        for rule in self.rules:
+            for alternative in grammar.alternatives(rule):
+                number = len(self.productions)
+                self.productions.append((rule, [self.symbol(s) for s in alternative]))
+                lookahead, empty = grammar.first_of(alternative)
+                if empty:
+                    lookahead |= grammar.follow(rule)
+                # iterate in a fixed order so conflicts are reported consistently
+                for terminal in sorted(lookahead, key=self.terminal_id):
+                    cell = self.rule_id(rule) * len(self.terminals)
+                    cell += self.terminal_id(terminal)
+                    if self.table[cell] < 0:
+                        self.table[cell] = number
+                    elif self.table[cell] != number:
+                        self.conflicts.append(
+                            f"{rule}: more than one alternative can start with "
+                            f"{terminal[1]}"
+                        )
+
+    def terminal_id(self, terminal: Terminal) -> int:
+        return self.__terminal_ids[terminal]
+
+    def rule_id(self, rule: str) -> int:
+        """Index of the rule amongst the rules, not its symbol number"""
+        return self.__rule_ids[rule]
+
+    def symbol(self, node: Node) -> int:
+        """Symbol number of a node in a production"""
+        if node == NodeType.NONTERMINAL:
+            if node.value in self.__rule_ids:
+                return len(self.terminals) + self.rule_id(node.value)
+            return (
+                len(self.terminals) + len(self.rules) + self.actions.index(node.value)
+            )
+        return self.terminal_id((node._type, node.value))
+
+    def expected(self, rule: str) -> List[Terminal]:
+        """Terminals the rule has an entry for, for error messages"""
+        row = self.rule_id(rule) * len(self.terminals)
+        return [
+            t
+            for idx, t in enumerate(self.terminals)
+            if self.table[row + idx] >= 0 and t != EOF
+        ]
@@ -23,7 +23,7 @@ operand ::= <int> | <float> | <identifier>"""
 GRAMMAR_BNF_WITH_TOKENS = """ASSIGN ::= <IDENTIFIER> "=" <DIGIT>
 """
 
-from ..parse import Grammar
+from ..parse import Grammar, NodeType
 
 
 def test_grammar_parse_bnf():
@@ -102,3 +102,120 @@ def test_math_grammar_left_set_with_epsilons():
         "float": {"parent": "operand", "token": True},
         "identifier": {"parent": "operand", "token": True},
     }
+
+
+def terminal_values(terminals):
+    return {value for _, value in terminals}
+
+
+def test_grammar_first_sets():
+    g = Grammar.from_bnf(GRAMMAR_BNF)
+    assert terminal_values(g.first("E")) == {"(", "i"}
+    assert terminal_values(g.first("R")) == {"+", "#"}
+    assert terminal_values(g.first("F")) == {"(", "i"}
+
+
+def test_grammar_nullable():
+    g = Grammar.from_bnf(MATH_GRAMMAR)
+    assert g.nullable("expression_star")
+    assert g.nullable("minusOpt")
+    assert not g.nullable("factor")
+    assert not g.nullable("program")
+
+
+def test_grammar_follow_sets():
+    g = Grammar.from_bnf(MATH_GRAMMAR)
+    assert terminal_values(g.follow("program")) == {"EOF"}
+    assert terminal_values(g.follow("minusOpt")) == {"int", "float", "identifier"}
+    assert terminal_values(g.follow("termStar")) == terminal_values(
+        g.follow("arithmeticExpression")
+    )
+    assert "=" in terminal_values(g.follow("termStar"))
+
+
+def test_grammar_follow_depends_on_start():
+    g = Grammar.from_bnf(MATH_GRAMMAR)
+    assert terminal_values(g.follow("operand")) != {"EOF"}
+    g.start = "operand"
+    assert "EOF" in terminal_values(g.follow("operand"))
+
+
+def test_grammar_analysis_bitsets():
+    g = Grammar.from_bnf(GRAMMAR_BNF)
+    analysis = g.analysis
+    bits = analysis.first("T")
+    assert bits & analysis.bit((NodeType.TERMINAL, "i"))
+    assert not bits & analysis.bit((NodeType.TERMINAL, "+"))
+    assert set(analysis.terminals_of(bits)) == g.first("T")
+    # the analysis is only done once
+    assert g.analysis is analysis
+
+
+def test_grammar_first_of_nullable_prefix():
+    g = Grammar.from_bnf(MATH_GRAMMAR)
+    factor = g.alternatives("factor")[0]
+    terminals, empty = g.first_of(factor)
+    assert terminal_values(terminals) == {"-", "int", "float", "identifier"}
+    assert not empty
+    assert g.first_of([]) == (set(), True)
+
+
+def test_grammar_analysis_recursive_rules():
+    g = Grammar.from_bnf('A ::= B "x" | "y"\nB ::= A "z" | "¬"')
+    assert terminal_values(g.first("A")) == {"x", "y"}
+    assert terminal_values(g.first("B")) == {"x", "y"}
+    assert g.nullable("B")
+    assert terminal_values(g.follow("B")) == {"x"}
+    assert terminal_values(g.follow("A")) == {"EOF", "z"}
+
+
+def test_grammar_parse_ebnf():
+    g = Grammar.from_bnf('list ::= "[" (item ("," item)*)? "]"\nitem ::= <ID>+ | "-"?')
+    production = g.productions["list"]
+    assert production == NodeType.TERM
+    optional = production.children[1]
+    assert optional == NodeType.OPTIONAL
+    group = optional.children[0]
+    assert group == NodeType.TERM
+    assert group.children[0].value == "item"
+    assert group.children[1] == NodeType.STAR
+    assert [c.value for c in group.children[1].children[0].children] == [",", "item"]
+
+    item = g.productions["item"]
+    assert [c._type for c in item.children] == [NodeType.PLUS, NodeType.OPTIONAL]
+    assert item.children[0].children[0] == NodeType.TOKEN
+
+
+def test_grammar_ebnf_rules():
+    g = Grammar.from_bnf('list ::= "[" (item ("," item)*)? "]"\nitem ::= <ID>+ | "-"?')
+    assert g.rules == ["list", "item", "list.1", "list.2", "item.1", "item.1*", "item.2"]
+    assert [[s.value for s in a] for a in g.alternatives("list")] == [
+        ["[", "list.1", "]"]
+    ]
+    assert [[s.value for s in a] for a in g.alternatives("list.1")] == [
+        ["item", "list.2"],
+        [],
+    ]
+    assert [[s.value for s in a] for a in g.alternatives("list.2")] == [
+        [",", "item", "list.2"],
+        [],
+    ]
+    assert [[s.value for s in a] for a in g.alternatives("item.1")] == [
+        ["ID", "item.1*"]
+    ]
+    assert terminal_values(g.first("list")) == {"["}
+    assert g.nullable("item")
+    assert terminal_values(g.follow("item")) == {",", "]"}
+
+
+def test_grammar_ebnf_alternatives_group():
+    g = Grammar.from_bnf('S ::= ("a" | "b" "c") "d"')
+    group = g.productions["S"].children[0]
+    assert group == NodeType.OR
+    assert [[s.value for s in a] for a in g.alternatives("S.1")] == [
+        ["a"],
+        ["b", "c"],
+    ]
+    terminals, empty = g.first_of(g.sequence(g.productions["S"]))
+    assert terminal_values(terminals) == {"a", "b"}
+    assert not empty
@@ -0,0 +1,97 @@
+from rdpgen.lexgen import Token
+from ..parse import Grammar, NodeType, EOF
+from ..parsergen import token_kinds
+from ..table import ParseTable
+
+JSON_GRAMMAR = """json ::= object | array
+object ::= "{" pairs "}"
+pairs ::= pair pairs_tail | "¬"
+pair ::= <STRING> ":" value
+pairs_tail ::= "," pairs | "¬"
+value ::= <STRING> | <NUMBER> | object | array
+array ::= "[" elements "]"
+elements ::= value elements_tail | "¬"
+elements_tail ::= "," elements | "¬\""""
+
+AMBIGUOUS_GRAMMAR = """S ::= A | B
+A ::= "a" "b"
+B ::= "a" "c\""""
+
+ACTIONS_GRAMMAR = """S ::= "a" action"""
+
+
+def entry(table, rule, terminal):
+    row = table.rule_id(rule) * len(table.terminals)
+    return table.table[row + table.terminal_id(terminal)]
+
+
+def test_table_symbols():
+    table = ParseTable(Grammar.from_bnf(JSON_GRAMMAR))
+    assert table.terminals[0] == EOF
+    assert (NodeType.TOKEN, "STRING") in table.terminals
+    assert (NodeType.TERMINAL, "{") in table.terminals
+    assert table.rules[0] == "json"
+    assert table.actions == []
+    assert table.conflicts == []
+
+
+def test_table_entries():
+    table = ParseTable(Grammar.from_bnf(JSON_GRAMMAR))
+    rule, rhs = table.productions[entry(table, "json", (NodeType.TERMINAL, "["))]
+    assert rule == "json"
+    assert rhs == [len(table.terminals) + table.rule_id("array")]
+
+    # epsilon alternatives are chosen on the rule's follow set
+    eps = entry(table, "pairs", (NodeType.TERMINAL, "}"))
+    assert table.productions[eps] == ("pairs", [])
+    assert entry(table, "pairs", (NodeType.TERMINAL, "]")) == -1
+
+
+def test_table_expected():
+    table = ParseTable(Grammar.from_bnf(JSON_GRAMMAR))
+    assert [t[1] for t in table.expected("json")] == ["{", "["]
+
+
+def test_table_conflicts_prefer_first_alternative():
+    table = ParseTable(Grammar.from_bnf(AMBIGUOUS_GRAMMAR))
+    assert len(table.conflicts) == 1
+    production = entry(table, "S", (NodeType.TERMINAL, "a"))
+    assert table.productions[production] == (
+        "S",
+        [len(table.terminals) + table.rule_id("A")],
+    )
+
+
+def test_table_actions():
+    table = ParseTable(Grammar.from_bnf(ACTIONS_GRAMMAR))
+    assert table.actions == ["action"]
+    _, rhs = table.productions[0]
+    assert rhs[1] == len(table.terminals) + len(table.rules)
+
+
+def test_table_terminals_match_token_kinds():
+    grammar = Grammar.from_bnf(JSON_GRAMMAR)
+    tokens = [Token("ANY", "[{}:,]"), Token("STRING", '\\"[^"]*\\"')]
+    kinds = token_kinds(grammar, tokens)
+    table = ParseTable(grammar, kinds)
+    assert table.terminal_id(EOF) == 0
+    assert table.terminal_id((NodeType.TOKEN, "STRING")) == kinds.kind("STRING")
+    assert table.terminal_id((NodeType.TERMINAL, "{")) == kinds.literal("{")
+    assert len(table.terminals) == len(kinds)
+
+
+def test_table_ebnf():
+    table = ParseTable(Grammar.from_bnf('list ::= "[" (<ID> ("," <ID>)*)? "]"'))
+    assert table.rules == ["list", "list.1", "list.2"]
+    assert table.conflicts == []
+    more = entry(table, "list.2", (NodeType.TERMINAL, ","))
+    assert table.productions[more] == (
+        "list.2",
+        [
+            table.terminal_id((NodeType.TERMINAL, ",")),
+            table.terminal_id((NodeType.TOKEN, "ID")),
+            len(table.terminals) + table.rule_id("list.2"),
+        ],
+    )
+    done = entry(table, "list.2", (NodeType.TERMINAL, "]"))
+    assert table.productions[done] == ("list.2", [])
@@ -0,0 +1,246 @@
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+from .lexgen import SCANNER_SOURCE
+from .bnfparse.library import HEADER
+
+# directory in the output directory compiled binaries are cached in
+CACHE_DIR = ".build"
+
+LEXER_FLAGS = ["-O2"]
+# the parser's batch mode parses files on a pool of threads
+CPP_FLAGS = ["-O2", "-pthread"]
+GO_FLAGS = ["-trimpath", "-ldflags=-s -w"]
+
+# replaces main in a copy of a go parser to write a cpu profile of a run
+GO_PROFILE_MAIN = """package main
+
+import (
+    "os"
+    "runtime/pprof"
+)
+
+func main() {
+    f, err := os.Create(os.Getenv("RDPGEN_CPU_PROFILE"))
+    if err != nil {
+        panic(err)
+    }
+    pprof.StartCPUProfile(f)
+    parserMain()
+    pprof.StopCPUProfile()
+    f.Close()
+}
+"""
+
+
+class BuildError(Exception):
+    pass
+
+
+def run(command: List[str], cwd: Path, env: Optional[Dict[str, str]] = None):
+    try:
+        result = subprocess.run(
+            command,
+            cwd=cwd,
+            env=None if env is None else {**os.environ, **env},
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+        )
+    except OSError as e:
+        # the tool isn't installed, or isn't on the path
+        raise BuildError(f"couldn't run {command[0]}: {e.strerror}") from e
+    if result.returncode != 0:
+        raise BuildError(f"{' '.join(command)} failed:\n{result.stdout}")
+    return result.stdout
+
+
+def train(command: List[str], cwd: Path, env: Optional[Dict[str, str]] = None):
+    """Run an instrumented binary on a training input, ignoring what it prints.
+    Inputs with syntax errors are still worth profiling so only a crash fails"""
+    try:
+        result = subprocess.run(
+            command,
+            cwd=cwd,
+            env=None if env is None else {**os.environ, **env},
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+    except OSError as e:
+        raise BuildError(f"couldn't run {command[0]}: {e.strerror}") from e
+    if result.returncode < 0:
+        raise BuildError(f"training run {' '.join(command)} failed:\n{result.stderr}")
+
+
+def content_hash(*parts) -> str:
+    """Hash of everything that goes into a build, as text or files"""
+    h = hashlib.sha256()
+    for part in parts:
+        data = part.read_bytes() if isinstance(part, Path) else str(part).encode()
+        h.update(hashlib.sha256(data).digest())
+    return h.hexdigest()[:16]
+
+
+def install(binary: Path, destination: Path):
+    """Copy a binary into place, renaming it so nothing sees it half written. It
+    gets a new modification time so make sees the lexer is up to date"""
+    partial = destination.with_name(f".{destination.name}.{os.getpid()}")
+    shutil.copy(binary, partial)
+    os.replace(partial, destination)
+
+
+def corpus_files(corpus: Path) -> List[Path]:
+    if corpus.is_file():
+        return [corpus.resolve()]
+    files = sorted(p for p in corpus.rglob("*") if p.is_file())
+    if not files:
+        raise BuildError(f"no training files in {corpus}")
+    return [f.resolve() for f in files]
+
+
+def is_fused(outdir: Path) -> bool:
+    parser = outdir / "parser.cpp"
+    return parser.exists() and f'#include "{SCANNER_SOURCE}"' in parser.read_text()
+
+
+def is_library(outdir: Path) -> bool:
+    """A parser generated as a library has no main to build a program from"""
+    parser = outdir / "parser.go"
+    return (outdir / HEADER).exists() or (
+        parser.exists() and not parser.read_text().startswith("package main")
+    )
+
+
+def build_lexer(outdir: Path, corpus: Optional[Path] = None) -> Path:
+    lexer_dir = outdir / "lexer"
+    source = lexer_dir / "prog.lex"
+    training = corpus_files(corpus) if corpus else []
+    key = content_hash(
+        source, LEXER_FLAGS, run(["gcc", "--version"], outdir), *training
+    )
+    cached = outdir / CACHE_DIR / f"lexer-{key}"
+    if not cached.exists():
+        cached.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.TemporaryDirectory() as work:
+            work = Path(work)
+            run(["flex", "-o", "lex.yy.c", str(source)], work)
+            compile = ["gcc", *LEXER_FLAGS, "-o", "lexer", "lex.yy.c"]
+            # a lexer without noyywrap calls yywrap, which libfl provides
+            if "noyywrap" not in source.read_text():
+                compile.append("-lfl")
+            if training:
+                run([*compile, "-fprofile-generate"], work)
+                for file in training:
+                    train(["./lexer", str(file), os.devnull], work)
+                compile = [*compile, "-fprofile-use", "-fprofile-correction"]
+            run(compile, work)
+            install(work / "lexer", cached)
+    install(cached, lexer_dir / "lexer")
+    return lexer_dir / "lexer"
+
+
+def build_cpp(outdir: Path, corpus: Optional[Path] = None) -> Path:
+    source = outdir / "parser.cpp"
+    # a parser fused with the lexer includes the scanner's source
+    scanner = [outdir / SCANNER_SOURCE] if is_fused(outdir) else []
+    training = corpus_files(corpus) if corpus else []
+    key = content_hash(
+        source, *scanner, CPP_FLAGS, run(["g++", "--version"], outdir), *training
+    )
+    cached = outdir / CACHE_DIR / f"parser-{key}"
+    if not cached.exists():
+        cached.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.TemporaryDirectory() as work:
+            work = Path(work)
+            compile = ["g++", *CPP_FLAGS, "-o", str(work / "parser"), str(source)]
+            if training:
+                profile = f"-fprofile-generate={work / 'profile'}"
+                run([*compile, profile], work)
+                # the parser runs the lexer from the output directory
+                for file in training:
+                    train([str(work / "parser"), str(file)], outdir)
+                profile = f"-fprofile-use={work / 'profile'}"
+                compile = [*compile, profile, "-fprofile-correction"]
+            run(compile, work)
+            install(work / "parser", cached)
+    install(cached, outdir / "parser")
+    return outdir / "parser"
+
+
+def build_go(outdir: Path, corpus: Optional[Path] = None) -> Path:
+    source = outdir / "parser.go"
+    training = corpus_files(corpus) if corpus else []
+    key = content_hash(source, GO_FLAGS, run(["go", "version"], outdir), *training)
+    cached = outdir / CACHE_DIR / f"parser-{key}"
+    if not cached.exists():
+        cached.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.TemporaryDirectory() as work:
+            work = Path(work)
+            compile = ["go", "build", *GO_FLAGS, "-o", str(work / "parser")]
+            if training:
+                # build a copy that profiles itself and merge the profiles of
+                # a run on each training file
+                train_dir = work / "train"
+                train_dir.mkdir()
+                text = source.read_text().replace("func main()", "func parserMain()")
+                (train_dir / "parser.go").write_text(text)
+                (train_dir / "profile.go").write_text(GO_PROFILE_MAIN)
+                run(
+                    ["go", "build", "-o", "train", "parser.go", "profile.go"],
+                    train_dir,
+                )
+                profiles = []
+                for idx, file in enumerate(training):
+                    profiles.append(str(train_dir / f"{idx}.pprof"))
+                    env = {"RDPGEN_CPU_PROFILE": profiles[-1]}
+                    train([str(train_dir / "train"), str(file)], outdir, env)
+                merged = str(work / "merged.pprof")
+                run(
+                    ["go", "tool", "pprof", "-proto", "-output", merged, *profiles],
+                    work,
+                )
+                compile.append(f"-pgo={merged}")
+            run([*compile, str(source)], work)
+            install(work / "parser", cached)
+    install(cached, outdir / "parser")
+    return outdir / "parser"
+
+
+def build(outdir: str, corpus: Optional[str] = None) -> List[Path]:
+    """Compile the lexer and parser generated in a directory with optimisations.
+
+    Binaries are cached in the directory by a hash of their sources, flags and
+    compiler, so building again without changes only puts them back in place.
+
+    Args:
+        outdir (str):           directory a parser was generated in
+        corpus (Optional[str]): file or directory of inputs to train a profile
+                                guided build on
+
+    Returns:
+        List[Path]: the binaries that were built
+    """
+    outdir = Path(outdir).resolve()
+    training = Path(corpus) if corpus else None
+    if is_library(outdir):
+        raise BuildError(
+            f"the parser in {outdir} is a library, build it with the program using it"
+        )
+    binaries = []
+    if is_fused(outdir):
+        # generate the scanner for the parser to include
+        run(["make", "--silent"], outdir / "lexer")
+    elif (outdir / "lexer" / "prog.lex").exists():
+        binaries.append(build_lexer(outdir, training))
+    if (outdir / "parser.cpp").exists():
+        binaries.append(build_cpp(outdir, training))
+    elif (outdir / "parser.go").exists():
+        binaries.append(build_go(outdir, training))
+    elif not (outdir / "parser.py").exists():
+        raise BuildError(f"no parser generated in {outdir}")
+    return binaries
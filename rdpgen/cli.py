@@ -1,12 +1,30 @@
 import click
 import tomli
 from pathlib import Path
-from .lexgen import template_lex_file, tokens_from_config_map
+from .build import BuildError, build as build_binaries
+from .lexgen import literal_tokens, template_lex_file, tokens_from_config_map
 from .bnfparse.parse import Grammar
-from .bnfparse.parsergen import parser_from_grammar
+from .bnfparse.parsergen import parser_from_grammar, token_kinds
 
 
-@click.command()
+class DefaultGroup(click.Group):
+    """Group that runs its default command when not given a command, so
+    `rdpgen grammar.toml outdir language` still generates a parser"""
+
+    default = "generate"
+
+    def parse_args(self, ctx, args):
+        if args and args[0] not in self.commands and args[0] not in ("--help", "-h"):
+            args = [self.default, *args]
+        return super().parse_args(ctx, args)
+
+
+@click.group(cls=DefaultGroup)
+def cli():
+    pass
+
+
+@cli.command()
 @click.argument("file")
 @click.argument("outdir")
 @click.argument(
@@ -30,8 +48,68 @@ from .bnfparse.parsergen import parser_from_grammar
     type=int,
     help="How many spaces in each layer of indentation (if expand-tabs is true)",
 )
-def cli(
-    file: str, outdir: str, language: str, case: str, expand_tabs: bool, tab_size: int
+@click.option(
+    "--lexer",
+    "-l",
+    type=click.Choice(["flex", "native", "dfa", "fused"]),
+    help="flex to shell out to a lexer generated with flex, native to lex in the parser itself with regular expressions, dfa to lex in the parser itself with tables compiled from them or fused to compile a flex scanner into a c++ parser",  # noqa: E501
+)
+@click.option(
+    "--engine",
+    type=click.Choice(["recursive", "table"]),
+    default="recursive",
+    help="recursive to generate a function per rule or table for an LL(1) parse table and a loop to drive it",  # noqa: E501
+)
+@click.option(
+    "--token-format",
+    type=click.Choice(["text", "binary"]),
+    help="text for the flex lexer to write tokens as lines or binary for fixed size records",  # noqa: E501
+)
+@click.option(
+    "--stream",
+    is_flag=True,
+    default=None,
+    help="pipe tokens from the flex lexer to the parser as they are lexed instead of through a file",  # noqa: E501
+)
+@click.option(
+    "--library",
+    is_flag=True,
+    default=None,
+    help="generate a module, package or header and source to parse text with from other code instead of a program",  # noqa: E501
+)
+@click.option(
+    "--instrument",
+    is_flag=True,
+    default=None,
+    help="count and time the calls to each rule, reporting them and writing folded stacks for flame graphs when the parser exits",  # noqa: E501
+)
+@click.option(
+    "--instrument-lexer",
+    is_flag=True,
+    default=None,
+    help="count the matches, bytes and scanning time of each flex rule, writing them and the lexer's throughput as json when it exits",  # noqa: E501
+)
+@click.option(
+    "--zero-copy",
+    is_flag=True,
+    default=None,
+    help="map the input into memory and give the text of tokens as views of it instead of copies",  # noqa: E501
+)
+def generate(
+    file: str,
+    outdir: str,
+    language: str,
+    case: str,
+    expand_tabs: bool,
+    tab_size: int,
+    lexer: str,
+    engine: str,
+    token_format: str,
+    stream: bool,
+    library: bool,
+    instrument: bool,
+    instrument_lexer: bool,
+    zero_copy: bool,
 ):
     # parse config
     with open(file, "rb") as f:
@@ -45,16 +123,104 @@ def cli(
     # cli args take precedence over config file
     lang_opts = {**lang_opts_cfg, **lang_opts_cli}
 
-    # create a lexer program
-    template_lex_file(tokens, outdir)
+    # cli args take precedence over config file
+    library = library or config.get("library", False)
+    # a library lexes the text it's given itself
+    lexer = lexer or config.get("lexer", "native" if library else "flex")
+    token_format = token_format or config.get("token_format", "text")
+    stream = stream or config.get("stream", False)
+    instrument = instrument or config.get("instrument", False)
+    instrument_lexer = instrument_lexer or config.get("instrument_lexer", False)
+    zero_copy = zero_copy or config.get("zero_copy", False)
+    if lexer == "fused" and language.lower() != "c++":
+        raise click.BadParameter(
+            "only c++ parsers can be fused with the lexer", param_hint="--lexer"
+        )
+    if library and lexer not in ("native", "dfa"):
+        raise click.BadParameter(
+            "a parser generated as a library needs the native lexer or the dfa lexer",
+            param_hint="--lexer",
+        )
+    if instrument and (library or engine != "recursive"):
+        raise click.BadParameter(
+            "only a program with the recursive engine can be instrumented",
+            param_hint="--instrument",
+        )
+    if instrument_lexer and lexer != "flex":
+        raise click.BadParameter(
+            "only a flex lexer run as its own program can be instrumented",
+            param_hint="--instrument-lexer",
+        )
+    if stream and lexer != "flex":
+        raise click.BadParameter(
+            "only a flex lexer run as its own program can stream tokens",
+            param_hint="--stream",
+        )
+    if zero_copy and (lexer not in ("flex", "fused") or stream):
+        raise click.BadParameter(
+            "only a parser given the offsets of tokens in its input can map it",
+            param_hint="--zero-copy",
+        )
 
     # parse the bnf grammar rules
     grammar_cfg = config.get("grammar", {})
     grammar = Grammar(grammar_cfg)
     if "start" in config:
         grammar.start = config["start"]
-    prog = parser_from_grammar(grammar, tokens, language, lang_opts, outdir)
+    # literal terminals that none of the tokens lex, like punctuation, get rules
+    # of their own after the tokens
+    tokens += literal_tokens(tokens, token_kinds(grammar, tokens).literals)
+
+    # create a lexer program, unless the parser will do its own lexing
+    if lexer in ("flex", "fused"):
+        try:
+            template_lex_file(
+                tokens,
+                outdir,
+                token_kinds(grammar, tokens),
+                token_format,
+                stream,
+                fused=lexer == "fused",
+                instrument=instrument_lexer,
+                options=config.get("lexer_options", {}),
+            )
+        except ValueError as e:
+            raise click.ClickException(str(e))
+    prog = parser_from_grammar(
+        grammar,
+        tokens,
+        language,
+        lang_opts,
+        outdir,
+        lexer,
+        engine,
+        token_format,
+        stream,
+        library,
+        instrument,
+        zero_copy,
+    )
 
     outpath = Path(outdir) / f"parser.{prog.extension}"
+    outpath.parent.mkdir(parents=True, exist_ok=True)
     prog.write_file(str(outpath))
     print(f"parser generated at {outpath}")
+
+
+@cli.command()
+@click.argument("outdir")
+@click.option(
+    "--profile-guided",
+    "-p",
+    "corpus",
+    type=click.Path(exists=True),
+    help="file or directory of inputs to profile the parser on and rebuild it optimised for",  # noqa: E501
+)
+def build(outdir: str, corpus: str):
+    """Compile the lexer and parser generated in OUTDIR with optimisations"""
+    try:
+        binaries = build_binaries(outdir, corpus)
+    except BuildError as e:
+        raise click.ClickException(str(e))
+    for binary in binaries:
+        print(f"built {binary}")
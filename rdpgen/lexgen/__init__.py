@@ -1,4 +1,22 @@
-from .lexgen import template_lex_file, tokens_from_config_map
+from .lexgen import lexer_options, template_lex_file, tokens_from_config_map
 from .core import Token
+from .kinds import TokenKinds
+from .native import native_lexer
+from .dfa import dfa_lexer
+from .literals import literal_tokens
+from .stream import stream_reader
+from .fused import fused_reader, SCANNER_SOURCE
 
-__all__ = ["template_lex_file", "Token", "tokens_from_config_map"]
+__all__ = [
+    "template_lex_file",
+    "lexer_options",
+    "Token",
+    "TokenKinds",
+    "tokens_from_config_map",
+    "native_lexer",
+    "dfa_lexer",
+    "literal_tokens",
+    "stream_reader",
+    "fused_reader",
+    "SCANNER_SOURCE",
+]
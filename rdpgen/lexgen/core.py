@@ -1,9 +1,21 @@
+from typing import Optional
+
+
 class Token:
     """A class to represent a description of a token of a language."""
 
-    def __init__(self, name: str, regex: str):
+    def __init__(self, name: str, regex: str, literal: Optional[str] = None):
+        """
+        Args:
+            name    (str):           name of the token's kind
+            regex   (str):           flex regular expression it matches
+            literal (Optional[str]): the literal terminal of the grammar the
+                                     token is a rule for, which it matches
+                                     exactly
+        """
         self.name = name
         self.regex = regex
+        self.literal = literal
 
     def __repr__(self) -> str:
         return f"Token<name={self.name},regex={self.regex}>"
@@ -0,0 +1,567 @@
+import os
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple
+from jinja2 import FileSystemLoader, Environment
+from rdpgen.ali import Language, Type
+from .core import Token
+from .kinds import TokenKinds
+from .native import (
+    ACTION_NEWLINE,
+    ACTION_SKIP,
+    ACTION_TOKEN,
+    NEWLINE,
+    WHITESPACE,
+    render_parts,
+)
+
+ALPHABET = 256
+# `.` matches any byte but a newline, like flex
+DOT = frozenset(range(ALPHABET)) - {ord("\n")}
+ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "f": "\f", "v": "\v", "a": "\a", "b": "\b"}
+
+# unsigned integer types from narrowest to widest, tables use the narrowest
+# one that holds every value in them
+INT_TYPES = {
+    "golang": [(0xFF, "uint8"), (0xFFFF, "uint16"), (0xFFFFFFFF, "uint32")],
+    "c++": [(0xFF, "uint8_t"), (0xFFFF, "uint16_t"), (0xFFFFFFFF, "uint32_t")],
+}
+
+# a regular expression is parsed into a tree of tuples, ("set", bytes) for a
+# byte in a set, ("cat", nodes), ("alt", nodes), ("star", node) and
+# ("repeat", node, min, max) where max is None when it's unbounded
+Node = Tuple
+
+
+class RegexParser:
+    """Parse a flex regular expression into a tree matching UTF-8 bytes.
+
+    Characters outside of ASCII match the bytes of their UTF-8 encoding, so
+    they can't be used in a character class. Anchors and trailing context
+    aren't supported as the tokens never use them.
+    """
+
+    def __init__(self, regex: str, definitions: Dict[str, Node]):
+        """
+        Args:
+            regex       (str):             flex regular expression
+            definitions (Dict[str, Node]): trees of the definitions it can refer
+                                           to by name, like {int}
+        """
+        self.regex = regex
+        self.definitions = definitions
+        self.pos = 0
+
+    def parse(self) -> Node:
+        node = self.alternation()
+        if self.pos < len(self.regex):
+            self.error(f"unexpected {self.regex[self.pos]!r}")
+        return node
+
+    def error(self, message: str):
+        raise ValueError(f"{message} at {self.pos} in {self.regex}")
+
+    def peek(self, ahead: int = 0) -> Optional[str]:
+        pos = self.pos + ahead
+        return self.regex[pos] if pos < len(self.regex) else None
+
+    def take(self) -> str:
+        if self.pos >= len(self.regex):
+            self.error("unexpected end")
+        c = self.regex[self.pos]
+        self.pos += 1
+        return c
+
+    def alternation(self) -> Node:
+        alternatives = [self.concatenation()]
+        while self.peek() == "|":
+            self.pos += 1
+            alternatives.append(self.concatenation())
+        return alternatives[0] if len(alternatives) == 1 else ("alt", alternatives)
+
+    def concatenation(self) -> Node:
+        items = []
+        while self.peek() not in (None, "|", ")"):
+            items.append(self.repetition())
+        return items[0] if len(items) == 1 else ("cat", items)
+
+    def repetition(self) -> Node:
+        node = self.atom()
+        while True:
+            c = self.peek()
+            if c == "*":
+                node = ("star", node)
+            elif c == "+":
+                node = ("repeat", node, 1, None)
+            elif c == "?":
+                node = ("repeat", node, 0, 1)
+            elif c == "{" and (self.peek(1) or "").isdigit():
+                node = self.bounds(node)
+                continue
+            else:
+                return node
+            self.pos += 1
+
+    def bounds(self, node: Node) -> Node:
+        end = self.regex.index("}", self.pos)
+        lo, comma, hi = self.regex[self.pos + 1 : end].partition(",")  # noqa
+        self.pos = end + 1
+        if not comma:
+            return ("repeat", node, int(lo), int(lo))
+        return ("repeat", node, int(lo), int(hi) if hi else None)
+
+    def atom(self) -> Node:
+        c = self.take()
+        if c == "(":
+            node = self.alternation()
+            if self.take() != ")":
+                self.error("expected )")
+            return node
+        if c == "[":
+            return ("set", self.character_class())
+        if c == '"':
+            text = ""
+            while self.peek() != '"':
+                c = self.take()
+                text += self.escape() if c == "\\" else c
+            self.pos += 1
+            return literal(text)
+        if c == "{":
+            end = self.regex.index("}", self.pos)
+            name = self.regex[self.pos : end]  # noqa
+            if name not in self.definitions:
+                self.error(f"undefined definition {{{name}}}")
+            self.pos = end + 1
+            return self.definitions[name]
+        if c == ".":
+            return ("set", DOT)
+        if c == "\\":
+            return literal(self.escape())
+        if c in "^$/":
+            self.error(f"{c} isn't supported")
+        return literal(c)
+
+    def escape(self) -> str:
+        """The character an escape sequence, after its backslash, stands for"""
+        c = self.take()
+        if c in ESCAPES:
+            return ESCAPES[c]
+        if c in "01234567":
+            digits = c
+            while len(digits) < 3 and (self.peek() or "x") in "01234567":
+                digits += self.take()
+            return chr(int(digits, 8))
+        if c == "x":
+            digits = ""
+            while len(digits) < 2 and (self.peek() or "x") in "0123456789abcdefABCDEF":
+                digits += self.take()
+            return chr(int(digits, 16))
+        return c
+
+    def class_member(self) -> int:
+        c = self.take()
+        if c == "\\":
+            c = self.escape()
+        if ord(c) >= 128:
+            self.error(f"{c!r} isn't ascii, which a class must be")
+        return ord(c)
+
+    def character_class(self) -> FrozenSet[int]:
+        negate = self.peek() == "^"
+        if negate:
+            self.pos += 1
+        members = set()
+        first = True
+        # a ] straight after the [ or [^ is a member
+        while first or self.peek() != "]":
+            first = False
+            lo = self.class_member()
+            if self.peek() == "-" and self.peek(1) != "]":
+                self.pos += 1
+                hi = self.class_member()
+                members.update(range(lo, hi + 1))
+            else:
+                members.add(lo)
+        self.pos += 1
+        if negate:
+            return frozenset(range(ALPHABET)) - members
+        return frozenset(members)
+
+
+def literal(text: str) -> Node:
+    """Tree matching the UTF-8 bytes of some text"""
+    items = [("set", frozenset([b])) for b in text.encode()]
+    return items[0] if len(items) == 1 else ("cat", items)
+
+
+def byte_sets(node: Node) -> List[FrozenSet[int]]:
+    """Every set of bytes a tree matches a byte from"""
+    if node[0] == "set":
+        return [node[1]]
+    if node[0] in ("cat", "alt"):
+        return [s for child in node[1] for s in byte_sets(child)]
+    return byte_sets(node[1])
+
+
+def equivalence_classes(sets: Sequence[FrozenSet[int]]) -> List[int]:
+    """Number the bytes so that two bytes have the same class when every set
+    contains both or neither of them. The DFA then has a column per class
+    rather than per byte, as no rule can tell the bytes of a class apart.
+
+    Returns:
+        List[int]: class of each byte, numbered in order of their first byte
+    """
+    signatures: Dict[Tuple[bool, ...], int] = {}
+    classes = []
+    for b in range(ALPHABET):
+        signature = tuple(b in s for s in sets)
+        classes.append(signatures.setdefault(signature, len(signatures)))
+    return classes
+
+
+class Nfa:
+    """Thompson construction of an NFA over byte classes, with an accepting
+    state for each rule"""
+
+    def __init__(self, classes: List[int]):
+        self.classes = classes
+        self.epsilons: List[List[int]] = []
+        self.moves: List[List[Tuple[FrozenSet[int], int]]] = []
+        # rule each state accepts, if any
+        self.accepts: Dict[int, int] = {}
+        self.start = self.state()
+
+    def state(self) -> int:
+        self.epsilons.append([])
+        self.moves.append([])
+        return len(self.moves) - 1
+
+    def add_rule(self, node: Node, rule: int):
+        start, end = self.build(node)
+        self.epsilons[self.start].append(start)
+        self.accepts[end] = rule
+
+    def build(self, node: Node) -> Tuple[int, int]:
+        """Add states matching a tree, returning its start and end state"""
+        start = self.state()
+        if node[0] == "set":
+            end = self.state()
+            classes = frozenset(self.classes[b] for b in node[1])
+            self.moves[start].append((classes, end))
+        elif node[0] == "cat":
+            end = start
+            for child in node[1]:
+                first, last = self.build(child)
+                self.epsilons[end].append(first)
+                end = last
+        elif node[0] == "alt":
+            end = self.state()
+            for child in node[1]:
+                first, last = self.build(child)
+                self.epsilons[start].append(first)
+                self.epsilons[last].append(end)
+        elif node[0] == "star":
+            end = self.state()
+            first, last = self.build(node[1])
+            self.epsilons[start].extend([first, end])
+            self.epsilons[last].extend([first, end])
+        else:
+            _, child, lo, hi = node
+            copies = [child] * lo
+            if hi is None:
+                copies.append(("star", child))
+            else:
+                copies.extend([("alt", [child, ("cat", [])])] * (hi - lo))
+            return self.build(("cat", copies))
+        return start, end
+
+    def closure(self, states: FrozenSet[int]) -> FrozenSet[int]:
+        seen = set(states)
+        stack = list(states)
+        while stack:
+            for t in self.epsilons[stack.pop()]:
+                if t not in seen:
+                    seen.add(t)
+                    stack.append(t)
+        return frozenset(seen)
+
+
+class Dfa:
+    """A minimal DFA recognising the longest match of a list of rules.
+
+    State 0 is the dead state, which every state goes to on a byte no rule can
+    continue with, and state 1 is the start. A state accepts the rule listed
+    first of those whose match ends there, so like flex ties in length go to the
+    rule defined first.
+    """
+
+    def __init__(self, rules: List[Node]):
+        """
+        Args:
+            rules (List[Node]): trees of each rule's regular expression
+        """
+        sets = [s for node in rules for s in byte_sets(node)]
+        # class of each byte
+        self.classes = equivalence_classes(sets)
+        self.class_count = max(self.classes) + 1
+        nfa = Nfa(self.classes)
+        for rule, node in enumerate(rules):
+            nfa.add_rule(node, rule)
+        transitions, accepts = self.determinise(nfa)
+        # the next state on each class from each state
+        self.transitions: List[List[int]]
+        # rule each state accepts, or -1 if none
+        self.accepts: List[int]
+        self.transitions, self.accepts = self.minimise(transitions, accepts)
+
+    def determinise(self, nfa: Nfa) -> Tuple[List[List[int]], List[int]]:
+        """Subset construction, a state for each set of NFA states reachable"""
+        dead: FrozenSet[int] = frozenset()
+        ids = {dead: 0}
+        subsets = [dead, nfa.closure(frozenset([nfa.start]))]
+        ids[subsets[1]] = 1
+        transitions = []
+        idx = 0
+        while idx < len(subsets):
+            targets: List[set] = [set() for _ in range(self.class_count)]
+            for s in subsets[idx]:
+                for classes, t in nfa.moves[s]:
+                    for c in classes:
+                        targets[c].add(t)
+            row = []
+            for target in targets:
+                subset = nfa.closure(frozenset(target)) if target else dead
+                if subset not in ids:
+                    ids[subset] = len(subsets)
+                    subsets.append(subset)
+                row.append(ids[subset])
+            transitions.append(row)
+            idx += 1
+        accepts = [
+            min((nfa.accepts[s] for s in subset if s in nfa.accepts), default=-1)
+            for subset in subsets
+        ]
+        return transitions, accepts
+
+    def minimise(
+        self, transitions: List[List[int]], accepts: List[int]
+    ) -> Tuple[List[List[int]], List[int]]:
+        """Hopcroft's algorithm, merging the states no input tells apart.
+
+        States start partitioned by the rule they accept and a block is split
+        whenever a class takes some of its states into a splitter block and
+        others out of it, until no block can be split.
+        """
+        n = len(transitions)
+        inverse: List[List[List[int]]] = [
+            [[] for _ in range(n)] for _ in range(self.class_count)
+        ]
+        for s, row in enumerate(transitions):
+            for c, t in enumerate(row):
+                inverse[c][t].append(s)
+
+        groups: Dict[int, set] = {}
+        for s, rule in enumerate(accepts):
+            groups.setdefault(rule, set()).add(s)
+        blocks = list(groups.values())
+        block_of = [0] * n
+        for b, block in enumerate(blocks):
+            for s in block:
+                block_of[s] = b
+        work = set(range(len(blocks)))
+        while work:
+            splitter = set(blocks[work.pop()])
+            for c in range(self.class_count):
+                into: Dict[int, set] = {}
+                for t in splitter:
+                    for s in inverse[c][t]:
+                        into.setdefault(block_of[s], set()).add(s)
+                for b, inside in into.items():
+                    if len(inside) == len(blocks[b]):
+                        continue
+                    outside = blocks[b] - inside
+                    blocks[b] = inside
+                    blocks.append(outside)
+                    for s in outside:
+                        block_of[s] = len(blocks) - 1
+                    if b in work or len(outside) <= len(inside):
+                        work.add(len(blocks) - 1)
+                    else:
+                        work.add(b)
+
+        # renumber the blocks with the dead state's first, then the start's,
+        # then in the order they're reached from the start
+        order = [block_of[0], block_of[1]]
+        ids = {block_of[0]: 0, block_of[1]: 1}
+        idx = 1
+        while idx < len(order):
+            s = next(iter(blocks[order[idx]]))
+            for t in transitions[s]:
+                if block_of[t] not in ids:
+                    ids[block_of[t]] = len(order)
+                    order.append(block_of[t])
+            idx += 1
+        minimal = []
+        for b in order:
+            s = next(iter(blocks[b]))
+            minimal.append([ids[block_of[t]] for t in transitions[s]])
+        return minimal, [accepts[next(iter(blocks[b]))] for b in order]
+
+    def longest_match(self, data: bytes, offset: int = 0) -> Tuple[int, int]:
+        """(rule, length) of the longest match at an offset, (-1, 0) if none"""
+        state, rule, length = 1, -1, 0
+        for pos in range(offset, len(data)):
+            state = self.transitions[state][self.classes[data[pos]]]
+            if state == 0:
+                break
+            if self.accepts[state] >= 0:
+                rule, length = self.accepts[state], pos + 1 - offset
+        return rule, length
+
+
+def compile_rules(tokens: List[Token]) -> Dfa:
+    """Compile the rules of the flex lexer, whitespace, newlines and then each
+    token in order, into a DFA"""
+    definitions: Dict[str, Node] = {}
+    rules = [RegexParser(WHITESPACE, {}).parse(), RegexParser(NEWLINE, {}).parse()]
+    for token in tokens:
+        definitions[token.name] = RegexParser(token.regex, definitions).parse()
+        rules.append(definitions[token.name])
+    return Dfa(rules)
+
+
+def compile_supported_rules(tokens: List[Token]) -> Tuple[Dfa, List[int]]:
+    """Compile the rules of the flex lexer into a DFA like `compile_rules`, but
+    leave out the tokens using syntax it doesn't support, and any defined with
+    them, instead of failing. States accept the index of a rule among all the
+    rules, so it's the same whether or not some were left out.
+
+    Args:
+        tokens (List[Token]): token rules that exist in the language
+
+    Returns:
+        Tuple[Dfa, List[int]]: the DFA and the index of each rule left out of it
+    """
+    definitions: Dict[str, Node] = {}
+    rules = [RegexParser(WHITESPACE, {}).parse(), RegexParser(NEWLINE, {}).parse()]
+    ids = [0, 1]
+    left_out = []
+    for idx, token in enumerate(tokens, len(rules)):
+        try:
+            definitions[token.name] = RegexParser(token.regex, definitions).parse()
+        except ValueError:
+            left_out.append(idx)
+            continue
+        rules.append(definitions[token.name])
+        ids.append(idx)
+    dfa = Dfa(rules)
+    dfa.accepts = [ids[rule] if rule >= 0 else -1 for rule in dfa.accepts]
+    return dfa, left_out
+
+
+def table_lines(values: Sequence[int], width: int = 24) -> List[str]:
+    """Values of a table split into lines of comma separated numbers"""
+    return [
+        ", ".join(str(v) for v in values[i : i + width]) + ","  # noqa
+        for i in range(0, len(values), width)
+    ]
+
+
+def int_type(language: Language, values: Sequence[int]) -> str:
+    """The narrowest unsigned type of the language that holds the values, for
+    python whether they fit in bytes"""
+    if language.name == "python":
+        return "bytes" if max(values) <= 0xFF else ""
+    return next(
+        name for limit, name in INT_TYPES[language.name] if max(values) <= limit
+    )
+
+
+def dfa_tables(dfa: Dfa, language: Language) -> Dict[str, Any]:
+    """What the templates render the tables of a DFA from, its classes and
+    transitions and the rule + 1 each state accepts, so that the tables are
+    unsigned and 0 is no rule"""
+    states = [v for row in dfa.transitions for v in row]
+    accepts = [rule + 1 for rule in dfa.accepts]
+    return {
+        "classes": table_lines(dfa.classes),
+        "class_type": int_type(language, dfa.classes),
+        "class_count": dfa.class_count,
+        "transitions": table_lines(states),
+        "rows": [table_lines(row, len(row))[0] for row in dfa.transitions],
+        "transition_type": int_type(language, states),
+        "accepts": table_lines(accepts),
+        "accept_type": int_type(language, accepts),
+    }
+
+
+def dfa_lexer(
+    tokens: List[Token],
+    language: Language,
+    kinds: Optional[TokenKinds] = None,
+    parser: str = "Parser",
+    error: Optional[str] = None,
+) -> Tuple[str, Dict[str, Type], str]:
+    """Generate a table driven lexer in the target language, compiled from the
+    token rules into a minimal DFA, to be embedded in the parser.
+
+    It's a drop in replacement for the `native_lexer` with the same `lex(text)`
+    method, but instead of trying every rule's regular expression at each
+    offset it runs the DFA over the bytes of the text once, remembering the
+    last state that accepted a rule, so it needs neither flex nor a regex
+    engine. Bytes no rule tells apart share a class, so the transition table
+    has a column per class rather than per byte, and each table is stored in
+    the narrowest integer type its values fit in.
+
+    Args:
+        tokens   (List[Token]):          token rules that exist in the language
+        language (Language):             language the parser is being generated in
+        kinds    (Optional[TokenKinds]): ids shared with the parser, defaults to
+                                         numbering the tokens alone
+        parser   (str):                  name of the parser struct
+        error    (Optional[str]):        struct to throw, made from the line and a
+                                         message, on an unknown character instead
+                                         of printing it and exiting
+
+    Returns:
+        Tuple[str, Dict[str, Type], str]: source code of the lexer's tables, the
+                                          fields it adds to the parser (none) and
+                                          source code of its methods
+    """
+    from .literals import LOOKUP, literal_lookup, rule_literals
+
+    kinds = kinds or TokenKinds(tokens)
+    dfa = compile_rules(tokens)
+    rule_kinds = [-1, -1, *[kinds.kind(t.name) for t in tokens]]
+    rule_actions = [ACTION_SKIP, ACTION_NEWLINE, *[ACTION_TOKEN] * len(tokens)]
+    no_literal = [TokenKinds.NO_LITERAL] * 2
+    packages = {
+        "python": [],
+        "golang": ["fmt"] if error else ["fmt", "os"],
+        "c++": ["stdint.h", "string.h", "string", "vector"]
+        + ([] if error else ["iostream", "stdlib.h"]),
+    }
+    for pkg in packages[language.name]:
+        language.import_package(pkg)
+
+    this_dir = os.path.dirname(os.path.realpath(__file__))
+    # the lookup of literals is included from the templates shared by the lexers
+    loader = FileSystemLoader(
+        [
+            os.path.join(this_dir, "templates", "dfa"),
+            os.path.join(this_dir, "templates"),
+        ]
+    )
+    env = Environment(loader=loader, trim_blocks=True, lstrip_blocks=True)
+    template = env.get_template(f"{language.extension}.j2")
+    definitions, methods = render_parts(
+        template,
+        language,
+        **dfa_tables(dfa, language),
+        rule_kinds=table_lines(rule_kinds),
+        rule_actions=table_lines(rule_actions),
+        rule_literals=table_lines(no_literal + rule_literals(tokens, kinds)),
+        lookup=LOOKUP,
+        parser=parser,
+        error=error,
+        **literal_lookup(kinds),
+    )
+    return definitions, {}, methods
@@ -0,0 +1,58 @@
+import os
+from typing import Dict, Tuple
+from jinja2 import FileSystemLoader, Environment
+from rdpgen.ali import Cpp, Language, Type
+from .native import render_parts
+
+# source flex generates from the lexer, relative to the parser
+SCANNER_SOURCE = "lexer/lex.yy.c"
+
+# fields the reader adds to the parser, each parser has a scanner of its own
+FIELDS = {"scanner": "yyscan_t", "scanner_state": "struct lexer_state"}
+
+
+def fused_reader(
+    language: Language,
+    ring_size: int,
+    error: str = "ParseError",
+    parser: str = "Parser",
+) -> Tuple[str, Dict[str, Type], str]:
+    """Generate the code for a c++ parser to read tokens by calling the reentrant
+    flex scanner directly, compiled into the parser from `SCANNER_SOURCE`.
+
+    The parser gets the methods `start_lexer()`, which starts a scanner on the
+    parser's text and sizes its token columns (kinds, literals, starts, lengths
+    and lines) to hold `ring_size` tokens, `read_token(slot)`, which lexes the
+    next token into the slot of the columns, throwing `error` on text the
+    scanner doesn't recognise, and `stop_lexer()`, which frees the scanner. The
+    parser frees it when it's destroyed too, and can't be copied.
+
+    Args:
+        language  (Language): language the parser is being generated in
+        ring_size (int):      number of tokens the columns hold
+        error     (str):      error to throw, made from a line and a message
+        parser    (str):      name of the parser struct
+
+    Returns:
+        Tuple[str, Dict[str, Type], str]: the include of the scanner, the fields
+                                          the reader adds to the parser and
+                                          source code of its methods
+    """
+    if not isinstance(language, Cpp):
+        raise ValueError("only c++ parsers can be fused with the lexer")
+    for pkg in ["string", "vector"]:
+        language.import_package(pkg)
+
+    this_dir = os.path.dirname(os.path.realpath(__file__))
+    loader = FileSystemLoader(os.path.join(this_dir, "templates", "fused"))
+    env = Environment(loader=loader, trim_blocks=True, lstrip_blocks=True)
+    template = env.get_template(f"{language.extension}.j2")
+    definitions, methods = render_parts(
+        template,
+        language,
+        ring_size=ring_size,
+        scanner_source=SCANNER_SOURCE,
+        error=error,
+        parser=parser,
+    )
+    return definitions, FIELDS, methods
@@ -0,0 +1,109 @@
+import unicodedata
+from typing import Dict, Iterable, List, Tuple
+from .core import Token
+
+
+class TokenKinds:
+    """Dense integer ids shared by the lexer and the parser.
+
+    Every token class gets a kind, EOF is always 0 followed by the lexer's tokens
+    in the order they're defined and then any other tokens the grammar refers
+    to. Literal terminals in the grammar (e.g. "{") are numbered after the kinds
+    so a token's kind and literal id never overlap. A token whose text isn't a
+    literal of the grammar has the literal id -1.
+    """
+
+    NO_LITERAL = -1
+
+    def __init__(
+        self,
+        tokens: List[Token],
+        literals: Iterable[str] = (),
+        token_names: Iterable[str] = (),
+    ):
+        """
+        Args:
+            tokens      (List[Token]):   token rules that exist in the language
+            literals    (Iterable[str]): literal terminals used in the grammar
+            token_names (Iterable[str]): tokens used in the grammar
+        """
+        self.names: List[str] = ["EOF"]
+        for name in [t.name for t in tokens] + list(token_names):
+            if name not in self.names:
+                self.names.append(name)
+        self.literals: List[str] = []
+        for literal in literals:
+            if literal not in self.literals:
+                self.literals.append(literal)
+
+        self.__kinds: Dict[str, int] = {n: idx for idx, n in enumerate(self.names)}
+        self.__literal_ids: Dict[str, int] = {
+            lit: len(self.names) + idx for idx, lit in enumerate(self.literals)
+        }
+
+        # identifiers for the constants in the generated code, made unique
+        # ignoring case as the target language may change it
+        self.__constants: Dict[int, str] = {}
+        used = set()
+        for value, (prefix, text) in enumerate(
+            [("KIND", n) for n in self.names]
+            + [("LITERAL", lit) for lit in self.literals]
+        ):
+            name = f"{prefix}_{identifier(text)}"
+            if name.lower() in used:
+                name = f"{name}_{value}"
+            used.add(name.lower())
+            self.__constants[value] = name
+
+    def __len__(self) -> int:
+        return len(self.names) + len(self.literals)
+
+    def kind(self, name: str) -> int:
+        """Kind of a token class by name"""
+        return self.__kinds[name]
+
+    def literal(self, text: str) -> int:
+        """Id of a literal terminal, or NO_LITERAL if it isn't one"""
+        return self.__literal_ids.get(text, TokenKinds.NO_LITERAL)
+
+    def constant(self, value: int) -> str:
+        """Identifier of the constant for a kind or literal id"""
+        return self.__constants[value]
+
+    @property
+    def constants(self) -> List[Tuple[str, int]]:
+        """(identifier, value) of every kind and literal id in order"""
+        return [(self.__constants[value], value) for value in range(len(self))]
+
+    def literals_by_length(self) -> Dict[int, List[Tuple[str, int]]]:
+        """(literal, id) of the literals grouped by their length in bytes, so the
+        lexer only has to compare text against literals the same length"""
+        groups: Dict[int, List[Tuple[str, int]]] = {}
+        for literal in self.literals:
+            groups.setdefault(len(literal.encode()), []).append(
+                (literal, self.literal(literal))
+            )
+        return dict(sorted(groups.items()))
+
+
+def identifier(text: str) -> str:
+    """Turn the name of a token or text of a literal into something that can be
+    used in an identifier, e.g. "{" becomes LEFT_CURLY_BRACKET"""
+    parts = []
+    word = ""
+    for c in text:
+        if c.isascii() and (c.isalnum() or c == "_"):
+            word += c.upper()
+            continue
+        if word:
+            parts.append(word)
+            word = ""
+        parts.append(
+            "".join(
+                ch if ch.isalnum() else "_"
+                for ch in unicodedata.name(c, f"U{ord(c):04X}")
+            )
+        )
+    if word:
+        parts.append(word)
+    return "_".join(parts) or "EMPTY"
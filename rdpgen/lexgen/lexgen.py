@@ -1,8 +1,59 @@
 import os
-from typing import List, Dict
+from typing import Any, List, Dict, Optional
 from pathlib import Path
 from jinja2 import FileSystemLoader, Environment
 from .core import Token
+from .kinds import TokenKinds
+from .literals import LOOKUP, literal_lookup, rule_literals
+from .stream import ERROR_KIND
+
+# environment variable naming the file an instrumented lexer appends its
+# summary to, instead of printing it to stderr
+LEXER_STATS = "LEXER_STATS"
+
+# the %option flex builds its tables with for each choice of `tables`, from the
+# smallest and slowest to the largest and fastest. compressed is flex's default
+TABLES = {"compressed": None, "full": "full", "fast": "fast"}
+
+# what the [lexer_options] section of the grammar config defaults to. options
+# are the %options of the flex lexer, and the buffers are the bytes it reads
+# its input and writes its tokens in at a time
+DEFAULT_LEXER_OPTIONS: Dict[str, Any] = {
+    "tables": "full",
+    "options": ["noyywrap", "never-interactive", "batch"],
+    "read_buffer": 1 << 16,
+    "output_buffer": 1 << 16,
+}
+
+# options a fused scanner needs, as the parser calls it and there's one input
+FUSED_OPTIONS = ["noyywrap", "never-interactive"]
+
+# smallest output buffer, which has to fit the longest line of a token
+MIN_OUTPUT_BUFFER = 1024
+
+
+def lexer_options(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Fill in the defaults of the [lexer_options] section of the config
+
+    Args:
+        config (Dict[str, Any]): lexer options section from TOML file
+
+    Returns:
+        Dict[str, Any]: every lexer option, as `DEFAULT_LEXER_OPTIONS`
+    """
+    unknown = set(config) - set(DEFAULT_LEXER_OPTIONS)
+    if unknown:
+        raise ValueError(f"unknown lexer options: {', '.join(sorted(unknown))}")
+    options = {**DEFAULT_LEXER_OPTIONS, **config}
+    if options["tables"] not in TABLES:
+        raise ValueError(
+            f"lexer tables must be one of {', '.join(TABLES)}, not {options['tables']}"
+        )
+    if options["output_buffer"] < MIN_OUTPUT_BUFFER:
+        raise ValueError(f"lexer output buffer must be at least {MIN_OUTPUT_BUFFER}")
+    if options["read_buffer"] < 0:
+        raise ValueError("lexer read buffer can't be negative")
+    return options
 
 
 def tokens_from_config_map(config: Dict[str, str]) -> List[Token]:
@@ -20,18 +71,90 @@ def tokens_from_config_map(config: Dict[str, str]) -> List[Token]:
     return tokens
 
 
-def template_lex_file(tokens: List[Token], directory: str):
+def template_lex_file(
+    tokens: List[Token],
+    directory: str,
+    kinds: Optional[TokenKinds] = None,
+    token_format: str = "text",
+    stream: bool = False,
+    fused: bool = False,
+    instrument: bool = False,
+    options: Optional[Dict[str, Any]] = None,
+):
     """Generate the lexer from some description of tokens and write to file or stout.
 
     Args:
-        tokens    (List[Token]):   token rules that exist in the language
-        directory (str):           path to directory to create lexer in
+        tokens       (List[Token]):          token rules that exist in the language
+        directory    (str):                  path to directory to create lexer in
+        kinds        (Optional[TokenKinds]): ids shared with the parser, defaults
+                                             to numbering the tokens alone
+        token_format (str):                  text to write tokens to out.jl as
+                                             lines or binary to write them to
+                                             out.tok as records of 5 int32s
+        stream       (bool):                 write tokens and their text to
+                                             stdout for the parser to read as
+                                             they are lexed
+        fused        (bool):                 generate a reentrant scanner without
+                                             a main for a c++ parser to include
+                                             and call yylex on directly
+        instrument   (bool):                 count the matches of each rule, the
+                                             bytes they matched and the time
+                                             spent scanning for them, and write
+                                             them and the lexer's throughput as
+                                             a line of json when it exits, see
+                                             `LEXER_STATS`
+        options      (Dict[str, Any]):       the [lexer_options] of the config,
+                                             see `lexer_options`
     """
+    if instrument and fused:
+        raise ValueError("a fused scanner can't be instrumented")
+    kinds = kinds or TokenKinds(tokens)
+    options = lexer_options(options or {})
+    flex_options = list(options["options"])
+    if TABLES[options["tables"]] is not None:
+        flex_options.append(TABLES[options["tables"]])
+    if fused:
+        flex_options.extend(FUSED_OPTIONS)
+    # each option once, in the order they're given
+    flex_options = list(dict.fromkeys(flex_options))
+    skip_whitespace = True
+    # the rules in the order they're in the lex file
+    rule_names = ["whitespace"] if skip_whitespace else []
+    rule_names.append("newline")
+    first_token_rule = len(rule_names)
+    rule_names.extend(token.name for token in tokens)
     this_dir = os.path.dirname(os.path.realpath(__file__))
     loader = FileSystemLoader(os.path.join(this_dir, "templates"))
     env = Environment(loader=loader)
     template = env.get_template("lex.j2")
-    result = template.render(tokens=tokens, skip_whitespace=True)
+    result = template.render(
+        tokens=tokens,
+        kinds=kinds,
+        token_literals=[
+            (
+                "lexer_literal_id(yytext,yyleng)"
+                if literal == LOOKUP
+                else kinds.constant(literal) if literal >= 0 else literal
+            )
+            for literal in rule_literals(tokens, kinds)
+        ],
+        # the lookup of literals is shared with the c++ lexers, but the names
+        # in a lex file are as they are
+        cc=lambda name: name,
+        **literal_lookup(kinds),
+        skip_whitespace=skip_whitespace,
+        token_format=token_format,
+        stream=stream,
+        error_kind=ERROR_KIND,
+        fused=fused,
+        instrument=instrument,
+        rule_names=rule_names,
+        first_token_rule=first_token_rule,
+        stats_env=LEXER_STATS,
+        flex_options=flex_options,
+        read_buffer=options["read_buffer"],
+        output_buffer=options["output_buffer"],
+    )
 
     base_path = Path(directory)
     # if base_path.exists():
@@ -48,5 +171,10 @@ def template_lex_file(tokens: List[Token], directory: str):
     makefile = env.get_template("Makefile.j2")
     with open(lexer_path.joinpath("Makefile"), "w") as mf:
         mf.write(
-            makefile.render(program="lexer", lexfile="prog.lex"),
+            makefile.render(
+                program="lexer",
+                lexfile="prog.lex",
+                fused=fused,
+                link_fl="noyywrap" not in flex_options,
+            ),
         )
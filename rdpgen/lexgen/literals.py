@@ -0,0 +1,151 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from .core import Token
+from .dfa import compile_rules
+from .kinds import TokenKinds, identifier
+from .native import escape_char, string_literal
+
+# literal id of a rule whose tokens might be any of the literals, which is
+# looked up from the text of each token
+LOOKUP = -2
+
+FNV_PRIME = 16777619
+MAX_SEEDS = 10000
+
+
+def literal_regex(text: str) -> str:
+    """Regular expression matching some text exactly, that flex and every
+    regex engine the lexers are converted for agree on"""
+    return "".join(escape_char(c) if c.isascii() else c for c in text)
+
+
+def winning_rules(tokens: List[Token], literals: Iterable[str]) -> List[Optional[int]]:
+    """Index of the token rule each literal is lexed as a whole token by, if it
+    is, or None. It's None for every literal if the rules use syntax the DFA
+    compiler doesn't support, as which rules match them can't be known."""
+    literals = list(literals)
+    try:
+        dfa = compile_rules(tokens)
+    except ValueError:
+        return [None] * len(literals)
+    winners: List[Optional[int]] = []
+    for literal in literals:
+        data = literal.encode()
+        rule, length = dfa.longest_match(data)
+        # the first rules are the lexer's whitespace and newlines
+        winners.append(rule - 2 if length == len(data) and rule >= 2 else None)
+    return winners
+
+
+def literal_tokens(tokens: List[Token], literals: Iterable[str]) -> List[Token]:
+    """Rules for the literal terminals of a grammar that none of the tokens
+    lexes as a whole token, like punctuation, so the grammar doesn't need a
+    catch-all token to be lexed. Each matches its literal exactly and goes
+    after the tokens, so where a token matches as much text it still wins.
+
+    Args:
+        tokens   (List[Token]):   token rules that exist in the language
+        literals (Iterable[str]): literal terminals used in the grammar
+
+    Returns:
+        List[Token]: a rule for each literal that needs one
+    """
+    literals = list(dict.fromkeys(literals))
+    names = {t.name.lower() for t in tokens}
+    added = []
+    for literal, winner in zip(literals, winning_rules(tokens, literals)):
+        if winner is not None:
+            continue
+        name = f"LITERAL_{identifier(literal)}"
+        while name.lower() in names:
+            name += "_"
+        names.add(name.lower())
+        added.append(Token(name, literal_regex(literal), literal=literal))
+    return added
+
+
+def rule_literals(tokens: List[Token], kinds: TokenKinds) -> List[int]:
+    """Literal id of the tokens of each rule. It's the literal of a rule that
+    matches one exactly, `LOOKUP` for a rule that lexes some literal as a whole
+    token, as the text of each of its tokens has to be looked up, and
+    `TokenKinds.NO_LITERAL` for a rule that never does, which saves the lookup
+    for most tokens"""
+    winners = set(winning_rules(tokens, kinds.literals))
+    ids = []
+    for idx, token in enumerate(tokens):
+        if token.literal is not None:
+            ids.append(kinds.literal(token.literal))
+        elif idx in winners or None in winners:
+            ids.append(LOOKUP)
+        else:
+            ids.append(TokenKinds.NO_LITERAL)
+    return ids
+
+
+def fnv1a(seed: int, data: bytes) -> int:
+    """32 bit FNV-1a hash starting from a seed instead of the offset basis,
+    the same as the lexers compute it"""
+    h = seed
+    for b in data:
+        h = ((h ^ b) * FNV_PRIME) & 0xFFFFFFFF
+    return h
+
+
+class PerfectHash:
+    """A table of the literals with at most one in each slot, so a token's
+    literal id is found by hashing its text and comparing it with the one
+    literal in the slot the hash picks.
+
+    The table has a power of two slots, at least twice as many as there are
+    literals, and the seed of the hash is searched for until it puts each
+    literal in a slot of its own, doubling the table if none does.
+    """
+
+    def __init__(self, literals: List[Tuple[str, int]]):
+        """
+        Args:
+            literals (List[Tuple[str, int]]): (text, id) of each literal
+        """
+        keys = [(text.encode(), id) for text, id in literals]
+        # longer text than this can't be a literal, so isn't hashed
+        self.max_length = max((len(key) for key, _ in keys), default=0)
+        size = 1
+        while size < 2 * len(keys):
+            size *= 2
+        while True:
+            for seed in range(1, MAX_SEEDS):
+                slots = {fnv1a(seed, key) & (size - 1) for key, _ in keys}
+                if len(slots) == len(keys):
+                    break
+            else:
+                size *= 2
+                continue
+            break
+        self.seed = seed
+        self.mask = size - 1
+        # (text, id) of the literal in each slot, empty slots are ("", -1)
+        self.slots: List[Tuple[str, int]] = [("", TokenKinds.NO_LITERAL)] * size
+        for (key, id), (text, _) in zip(keys, literals):
+            self.slots[fnv1a(seed, key) & self.mask] = (text, id)
+
+    def lookup(self, text: str) -> int:
+        """Id of the literal some text is, or NO_LITERAL"""
+        data = text.encode()
+        slot_text, id = self.slots[fnv1a(self.seed, data) & self.mask]
+        return id if slot_text == text else TokenKinds.NO_LITERAL
+
+
+def literal_lookup(kinds: TokenKinds) -> Dict[str, Any]:
+    """What the templates/literals templates render the lookup of literal ids
+    from, a perfect hash of the literals and for python a dict of them"""
+    table = PerfectHash([(lit, kinds.literal(lit)) for lit in kinds.literals])
+    return {
+        "literal_seed": table.seed,
+        "literal_mask": table.mask,
+        "literal_max_length": table.max_length,
+        "literal_slots": [
+            (string_literal(text), len(text.encode()), id) for text, id in table.slots
+        ],
+        "literals": [
+            (string_literal(lit), kinds.literal(lit)) for lit in kinds.literals
+        ],
+    }
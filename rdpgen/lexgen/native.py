@@ -0,0 +1,213 @@
+import os
+from typing import List, Dict, Optional, Tuple
+from jinja2 import FileSystemLoader, Environment, Template
+from rdpgen.ali import Language, Type
+from .core import Token
+from .kinds import TokenKinds
+
+# rules the flex lexer adds before the token rules, kept in the same order so
+# ties in match length are resolved the same way
+WHITESPACE = "[ \t\r]+"
+NEWLINE = "\n"
+
+# what the lexer does with the text matched by each rule
+ACTION_TOKEN = 0
+ACTION_SKIP = 1
+ACTION_NEWLINE = 2
+
+
+def escape_char(c: str) -> str:
+    """Escape a character to be matched literally by any of the regex engines"""
+    if c.isalnum() or c == "_":
+        return c
+    if c in "\\[]^-":
+        return "\\" + c
+    # a class of one character avoids escapes some engines don't support
+    return f"[{c}]"
+
+
+def flex_to_regex(regex: str, definitions: Dict[str, str]) -> str:
+    """Convert a flex regular expression into one the regex engines of the target
+    languages understand, expanding references to other definitions.
+
+    Args:
+        regex       (str):            flex regular expression
+        definitions (Dict[str, str]): already converted definitions by name
+
+    Returns:
+        str: the equivalent regular expression
+    """
+    out = ""
+    i = 0
+    while i < len(regex):
+        c = regex[i]
+        if c == "\\":
+            out += regex[i : i + 2]  # noqa
+            i += 2
+        elif c == "[":
+            # copy character classes verbatim, they can contain quotes and braces
+            end = i + 1
+            if end < len(regex) and regex[end] == "^":
+                end += 1
+            if end < len(regex) and regex[end] == "]":
+                end += 1
+            while end < len(regex) and regex[end] != "]":
+                end += 2 if regex[end] == "\\" else 1
+            out += regex[i : end + 1]  # noqa
+            i = end + 1
+        elif c == '"':
+            # quoted strings match their contents literally
+            end = regex.index('"', i + 1)
+            out += "".join(escape_char(ch) for ch in regex[i + 1 : end])  # noqa
+            i = end + 1
+        elif c == "{" and i + 1 < len(regex) and not regex[i + 1].isdigit():
+            # flex wraps expanded definitions in brackets
+            end = regex.index("}", i)
+            name = regex[i + 1 : end]  # noqa
+            if name not in definitions:
+                raise ValueError(f"undefined definition {{{name}}} in {regex}")
+            out += f"({definitions[name]})"
+            i = end + 1
+        else:
+            out += c
+            i += 1
+    return out
+
+
+def expand_definitions(tokens: List[Token]) -> Dict[str, str]:
+    """Convert every token's regular expression, resolving references to tokens
+    defined before it like flex does.
+
+    Args:
+        tokens (List[Token]): token rules that exist in the language
+
+    Returns:
+        Dict[str, str]: converted regular expression for each token by name
+    """
+    definitions: Dict[str, str] = {}
+    for token in tokens:
+        definitions[token.name] = flex_to_regex(token.regex, definitions)
+    return definitions
+
+
+def string_literal(s: str) -> str:
+    """Quote a string so that it is a valid literal in Python, Go and C++"""
+    escapes = {"\\": "\\\\", '"': '\\"', "\n": "\\n", "\t": "\\t", "\r": "\\r"}
+    return '"' + "".join(escapes.get(c, c) for c in s) + '"'
+
+
+def reindent(source: str, whitespace: str, width: int = 4) -> str:
+    """Templates are indented with `width` spaces, swap them for the language's
+    own indentation"""
+    lines = []
+    for line in source.splitlines():
+        stripped = line.lstrip(" ")
+        depth = (len(line) - len(stripped)) // width
+        lines.append(whitespace * depth + stripped)
+    return "\n".join(lines)
+
+
+def render_parts(
+    template: Template,
+    language: Language,
+    blocks: Tuple[str, ...] = ("definitions", "methods"),
+    **context,
+) -> Tuple[str, ...]:
+    """Render each of the blocks of a template, by default the definitions
+    block, which go at the top level of the program, and the methods block,
+    which go in the parser struct"""
+    ctx = template.new_context({**context, "cc": language.cc})
+    return tuple(
+        reindent("".join(template.blocks[block](ctx)), language.whitespace_char)
+        for block in blocks
+    )
+
+
+def native_lexer(
+    tokens: List[Token],
+    language: Language,
+    kinds: Optional[TokenKinds] = None,
+    parser: str = "Parser",
+    error: Optional[str] = None,
+) -> Tuple[str, Dict[str, Type], str]:
+    """Generate a lexer written in the target language to be embedded in the parser.
+
+    The lexer is a `lex(text)` method of the parser that takes the text to
+    tokenize and fills in the parser's token columns (kinds, literals, starts,
+    lengths and lines) the same as they are loaded from the flex lexer's output.
+    Like flex, the longest match wins and ties go to the rule defined first.
+
+    The Python and C++ lexers match the rules with a DFA compiled from them
+    like the `dfa_lexer`'s. Python's re takes the first alternative of a rule
+    that matches rather than the longest, and std::regex recurses for each
+    character of a match and so overflows the stack on long tokens. Only the
+    rules the DFA compiler doesn't support are left to the regex engine.
+
+    Args:
+        tokens   (List[Token]):          token rules that exist in the language
+        language (Language):             language the parser is being generated in
+        kinds    (Optional[TokenKinds]): ids shared with the parser, defaults to
+                                         numbering the tokens alone
+        parser   (str):                  name of the parser struct
+        error    (Optional[str]):        struct to throw, made from the line and a
+                                         message, on an unknown character instead
+                                         of printing it and exiting
+
+    Returns:
+        Tuple[str, Dict[str, Type], str]: source code of the lexer's rules, the
+                                          fields it adds to the parser (none) and
+                                          source code of its methods
+    """
+    from .dfa import compile_supported_rules, dfa_tables
+    from .literals import LOOKUP, literal_lookup, rule_literals
+
+    kinds = kinds or TokenKinds(tokens)
+    definitions = expand_definitions(tokens)
+    rules = [
+        (-1, WHITESPACE, ACTION_SKIP, TokenKinds.NO_LITERAL),
+        (-1, NEWLINE, ACTION_NEWLINE, TokenKinds.NO_LITERAL),
+        *[
+            (kinds.kind(t.name), definitions[t.name], ACTION_TOKEN, literal)
+            for t, literal in zip(tokens, rule_literals(tokens, kinds))
+        ],
+    ]
+    rules = [(k, string_literal(r), a, lit) for k, r, a, lit in rules]
+    tables = {}
+    patterns = []
+    if language.name in ("python", "c++"):
+        dfa, left_out = compile_supported_rules(tokens)
+        tables = dfa_tables(dfa, language)
+        patterns = [(rule, rules[rule][1]) for rule in left_out]
+
+    packages = {
+        "python": ["re"] if patterns else [],
+        "golang": ["fmt", "regexp"] if error else ["fmt", "os", "regexp"],
+        "c++": ["stdint.h", "string.h", "string", "vector"]
+        + (["regex"] if patterns else [])
+        + ([] if error else ["iostream", "stdlib.h"]),
+    }
+    for pkg in packages[language.name]:
+        language.import_package(pkg)
+
+    this_dir = os.path.dirname(os.path.realpath(__file__))
+    # the lookup of literals is included from the templates shared by the lexers
+    loader = FileSystemLoader(
+        [
+            os.path.join(this_dir, "templates", "native"),
+            os.path.join(this_dir, "templates"),
+        ]
+    )
+    env = Environment(loader=loader, trim_blocks=True, lstrip_blocks=True)
+    template = env.get_template(f"{language.extension}.j2")
+    definitions, methods = render_parts(
+        template,
+        language,
+        rules=rules,
+        **tables,
+        patterns=patterns,
+        lookup=LOOKUP,
+        parser=parser,
+        **literal_lookup(kinds),
+        error=error,
+    )
+    return definitions, {}, methods
@@ -0,0 +1,92 @@
+import os
+from typing import Dict, Tuple
+from jinja2 import FileSystemLoader, Environment
+from rdpgen.ali import Language, Primitive, Type
+from .native import render_parts
+
+# each token is sent as 5 int32s (kind, literal id, offset, length and line)
+# followed by the bytes of its text
+RECORD_SIZE = 5 * 4
+# kind of the last record the lexer sends when it can't lex the input, with
+# the line and text of what it stopped at
+ERROR_KIND = -1
+
+# fields the reader adds to the parser to keep the pipe from the lexer in, and
+# whether the parser has built the lexer yet
+FIELDS = {
+    "python": {"lexer_process": "subprocess.Popen", "lexer_built": Primitive.Bool},
+    "golang": {
+        "lexer_process": "*exec.Cmd",
+        "lexer_output": "*bufio.Reader",
+        "lexer_record": "[5]int32",
+        "lexer_built": Primitive.Bool,
+    },
+    "c++": {
+        "lexer_pid": "pid_t",
+        "lexer_output": "FILE*",
+        "lexer_built": Primitive.Bool,
+    },
+}
+
+
+def stream_reader(
+    language: Language,
+    ring_size: int,
+    parser: str = "Parser",
+    error: str = "ParseError",
+) -> Tuple[str, Dict[str, Type], str]:
+    """Generate the code for a parser to read tokens from the flex lexer through a
+    pipe as they are lexed.
+
+    The parser gets the methods `start_lexer(file)`, which builds the lexer the
+    first time, starts it on the file and sizes the parser's token columns
+    (kinds, literals, starts, lengths, lines and texts) to hold `ring_size`
+    tokens, `read_token(slot)`, which reads the next token into the slot of the
+    columns, returning false if the lexer stopped early, and `stop_lexer()`,
+    which stops the lexer of the last parse if it's still running. If the lexer
+    can't be built or started, or sends the record of an item it couldn't lex,
+    it throws `error`.
+
+    Args:
+        language  (Language): language the parser is being generated in
+        ring_size (int):      number of tokens the columns hold
+        parser    (str):      name of the parser struct
+        error     (str):      error to throw, made from a line and a message
+
+    Returns:
+        Tuple[str, Dict[str, Type], str]: source code the reader needs at the top
+                                          level, the fields it adds to the parser
+                                          and source code of its methods
+    """
+    packages = {
+        "python": ["os", "struct", "subprocess"],
+        "golang": ["bufio", "io", "os", "os/exec", "unsafe"],
+        "c++": [
+            "cstdint",
+            "fcntl.h",
+            "spawn.h",
+            "stdio.h",
+            "stdlib.h",
+            "string",
+            "sys/wait.h",
+            "unistd.h",
+            "vector",
+        ],
+    }
+    for pkg in packages[language.name]:
+        language.import_package(pkg)
+
+    this_dir = os.path.dirname(os.path.realpath(__file__))
+    loader = FileSystemLoader(os.path.join(this_dir, "templates", "stream"))
+    env = Environment(loader=loader, trim_blocks=True, lstrip_blocks=True)
+    template = env.get_template(f"{language.extension}.j2")
+    definitions, methods = render_parts(
+        template,
+        language,
+        ring_size=ring_size,
+        record_size=RECORD_SIZE,
+        error_kind=ERROR_KIND,
+        parser=parser,
+        error=error,
+    )
+    return definitions, FIELDS[language.name], methods
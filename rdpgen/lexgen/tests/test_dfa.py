@@ -0,0 +1,197 @@
+import re
+import subprocess
+import tempfile
+import textwrap
+from pathlib import Path
+
+import pytest
+import tomli
+
+from rdpgen.ali import Cpp, Go, Python
+from ..core import Token
+from ..dfa import (
+    Dfa,
+    RegexParser,
+    compile_rules,
+    compile_supported_rules,
+    dfa_lexer,
+    equivalence_classes,
+)
+from ..kinds import TokenKinds
+from ..lexgen import template_lex_file, tokens_from_config_map
+from ..native import native_lexer
+
+DATA = Path(__file__).parents[2] / "tests" / "data"
+
+# text to lex with the tokens of each grammar, with some of everything they match
+SAMPLES = {
+    "G1.toml": ["a = 1\nb_2 = 34\n", "x=y=\n\n9"],
+    "ali.toml": [
+        "int function main(x, float y) {\n  1.5; -3;\n}\nnone function f() {}",
+        "string functionality(int intx) { -0.25 }",
+    ],
+    "json.toml": [
+        '{"a": [1, -2.5, true, null], "s\\"q": "x\\\\"}',
+        '[false,\n"multi\nline", -0, 10.01]',
+        '{"ü": "naïve", "é": [1]}',
+    ],
+    "json_ebnf.toml": ['{"nested": {"list": [[], {}]}}'],
+    "math.toml": ["x = 3 * -4.5 / y;\nz < 2 + 1;", "a>-1.0;b"],
+    "math_actions.toml": ["total = 2.5*-x;\n"],
+    "simple.toml": ["A E\nB +\n\nB -", "BAO"],
+}
+
+
+class LexError(Exception):
+    def __init__(self, line, message):
+        super().__init__(f"line {line}: {message}")
+
+
+def grammar_tokens(name: str):
+    with open(DATA / "grammars" / name, "rb") as f:
+        config = tomli.load(f)
+    return tokens_from_config_map(config["tokens"].items())
+
+
+def python_lexer(lexer, tokens, kinds):
+    """Run a lexer generated in python, returning the token columns it lexes
+    some text into"""
+    language = Python()
+    definitions, _, methods = lexer(tokens, language, kinds, error="LexError")
+    source = "\n\n".join(
+        [definitions, "class Lexer:", textwrap.indent(methods, "    ")]
+    )
+    namespace = {"re": re, "LexError": LexError}
+    exec(source.replace("\t", "    "), namespace)
+
+    def lex(text: str):
+        lexer = namespace["Lexer"]()
+        lexer.lex(text)
+        return list(
+            zip(lexer.kinds, lexer.literals, lexer.starts, lexer.lengths, lexer.lines)
+        )
+
+    return lex
+
+
+def matches(regex: str, text: str, definitions=None) -> bool:
+    dfa = Dfa([RegexParser(regex, definitions or {}).parse()])
+    data = text.encode()
+    return dfa.longest_match(data) == ((0, len(data)) if data else (-1, 0))
+
+
+def test_regex_syntax():
+    assert matches('"a+b"', "a+b")
+    assert not matches('"a+b"', "aab")
+    assert matches(r"[a-c\]\-]+", "ab]-c")
+    assert matches("[^a]", "\n")
+    assert not matches(".", "\n")
+    assert matches("a{2,3}", "aaa")
+    assert not matches("a{2,3}", "aaaa")
+    assert matches("a{2}b{1,}", "aabbb")
+    assert matches(r"\x41\101\n", "AA\n")
+    assert matches("(ab|c)?d*", "abdd")
+    assert matches("é+", "éé")
+    int_ = RegexParser("-?[0-9]+", {}).parse()
+    assert matches(r"{int}\.[0-9]+", "-1.5", {"int": int_})
+
+
+@pytest.mark.parametrize("regex", ["^a", "a$", "a/b", "[é]", "{missing}", "(a"])
+def test_regex_unsupported(regex):
+    with pytest.raises(ValueError):
+        RegexParser(regex, {}).parse()
+
+
+def test_equivalence_classes():
+    classes = equivalence_classes([frozenset(b"ab"), frozenset(b"b")])
+    assert classes[ord("a")] != classes[ord("b")]
+    assert len(set(classes)) == 3
+    assert classes[0] == classes[ord("z")]
+
+
+def test_dfa_is_minimal():
+    # the textbook example, with 4 states and the dead state once minimised
+    dfa = Dfa([RegexParser("(a|b)*abb", {}).parse()])
+    assert len(dfa.transitions) == 5
+    assert dfa.class_count == 3
+    assert dfa.accepts.count(0) == 1
+    # equivalent expressions give the same automaton
+    other = Dfa([RegexParser("(a*b*)*abb", {}).parse()])
+    assert len(other.transitions) == 5
+
+
+def test_dfa_longest_match_and_priority():
+    dfa = compile_rules([Token("KEYWORD", "if"), Token("IDENT", "[a-z]+")])
+    # whitespace and newlines are rules 0 and 1 like in the flex lexer
+    assert dfa.longest_match(b"if x") == (2, 2)
+    assert dfa.longest_match(b"iff") == (3, 3)
+    assert dfa.longest_match(b" \t\nx") == (0, 2)
+    assert dfa.longest_match(b"?") == (-1, 0)
+
+
+def test_compile_supported_rules():
+    tokens = [
+        Token("START", "^a"),
+        Token("KEYWORD", "if"),
+        Token("AFTER", "{START}b"),
+        Token("IDENT", "[a-z]+"),
+    ]
+    dfa, left_out = compile_supported_rules(tokens)
+    # rules using anchors and those defined with them are left out, and the
+    # rest keep their index among all the rules
+    assert left_out == [2, 4]
+    assert dfa.longest_match(b"if x") == (3, 2)
+    assert dfa.longest_match(b"ab") == (5, 2)
+    assert dfa.longest_match(b"\n") == (1, 1)
+
+
+@pytest.mark.parametrize("language", [Python(), Go(), Cpp()])
+def test_dfa_lexer_tables(language):
+    tokens = [Token("NUMBER", "[0-9]+")]
+    definitions, fields, methods = dfa_lexer(tokens, language)
+    assert fields == {}
+    assert "transitions" in definitions.lower()
+    assert "regex" not in definitions.lower() + methods.lower()
+
+
+@pytest.mark.parametrize("grammar", sorted(SAMPLES))
+def test_dfa_lexer_matches_native(grammar):
+    tokens = grammar_tokens(grammar)
+    kinds = TokenKinds(tokens)
+    native = python_lexer(native_lexer, tokens, kinds)
+    dfa = python_lexer(dfa_lexer, tokens, kinds)
+    # text that isn't ascii is an error unless a rule matches it
+    for text in SAMPLES[grammar] + ["ü " + SAMPLES[grammar][0]]:
+        try:
+            expected = native(text)
+        except LexError as e:
+            with pytest.raises(LexError, match=re.escape(str(e))):
+                dfa(text)
+        else:
+            assert dfa(text) == expected
+
+
+@pytest.mark.parametrize("grammar", sorted(SAMPLES))
+def test_dfa_lexer_matches_flex(grammar):
+    tokens = grammar_tokens(grammar)
+    kinds = TokenKinds(tokens)
+    dfa = python_lexer(dfa_lexer, tokens, kinds)
+    directory = Path(tempfile.mkdtemp())
+    template_lex_file(tokens, str(directory), kinds)
+    subprocess.run(["make", "--silent"], cwd=directory / "lexer", check=True)
+    # flex counts offsets in bytes, so only ascii text is compared
+    texts = [text for text in SAMPLES[grammar] if text.isascii()]
+    if grammar.startswith("json"):
+        texts = texts + [f.read_text() for f in sorted((DATA / "json").iterdir())]
+    for text in texts:
+        (directory / "input").write_text(text)
+        subprocess.run(
+            [str(directory / "lexer" / "lexer"), "input", "tokens"],
+            cwd=directory,
+            check=True,
+        )
+        expected = [
+            tuple(int(field) for field in line.split("\a"))
+            for line in (directory / "tokens").read_text().splitlines()
+        ]
+        assert dfa(text) == expected
@@ -0,0 +1,48 @@
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from rdpgen.ali import Python, Cpp
+from ..core import Token
+from ..fused import fused_reader, SCANNER_SOURCE
+from ..lexgen import template_lex_file
+
+
+def test_fused_reader_includes_scanner():
+    definitions, fields, methods = fused_reader(Cpp(), 64)
+    # the scanner throws the parser's error on text it doesn't recognise
+    assert definitions.startswith("#define LEXER_ERROR(line, text) throw ParseError(")
+    assert f'#include "{SCANNER_SOURCE}"' in definitions
+    assert fields["scanner"] == "yyscan_t"
+    assert "kinds.assign(64, 0);" in methods
+
+
+def test_fused_reader_frees_scanner_with_parser():
+    _, _, methods = fused_reader(Cpp(), 64, parser="JsonParser")
+    # a parse that throws doesn't stop the scanner, the destructor does
+    assert "~JsonParser() {" in methods
+    assert "JsonParser(const JsonParser&) = delete;" in methods
+    assert "JsonParser& operator=(const JsonParser&) = delete;" in methods
+
+
+def test_fused_reader_only_cpp():
+    with pytest.raises(ValueError):
+        fused_reader(Python(), 64)
+
+
+def test_fused_lex_file():
+    directory = tempfile.mkdtemp()
+    template_lex_file([Token("NUMBER", "[0-9]+")], directory, fused=True)
+    lex = (Path(directory) / "lexer" / "prog.lex").read_text()
+    assert "%option reentrant" in lex
+    assert "int main(" not in lex
+    makefile = (Path(directory) / "lexer" / "Makefile").read_text()
+    assert makefile.startswith("all: lex.yy.c")
+
+
+def test_fused_lex_file_not_instrumented():
+    with pytest.raises(ValueError):
+        template_lex_file(
+            [Token("NUMBER", "[0-9]+")], tempfile.mkdtemp(), fused=True, instrument=True
+        )
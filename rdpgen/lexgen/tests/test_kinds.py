@@ -0,0 +1,42 @@
+from ..core import Token
+from ..kinds import TokenKinds, identifier
+
+
+def test_kinds_are_dense():
+    tokens = [Token("STRING", '\\"[^"]*\\"'), Token("ANY", "[{}:,]")]
+    kinds = TokenKinds(tokens, literals=["{", "}", "{"], token_names=["NUMBER"])
+    assert kinds.names == ["EOF", "STRING", "ANY", "NUMBER"]
+    assert kinds.kind("EOF") == 0
+    assert kinds.kind("ANY") == 2
+    assert kinds.literal("{") == 4
+    assert kinds.literal("}") == 5
+    assert kinds.literal("nope") == TokenKinds.NO_LITERAL
+    assert [value for _, value in kinds.constants] == list(range(len(kinds)))
+
+
+def test_kinds_constants():
+    kinds = TokenKinds([Token("STRING", "x")], literals=["{", "while", "=="])
+    assert kinds.constant(0) == "KIND_EOF"
+    assert kinds.constant(kinds.kind("STRING")) == "KIND_STRING"
+    assert kinds.constant(kinds.literal("{")) == "LITERAL_LEFT_CURLY_BRACKET"
+    assert kinds.constant(kinds.literal("while")) == "LITERAL_WHILE"
+    assert kinds.constant(kinds.literal("==")) == "LITERAL_EQUALS_SIGN_EQUALS_SIGN"
+
+
+def test_kinds_constants_are_unique_ignoring_case():
+    kinds = TokenKinds([Token("int", "x"), Token("INT", "y")])
+    assert kinds.constant(1) != kinds.constant(2)
+    assert kinds.constant(1).lower() != kinds.constant(2).lower()
+
+
+def test_literals_by_length():
+    kinds = TokenKinds([], literals=["if", "{", "==", "while"])
+    groups = kinds.literals_by_length()
+    assert list(groups) == [1, 2, 5]
+    assert groups[2] == [("if", kinds.literal("if")), ("==", kinds.literal("=="))]
+
+
+def test_identifier():
+    assert identifier("a_b1") == "A_B1"
+    assert identifier("a+") == "A_PLUS_SIGN"
+    assert identifier("") == "EMPTY"
@@ -0,0 +1,101 @@
+import json
+import os
+import subprocess
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from ..core import Token
+from ..lexgen import (
+    DEFAULT_LEXER_OPTIONS,
+    LEXER_STATS,
+    lexer_options,
+    template_lex_file,
+)
+
+TOKENS = [Token("NUMBER", "[0-9]+"), Token("WORD", "[a-z]+")]
+
+
+def lex_file(**options) -> str:
+    directory = tempfile.mkdtemp()
+    template_lex_file(TOKENS, directory, **options)
+    return (Path(directory) / "lexer" / "prog.lex").read_text()
+
+
+def test_lex_file_not_instrumented():
+    lex = lex_file()
+    assert "count_match" not in lex
+    assert "{whitespace} continue;" in lex
+
+
+def test_lex_file_instrumented():
+    lex = lex_file(instrument=True)
+    assert '{"whitespace", "newline", "NUMBER", "WORD"}' in lex
+    assert "{whitespace} count_match(0, yyleng); continue;" in lex
+    assert "{newline} count_match(1, yyleng); ++lno;" in lex
+    assert "{WORD} count_match(3, yyleng); write_token(" in lex
+    assert "atexit(write_stats);" in lex
+
+
+def test_instrumented_lexer_stats():
+    directory = Path(tempfile.mkdtemp())
+    template_lex_file(TOKENS, str(directory), instrument=True)
+    lexer = directory / "lexer"
+    subprocess.run(["make", "--silent"], cwd=lexer, check=True)
+    (directory / "input").write_text("abc 12\nde 3 4\n")
+    stats = directory / "stats.jl"
+    for _ in range(2):
+        subprocess.run(
+            [str(lexer / "lexer"), str(directory / "input"), str(directory / "out")],
+            env={**os.environ, LEXER_STATS: str(stats)},
+            check=True,
+        )
+    lines = stats.read_text().splitlines()
+    assert len(lines) == 2
+    summary = json.loads(lines[0])
+    assert summary["bytes"] == 14
+    assert summary["tokens"] == 5
+    assert summary["rules"]["NUMBER"]["matches"] == 3
+    assert summary["rules"]["NUMBER"]["bytes"] == 4
+    assert summary["rules"]["newline"]["matches"] == 2
+    assert summary["mb_per_s"] >= 0
+
+
+def test_binary_records_reject_large_inputs():
+    # offsets are written as int32s, so inputs they'd wrap in are an error
+    assert "INT32_MAX" in lex_file(token_format="binary")
+    assert "INT32_MAX" not in lex_file()
+
+
+def test_lex_file_options():
+    lex = lex_file()
+    assert "%option noyywrap never-interactive batch full\n" in lex
+    assert "#define YY_BUF_SIZE 65536" in lex
+    assert "#define OUT_BUFFER_SIZE 65536" in lex
+    assert "fprintf(fp" not in lex
+
+    lex = lex_file(
+        options={"tables": "compressed", "options": ["batch"], "read_buffer": 0}
+    )
+    assert "%option batch\n" in lex
+    assert "%top{" not in lex
+
+    lex = lex_file(fused=True, options={"tables": "fast", "options": []})
+    assert "%option fast noyywrap never-interactive\n" in lex
+
+
+def test_makefile_links_libfl_for_yywrap():
+    directory = Path(tempfile.mkdtemp())
+    template_lex_file(TOKENS, str(directory))
+    assert "-lfl" not in (directory / "lexer" / "Makefile").read_text()
+    template_lex_file(TOKENS, str(directory), options={"options": ["batch"]})
+    assert "-lfl" in (directory / "lexer" / "Makefile").read_text()
+
+
+def test_lexer_options():
+    assert lexer_options({}) == DEFAULT_LEXER_OPTIONS
+    assert lexer_options({"tables": "fast"})["tables"] == "fast"
+    for options in [{"tables": "small"}, {"output_buffer": 16}, {"colour": "red"}]:
+        with pytest.raises(ValueError):
+            lexer_options(options)
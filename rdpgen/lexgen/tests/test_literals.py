@@ -0,0 +1,78 @@
+import re
+import tempfile
+from pathlib import Path
+
+from ..core import Token
+from ..kinds import TokenKinds
+from ..lexgen import template_lex_file
+from ..literals import (
+    LOOKUP,
+    PerfectHash,
+    literal_regex,
+    literal_tokens,
+    rule_literals,
+)
+from ..native import flex_to_regex
+
+TOKENS = [Token("IDENTIFIER", "[a-z]+"), Token("NUMBER", "[0-9]+"), Token("EQ", "=")]
+LITERALS = ["while", "=", "==", "{", "if"]
+
+
+def test_literal_regex():
+    for literal in ["==", "[", "]", "^", "-", "\\", '"', ".", "a+", "→"]:
+        regex = flex_to_regex(literal_regex(literal), {})
+        assert re.fullmatch(regex, literal)
+
+
+def test_literal_tokens():
+    added = literal_tokens(TOKENS, LITERALS + ["{"])
+    # keywords and "=" are lexed by the tokens already
+    assert [t.literal for t in added] == ["==", "{"]
+    assert [t.name for t in added] == [
+        "LITERAL_EQUALS_SIGN_EQUALS_SIGN",
+        "LITERAL_LEFT_CURLY_BRACKET",
+    ]
+    clash = [Token("LITERAL_LEFT_CURLY_BRACKET", "x")]
+    assert literal_tokens(clash, ["{"])[0].name == "LITERAL_LEFT_CURLY_BRACKET_"
+
+
+def test_rule_literals():
+    tokens = TOKENS + literal_tokens(TOKENS, LITERALS)
+    kinds = TokenKinds(tokens, LITERALS)
+    assert rule_literals(tokens, kinds) == [
+        LOOKUP,
+        TokenKinds.NO_LITERAL,
+        LOOKUP,
+        kinds.literal("=="),
+        kinds.literal("{"),
+    ]
+    # without knowing which rules lex the literals every rule looks them up
+    unsupported = [Token("START", "^a"), Token("NUMBER", "[0-9]+")]
+    kinds = TokenKinds(unsupported, ["a"])
+    assert rule_literals(unsupported, kinds) == [LOOKUP, LOOKUP]
+
+
+def test_perfect_hash():
+    literals = [(f"keyword{n}", n) for n in range(200)] + [("{", 200), ("ü", 201)]
+    table = PerfectHash(literals)
+    assert len(table.slots) >= 2 * len(literals)
+    for text, id in literals:
+        assert table.lookup(text) == id
+    for text in ["keyword", "keyword200", "}", ""]:
+        assert table.lookup(text) == TokenKinds.NO_LITERAL
+    assert table.max_length == len("keyword199")
+
+    empty = PerfectHash([])
+    assert empty.lookup("x") == TokenKinds.NO_LITERAL
+
+
+def test_lex_file_looks_up_literals_only_for_rules_that_lex_them():
+    tokens = TOKENS + literal_tokens(TOKENS, LITERALS)
+    directory = tempfile.mkdtemp()
+    template_lex_file(tokens, directory, TokenKinds(tokens, LITERALS))
+    lex = (Path(directory) / "lexer" / "prog.lex").read_text()
+    assert "write_token(KIND_IDENTIFIER,lexer_literal_id(yytext,yyleng)," in lex
+    assert "write_token(KIND_NUMBER,-1," in lex
+    assert (
+        "write_token(KIND_LITERAL_LEFT_CURLY_BRACKET,LITERAL_LEFT_CURLY_BRACKET," in lex
+    )
@@ -0,0 +1,35 @@
+import re
+from ..core import Token
+from ..native import flex_to_regex, expand_definitions, reindent
+
+
+def test_flex_to_regex_passthrough():
+    assert flex_to_regex("[a-zA-Z_][a-zA-Z0-9_]*", {}) == "[a-zA-Z_][a-zA-Z0-9_]*"
+    assert flex_to_regex(r"\"([^\\\"]|\\.)*\"", {}) == r"\"([^\\\"]|\\.)*\""
+
+
+def test_flex_to_regex_quoted_strings():
+    regex = flex_to_regex('"a+b"', {})
+    assert re.fullmatch(regex, "a+b")
+    assert not re.fullmatch(regex, "aab")
+
+
+def test_flex_to_regex_character_classes():
+    # quotes and braces inside a class are just characters
+    assert flex_to_regex('[{"]', {}) == '[{"]'
+    assert flex_to_regex("[]{]", {}) == "[]{]"
+
+
+def test_flex_to_regex_repetition_is_not_a_definition():
+    assert flex_to_regex("a{2,3}", {}) == "a{2,3}"
+
+
+def test_expand_definitions():
+    tokens = [Token("int", "-?[0-9]+"), Token("float", r"{int}\.[0-9]+")]
+    definitions = expand_definitions(tokens)
+    assert definitions["float"] == r"(-?[0-9]+)\.[0-9]+"
+    assert re.fullmatch(definitions["float"], "-1.5")
+
+
+def test_reindent():
+    assert reindent("a\n    b\n        c", "\t") == "a\n\tb\n\t\tc"
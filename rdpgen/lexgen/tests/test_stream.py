@@ -0,0 +1,54 @@
+import io
+import struct
+from types import SimpleNamespace
+
+import pytest
+
+from rdpgen.ali import Python, Go, Cpp
+from ..stream import stream_reader
+
+
+def test_stream_reader_sizes_columns():
+    _, _, methods = stream_reader(Python(), 64)
+    assert "self.kinds = [0] * 64" in methods
+    assert 'self.texts = [""] * 64' in methods
+
+
+def test_stream_reader_python_compiles():
+    definitions, fields, methods = stream_reader(Python(), 64)
+    assert "lexer_process" in fields
+    indented = "\n".join(f"    {line}" for line in methods.splitlines())
+    compile(f"{definitions}\nclass Parser:\n{indented}\n", "parser.py", "exec")
+
+
+def test_stream_reader_case():
+    _, _, methods = stream_reader(Go(case="camel"), 64)
+    assert "func (p *Parser) startLexer(file string)" in methods
+    _, _, methods = stream_reader(Cpp(case="snake"), 64)
+    assert "void start_lexer(" in methods
+
+
+def test_stream_reader_reports_the_lexers_line():
+    definitions, _, methods = stream_reader(Python(), 64)
+    indented = "\n".join(f"    {line}" for line in methods.splitlines())
+    scope = {}
+    exec(
+        "import io, os, struct, subprocess\n"
+        "class ParseError(Exception):\n"
+        "    def __init__(self, line, message):\n"
+        "        self.line, self.message = line, message\n"
+        f"{definitions}\nclass Parser:\n{indented}\n",
+        scope,
+    )
+    parser = scope["Parser"]()
+    # the lexer sends a token then the item it stopped at on line 3
+    records = struct.pack("5i", 3, -1, 0, 1, 1) + b"["
+    records += struct.pack("5i", -1, -1, 5, 1, 3) + b"@"
+    parser.lexer_process = SimpleNamespace(stdout=io.BytesIO(records))
+    parser.kinds, parser.literals, parser.starts = [0], [0], [0]
+    parser.lengths, parser.lines, parser.texts = [0], [0], [""]
+    assert parser.read_token(0)
+    assert parser.texts[0] == "["
+    with pytest.raises(scope["ParseError"]) as error:
+        parser.read_token(0)
+    assert (error.value.line, error.value.message) == (3, "unknown item '@'")
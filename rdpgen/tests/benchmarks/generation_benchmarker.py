@@ -0,0 +1,43 @@
+"""Benchmark how long it takes to generate a parser as the grammar grows.
+
+Grammars are generated with a chain of operator precedence levels, like the
+expression rules of a real language, and a statement rule with an alternative
+per level so every level's FIRST set is needed. If generation is linear in the
+size of the grammar the time per rule reported for each size should stay flat.
+"""
+import tempfile
+import time
+
+from rdpgen.bnfparse.parse import Grammar
+from rdpgen.bnfparse.parsergen import parser_from_grammar
+from rdpgen.lexgen import Token
+
+# number of precedence levels in each generated grammar, each adds two rules
+SIZES = [50, 100, 200, 400]
+
+
+def generate_grammar(levels: int) -> Grammar:
+    rules = {"program": "statement program | " + '"¬"'}
+    rules["statement"] = " | ".join(
+        f'"stmt{i}" level{i} ";"' for i in range(levels)
+    )
+    for i in range(levels):
+        rules[f"level{i}"] = f"level{i + 1} level{i}_tail"
+        rules[f"level{i}_tail"] = f'"op{i}" level{i + 1} level{i}_tail | "¬"'
+    rules[f"level{levels}"] = '<NUMBER> | "(" level0 ")"'
+    return Grammar(rules)
+
+
+def main():
+    tokens = [Token("NUMBER", "[0-9]+"), Token("SYMBOLS", "[();]")]
+    for size in SIZES:
+        grammar = generate_grammar(size)
+        start = time.time()
+        parser_from_grammar(grammar, tokens, "python", {}, tempfile.mkdtemp())
+        elapsed = time.time() - start
+        rules = len(grammar.productions)
+        print(f"{rules} rules: {elapsed:.3f}s, {elapsed / rules * 1e3:.3f}ms per rule")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Benchmark the flex lexer on its own with each choice of [lexer_options].
+
+A lexer is generated from the JSON grammar for each choice of tables and
+buffer sizes and timed lexing the JSON test data and generated documents of a
+few sizes, writing its tokens to /dev/null so only lexing and formatting them
+is measured. The best of a few runs of each is reported in MB/s, which is what
+the defaults of `DEFAULT_LEXER_OPTIONS` are chosen by.
+"""
+
+import os
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+import tomli
+
+from rdpgen.lexgen import template_lex_file, tokens_from_config_map
+from scaling_benchmarker import GRAMMAR, generate_document
+
+HERE = Path(__file__).parent
+CORPUS = HERE.parent / "data" / "json"
+
+# number of objects in each generated document
+SIZES = [10000, 100000]
+RUNS = 5
+
+# [lexer_options] to compare, anything not given is the default
+CONFIGS = {
+    "compressed, 4k buffers": {
+        "tables": "compressed",
+        "read_buffer": 0,
+        "output_buffer": 4096,
+    },
+    "compressed": {"tables": "compressed"},
+    "full": {"tables": "full"},
+    "fast": {"tables": "fast"},
+    "full, 4k buffers": {"tables": "full", "read_buffer": 0, "output_buffer": 4096},
+    "full, 1M buffers": {
+        "tables": "full",
+        "read_buffer": 1 << 20,
+        "output_buffer": 1 << 20,
+    },
+}
+
+
+def generate_lexer(options) -> Path:
+    with open(GRAMMAR, "rb") as f:
+        config = tomli.load(f)
+    directory = Path(tempfile.mkdtemp())
+    tokens = tokens_from_config_map(config["tokens"].items())
+    template_lex_file(tokens, str(directory), options=options)
+    lexer = directory / "lexer"
+    subprocess.run("make --silent", shell=True, cwd=lexer).check_returncode()
+    return lexer / "lexer"
+
+
+def bench(lexer: Path, file: str) -> float:
+    best = None
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run([str(lexer), file, os.devnull]).check_returncode()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    lexers = {name: generate_lexer(options) for name, options in CONFIGS.items()}
+    files = [str(f) for f in sorted(CORPUS.iterdir())]
+    for size in SIZES:
+        f = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False)
+        f.write(generate_document(size))
+        f.close()
+        files.append(f.name)
+
+    for file in files:
+        megabytes = os.path.getsize(file) / 1e6
+        print(f"{Path(file).name} ({megabytes:.2f}MB)")
+        for name, lexer in lexers.items():
+            elapsed = bench(lexer, file)
+            print(f"  {name:<24} {elapsed:.4f}s {megabytes / elapsed:8.1f}MB/s")
+    for file in files[-len(SIZES) :]:  # noqa
+        os.remove(file)
+
+
+if __name__ == "__main__":
+    os.chdir(HERE)
+    main()
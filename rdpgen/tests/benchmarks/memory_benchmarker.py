@@ -0,0 +1,103 @@
+"""Benchmark how much memory the generated JSON parsers use per token.
+
+Each parser is run on a small and a large generated document and the peak
+resident set size of each run is measured. The difference between the two is
+divided by the difference in the number of tokens, so the fixed cost of
+starting the runtime and loading the program cancels out and what's left is
+the cost of holding each token in the parser's buffer.
+
+Parsers that stream tokens from the lexer are measured too, they only keep
+the last few tokens so their cost per token should be close to nothing.
+
+Each document is parsed on one line and indented over many lines, as loading
+the input shouldn't cost more for the number of lines it has. The time the
+large document takes is printed alongside its memory.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import List, Tuple
+
+from click.testing import CliRunner
+
+from rdpgen.cli import cli
+from scaling_benchmarker import LANGUAGES, GRAMMAR, count_tokens, generate_document
+
+# number of objects in the small and large documents
+SIZES = [1000, 50000]
+# extra flags to generate the parsers for each mode with
+MODES = {"file": [], "stream": ["--stream"]}
+# indent of the documents for each layout, a line per value when indented
+LAYOUTS = {"one line": None, "multi-line": 1}
+
+# runs a command and prints the peak memory of it and its children, and the
+# time it took
+MEASURE = """
+import resource, subprocess, sys, time
+start = time.time()
+subprocess.run(sys.argv[1], shell=True, check=True, stdout=subprocess.DEVNULL)
+print(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss, time.time() - start)
+"""
+
+
+def generate_parser(language: str, flags: List[str]) -> Path:
+    directory = Path(tempfile.mkdtemp())
+    result = CliRunner().invoke(cli, [str(GRAMMAR), str(directory), language, *flags])
+    if result.exit_code != 0:
+        raise RuntimeError(result.output)
+    build = LANGUAGES[language]["build"]
+    if build is not None:
+        subprocess.run(build, shell=True, cwd=directory).check_returncode()
+    return directory
+
+
+def peak_memory(directory: Path, language: str, file: str) -> Tuple[int, float]:
+    """Peak resident set size in bytes of parsing the file, and the seconds
+    it took"""
+    # build the lexer up front so the compiler isn't measured
+    subprocess.run("make --silent", shell=True, cwd=directory / "lexer")
+    # a child's peak includes the memory of the process that started it, so
+    # the parser is started from a bare interpreter rather than this process
+    command = f"cd {directory} && exec {LANGUAGES[language]['run']} {file}"
+    result = subprocess.run(
+        [sys.executable, "-S", "-c", MEASURE, command],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    result.check_returncode()
+    peak, seconds = result.stdout.split()
+    # ru_maxrss is in kilobytes on linux
+    return int(peak) * 1024, float(seconds)
+
+
+def main():
+    directories = {
+        (language, mode): generate_parser(language, flags)
+        for language in LANGUAGES
+        for mode, flags in MODES.items()
+    }
+    for layout, indent in LAYOUTS.items():
+        tokens = []
+        runs = {parser: [] for parser in directories}
+        for size in SIZES:
+            f = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False)
+            f.write(generate_document(size, indent))
+            f.close()
+            for (language, mode), directory in directories.items():
+                runs[(language, mode)].append(peak_memory(directory, language, f.name))
+            tokens.append(count_tokens(directories[("python", "file")], f.name))
+            os.remove(f.name)
+
+        for (language, mode), ((small, _), (large, seconds)) in runs.items():
+            per_token = (large - small) / (tokens[1] - tokens[0])
+            print(
+                f"{language} ({mode}, {layout}): {large / 2**20:.1f}MiB peak for "
+                f"{tokens[1]} tokens in {seconds:.2f}s, {per_token:.1f} bytes per token"
+            )
+
+
+if __name__ == "__main__":
+    os.chdir(Path(__file__).parent)
+    main()
@@ -0,0 +1,110 @@
+"""Benchmark how the generated JSON parsers scale with the size of their input.
+
+Unlike json_benchmarker.py this doesn't need network access, documents are
+generated locally at a range of sizes. If parse time grows linearly with the
+input then the time per token reported for each size should stay flat.
+"""
+import csv
+import json
+import os
+import random
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from rdpgen.cli import cli
+
+HERE = Path(__file__).parent
+GRAMMAR = HERE.parent / "data" / "grammars" / "json.toml"
+
+# number of objects in each generated document
+SIZES = [1000, 2000, 4000, 8000, 16000]
+# generated parsers recurse once per list element so keep lists short and nest
+# them instead to stay clear of python's recursion limit
+CHUNK = 100
+
+LANGUAGES = {
+    "python": {"build": None, "run": "python parser.py"},
+    "go": {"build": "go build -o parser_go parser.go", "run": "./parser_go"},
+    "c++": {"build": "g++ -O2 -o parser_cpp parser.cpp", "run": "./parser_cpp"},
+}
+
+
+def generate_document(size: int, indent: int = None) -> str:
+    """A document of the given number of objects, on one line unless it's
+    indented"""
+    objects = [
+        {"id": i, "name": f"item{i}", "tags": ["a", "b"], "valid": random.random() > 0.5}
+        for i in range(size)
+    ]
+    chunks = [objects[i : i + CHUNK] for i in range(0, size, CHUNK)]  # noqa
+    return json.dumps(
+        [chunks[i : i + CHUNK] for i in range(0, len(chunks), CHUNK)], indent=indent
+    )
+
+
+def count_tokens(directory: Path, file: str) -> int:
+    # parsers remove their tokens once loaded so run the lexer on its own
+    lexer = directory / "lexer"
+    subprocess.run(
+        f"make --silent && ./lexer {file}", shell=True, cwd=lexer
+    ).check_returncode()
+    with open(lexer / "out.jl") as f:
+        return sum(1 for _ in f)
+
+
+def generate_parser(language: str) -> Path:
+    directory = Path(tempfile.mkdtemp())
+    result = CliRunner().invoke(cli, [str(GRAMMAR), str(directory), language])
+    if result.exit_code != 0:
+        raise RuntimeError(result.output)
+    build = LANGUAGES[language]["build"]
+    if build is not None:
+        subprocess.run(build, shell=True, cwd=directory).check_returncode()
+    return directory
+
+
+def bench(directory: Path, language: str, file: str) -> float:
+    # build the lexer up front so it isn't included in the timings
+    subprocess.run("make --silent", shell=True, cwd=directory / "lexer")
+    start = time.time()
+    subprocess.run(
+        f"{LANGUAGES[language]['run']} {file}",
+        shell=True,
+        cwd=directory,
+        stdout=subprocess.DEVNULL,
+    ).check_returncode()
+    return time.time() - start
+
+
+def main():
+    directories = {language: generate_parser(language) for language in LANGUAGES}
+    rows = []
+    for size in SIZES:
+        f = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False)
+        f.write(generate_document(size))
+        f.close()
+
+        row = {"size": size}
+        for language, directory in directories.items():
+            row[language] = bench(directory, language, f.name)
+            row["tokens"] = count_tokens(directory, f.name)
+        rows.append(row)
+        per_token = ", ".join(
+            f"{lang}={row[lang] / row['tokens'] * 1e6:.3f}us" for lang in LANGUAGES
+        )
+        print(f"{size} objects, {row['tokens']} tokens: {per_token} per token")
+        os.remove(f.name)
+
+    with open(HERE / "scaling.csv", "w") as outfile:
+        writer = csv.writer(outfile)
+        writer.writerow(["size", "tokens", *LANGUAGES])
+        for row in rows:
+            writer.writerow([row["size"], row["tokens"], *(row[l] for l in LANGUAGES)])
+
+
+if __name__ == "__main__":
+    main()
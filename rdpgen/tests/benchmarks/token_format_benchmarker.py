@@ -0,0 +1,75 @@
+"""Benchmark the text and binary token stream formats end to end.
+
+A parser is generated for each language with each format and timed parsing
+the same generated JSON documents, including running the lexer. The binary
+format skips formatting each token as text in the lexer and splitting and
+converting it back to integers in the parser.
+"""
+import os
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from rdpgen.cli import cli
+from scaling_benchmarker import LANGUAGES, GRAMMAR, generate_document
+
+# number of objects in each generated document
+SIZES = [10000, 50000]
+FORMATS = ["text", "binary"]
+
+
+def generate_parser(language: str, token_format: str) -> Path:
+    directory = Path(tempfile.mkdtemp())
+    result = CliRunner().invoke(
+        cli,
+        [str(GRAMMAR), str(directory), language, "--token-format", token_format],
+    )
+    if result.exit_code != 0:
+        raise RuntimeError(result.output)
+    build = LANGUAGES[language]["build"]
+    if build is not None:
+        subprocess.run(build, shell=True, cwd=directory).check_returncode()
+    # build the lexer up front so it isn't included in the timings
+    subprocess.run("make --silent", shell=True, cwd=directory / "lexer")
+    return directory
+
+
+def bench(directory: Path, language: str, file: str) -> float:
+    start = time.time()
+    subprocess.run(
+        f"{LANGUAGES[language]['run']} {file}",
+        shell=True,
+        cwd=directory,
+        stdout=subprocess.DEVNULL,
+    ).check_returncode()
+    return time.time() - start
+
+
+def main():
+    directories = {
+        (language, token_format): generate_parser(language, token_format)
+        for language in LANGUAGES
+        for token_format in FORMATS
+    }
+    for size in SIZES:
+        f = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False)
+        f.write(generate_document(size))
+        f.close()
+        for language in LANGUAGES:
+            text, binary = (
+                bench(directories[(language, token_format)], language, f.name)
+                for token_format in FORMATS
+            )
+            print(
+                f"{size} objects, {language}: text {text:.3f}s, "
+                f"binary {binary:.3f}s ({text / binary:.2f}x)"
+            )
+        os.remove(f.name)
+
+
+if __name__ == "__main__":
+    os.chdir(Path(__file__).parent)
+    main()
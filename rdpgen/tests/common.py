@@ -0,0 +1,50 @@
+import importlib.util
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from rdpgen.cli import cli
+
+GRAMMARS = Path(__file__).parent / "data" / "grammars"
+GRAMMAR = GRAMMARS / "json.toml"
+VALID = '[{"a": 1, "b": [true, null]}, "c"]'
+INVALID = '[\n{"a": 1},\n{"b" 2}\n]'
+UNKNOWN = '[\n"a", @]'
+
+
+def generate(
+    language: str, *flags: str, grammar: Path = GRAMMAR, directory: Path = None
+) -> Path:
+    """Generate a parser for the grammar, into a new directory unless one is
+    given, and return the directory"""
+    if directory is None:
+        directory = Path(tempfile.mkdtemp())
+    result = CliRunner().invoke(cli, [str(grammar), str(directory), language, *flags])
+    assert result.exit_code == 0, result.output
+    return directory
+
+
+def compile_parser(directory: Path, language: str):
+    """Command to run the parser generated in the directory with"""
+    if language == "python":
+        return [sys.executable, "parser.py"]
+    if language == "go":
+        subprocess.run(
+            ["go", "build", "-o", "parser", "parser.go"], cwd=directory, check=True
+        )
+    else:
+        if "lex.yy.c" in (directory / "parser.cpp").read_text():
+            subprocess.run(["make", "--silent"], cwd=directory / "lexer", check=True)
+        subprocess.run(["g++", "-o", "parser", "parser.cpp"], cwd=directory, check=True)
+    return ["./parser"]
+
+
+def load_parser(directory: Path):
+    """Import the python parser generated in the directory as a module"""
+    spec = importlib.util.spec_from_file_location("parser", directory / "parser.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
@@ -0,0 +1,36 @@
+Feature: Generate C++ Parser for JSON Fused with the Lexer
+    Background: Generate Parser in Languages
+    Given I have a grammar json
+    When I generate a parser in <language> with flags --lexer fused
+    Then I see a file parser.<extension>
+    
+    Examples:
+    | language | extension | command                                    |
+    | c++      | cpp       | make -C lexer --silent && g++ _ && ./a.out |
+    
+    Scenario Outline: Parser Accepts Valid Input
+    When I run the parser with "<command>" and input:
+        <input>
+    Then I get a 0 return code
+    Examples:
+    | input                                                                     |
+    | {}                                                                        |
+    | {"hello": "world"}                                                        |
+    | {"age": 10}                                                               |
+    | {"bool": true}                                                            |
+    | {"data": [1,2,true,null]}                                                 |
+    | {"id1": {"name": "jj", "age": 21, "interests": ["coding", "movies"]} }    |
+    | [{"data":"in"}, {"arrays":"!"}]                                           |
+
+    Scenario Outline: Parser Rejects Invalid Input
+    When I run the parser with "<command>" and input:
+        <input>
+    Then I get a 1 return code
+    Examples:
+    | input                                      |
+    | {                                          |
+    | {hello: world}                             |
+    | {"invalid : 10}                            |
+    | {"name": }                                 |
+    | {"bad-value": invalid }                    |
+    | [{"forgot": "to close the array... oops!"} |    
\ No newline at end of file
@@ -0,0 +1,233 @@
+import re
+import subprocess
+import tempfile
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from rdpgen.cli import cli
+
+from .common import GRAMMAR, INVALID, UNKNOWN, VALID, compile_parser, generate
+
+SUMMARY = re.compile(
+    r"(\d+) files, (\d+) passed, (\d+) failed in [\d.]+s "
+    r"\([\d.]+ files/s, [\d.]+ tokens/s\)"
+)
+
+LEXERS = [
+    ("python", "flex"),
+    ("python", "native"),
+    ("go", "flex"),
+    ("go", "native"),
+    ("c++", "flex"),
+    ("c++", "native"),
+    ("c++", "fused"),
+]
+
+
+def corpus(directory: Path) -> Path:
+    """A directory of valid files with an invalid one and one the lexer can't
+    lex in a subdirectory"""
+    files = directory / "corpus"
+    (files / "more").mkdir(parents=True)
+    (files / "a.json").write_text(VALID)
+    (files / "c.json").write_text(VALID)
+    (files / "more" / "b.json").write_text(INVALID)
+    (files / "more" / "d.json").write_text(UNKNOWN)
+    return files
+
+
+@pytest.mark.parametrize("language,lexer", LEXERS)
+def test_batch(language, lexer):
+    directory = generate(language, "--lexer", lexer)
+    run = compile_parser(directory, language)
+    corpus(directory)
+
+    result = subprocess.run(
+        [*run, "corpus"], cwd=directory, capture_output=True, text=True
+    )
+    assert result.returncode == 1, result.stderr
+    lines = result.stdout.splitlines()
+    # a flex lexer prints its own error about the file it couldn't lex
+    results = [line for line in lines if line.startswith(("PASS", "FAIL"))]
+    assert results[:3] == [
+        "PASS corpus/a.json",
+        "PASS corpus/c.json",
+        "FAIL corpus/more/b.json: line 3: expected :",
+    ]
+    assert results[3].startswith("FAIL corpus/more/d.json: line ")
+    assert SUMMARY.fullmatch(lines[-1]).groups() == ("4", "2", "2")
+
+    # paths read from stdin, all valid
+    result = subprocess.run(
+        [*run, "-"],
+        cwd=directory,
+        input="corpus/a.json\n\ncorpus/c.json\n",
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.splitlines()[:2] == ["PASS corpus/a.json", "PASS corpus/c.json"]
+    assert SUMMARY.fullmatch(result.stdout.splitlines()[2]).groups() == ("2", "2", "0")
+
+
+@pytest.mark.parametrize("language,lexer", LEXERS)
+def test_batch_missing_file(language, lexer):
+    directory = generate(language, "--lexer", lexer)
+    run = compile_parser(directory, language)
+    corpus(directory)
+
+    # the file that can't be read fails and the rest are still parsed
+    for jobs in ["1", "2"]:
+        result = subprocess.run(
+            [*run, "-j", jobs, "corpus/a.json", "missing.json", "corpus/c.json"],
+            cwd=directory,
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 1, result.stderr
+        lines = result.stdout.splitlines()
+        # go doesn't capitalise the reason
+        assert sorted(line.lower() for line in lines[:-1]) == [
+            "fail missing.json: no such file or directory",
+            "pass corpus/a.json",
+            "pass corpus/c.json",
+        ]
+        assert SUMMARY.fullmatch(lines[-1]).groups() == ("3", "2", "1")
+
+
+@pytest.mark.parametrize(
+    "language,flags",
+    [(language, ["--lexer", lexer]) for language, lexer in LEXERS]
+    + [(language, ["--stream"]) for language in ["python", "go", "c++"]],
+)
+def test_batch_file_names_are_not_run_by_a_shell(language, flags):
+    directory = generate(language, *flags)
+    run = compile_parser(directory, language)
+    files = directory / "corpus"
+    files.mkdir()
+    (files / "a b.json").write_text(VALID)
+    (files / "c;d.json").write_text(VALID)
+    (files / "d.json").write_text(INVALID)
+
+    result = subprocess.run(
+        [*run, "-j", "1", "corpus/a b.json", "corpus/c;d.json"],
+        cwd=directory,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+    lines = result.stdout.splitlines()
+    assert lines[:2] == ["PASS corpus/a b.json", "PASS corpus/c;d.json"]
+    assert SUMMARY.fullmatch(lines[2]).groups() == ("2", "2", "0")
+
+
+@pytest.mark.parametrize("language,lexer", LEXERS)
+def test_single_missing_file(language, lexer):
+    directory = generate(language, "--lexer", lexer)
+    run = compile_parser(directory, language)
+    result = subprocess.run(
+        [*run, "missing.json"], cwd=directory, capture_output=True, text=True
+    )
+    assert result.returncode == 1
+    assert "Traceback" not in result.stderr
+    # a flex lexer says why it couldn't read the file itself
+    assert "no such file or directory" in (result.stdout + result.stderr).lower()
+
+
+@pytest.mark.parametrize("language", ["python", "go", "c++"])
+def test_single_file(language):
+    directory = generate(language)
+    run = compile_parser(directory, language)
+    files = corpus(directory)
+
+    result = subprocess.run([*run, str(files / "a.json")], cwd=directory)
+    assert result.returncode == 0
+    result = subprocess.run(
+        [*run, str(files / "more" / "b.json")],
+        cwd=directory,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 1
+    assert result.stdout.strip() == "Error: line 3 - expected :"
+
+
+@pytest.mark.parametrize("language", ["python", "go", "c++"])
+def test_single_file_stream_unknown_item(language):
+    directory = generate(language, "--stream")
+    run = compile_parser(directory, language)
+    (directory / "d.json").write_text(UNKNOWN)
+
+    # the lexer sends the item it stopped at with its line
+    result = subprocess.run(
+        [*run, "d.json"], cwd=directory, capture_output=True, text=True
+    )
+    assert result.returncode == 1
+    assert result.stdout.strip() == "Error: line 2 - unknown item '@'"
+
+
+@pytest.mark.parametrize("lexer", ["native", "dfa", "fused"])
+def test_stream_needs_flex(lexer):
+    result = CliRunner().invoke(
+        cli, [str(GRAMMAR), tempfile.mkdtemp(), "c++", "--stream", "--lexer", lexer]
+    )
+    assert result.exit_code != 0
+    assert "--stream" in result.output
+
+
+@pytest.mark.parametrize("language,lexer", [("go", "native"), ("c++", "fused")])
+def test_batch_workers(language, lexer):
+    directory = generate(language, "--lexer", lexer)
+    run = compile_parser(directory, language)
+    files = corpus(directory)
+    for n in range(20):
+        (files / f"e{n:02}.json").write_text(VALID if n % 3 else INVALID)
+
+    outputs = []
+    for jobs in ["1", "3", "8"]:
+        result = subprocess.run(
+            [*run, "-j", jobs, "corpus"], cwd=directory, capture_output=True, text=True
+        )
+        assert result.returncode == 1, result.stderr
+        outputs.append(result.stdout.splitlines())
+        # the files are reported in order whichever worker parsed them
+        assert outputs[-1][:-1] == outputs[0][:-1]
+        assert SUMMARY.fullmatch(outputs[-1][-1]).groups() == ("24", "15", "9")
+
+    result = subprocess.run(
+        [*run, "--jobs", "none", "corpus"], cwd=directory, capture_output=True, text=True
+    )
+    assert result.returncode == 1
+    assert "jobs" in result.stdout
+
+
+@pytest.mark.parametrize("lexer", ["flex", "native"])
+def test_python_batch_processes(lexer):
+    directory = generate("python", "--lexer", lexer)
+    run = compile_parser(directory, "python")
+    files = corpus(directory)
+    for n in range(20):
+        (files / f"e{n:02}.json").write_text(VALID if n % 3 else INVALID)
+
+    ordered = subprocess.run(
+        [*run, "corpus"], cwd=directory, capture_output=True, text=True
+    )
+    result = subprocess.run(
+        [*run, "--jobs", "3", "corpus"], cwd=directory, capture_output=True, text=True
+    )
+    assert result.returncode == 1, result.stderr
+    lines = result.stdout.splitlines()
+    # the files are reported in the order they finish
+    results = [line for line in lines if line.startswith(("PASS", "FAIL"))]
+    assert sorted(results) == sorted(
+        line for line in ordered.stdout.splitlines() if line.startswith(("PASS", "FAIL"))
+    )
+    assert SUMMARY.fullmatch(lines[-1]).groups() == ("24", "15", "9")
+
+    result = subprocess.run(
+        [*run, "-j", "0", "corpus"], cwd=directory, capture_output=True, text=True
+    )
+    assert result.returncode == 1
+    assert "jobs" in result.stdout
@@ -0,0 +1,101 @@
+import subprocess
+import tempfile
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from rdpgen.build import CACHE_DIR
+from rdpgen.cli import cli
+
+from .common import INVALID, VALID, generate
+
+
+def parse(directory: Path, text: str) -> subprocess.CompletedProcess:
+    f = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False)
+    f.write(text)
+    f.close()
+    return subprocess.run(
+        ["./parser", f.name], cwd=directory, capture_output=True, text=True
+    )
+
+
+@pytest.mark.parametrize("language", ["c++", "go"])
+def test_build(language):
+    directory = generate(language)
+    result = CliRunner().invoke(cli, ["build", str(directory)])
+    assert result.exit_code == 0, result.output
+    assert parse(directory, VALID).returncode == 0
+    invalid = parse(directory, INVALID)
+    assert invalid.returncode == 1
+    assert "line 3" in " ".join(invalid.stdout.split())
+
+    # building again without changes reuses the cached binaries
+    cached = {p: p.stat().st_mtime_ns for p in (directory / CACHE_DIR).iterdir()}
+    assert len(cached) == 2
+    result = CliRunner().invoke(cli, ["build", str(directory)])
+    assert result.exit_code == 0, result.output
+    assert {
+        p: p.stat().st_mtime_ns for p in (directory / CACHE_DIR).iterdir()
+    } == cached
+    assert parse(directory, VALID).returncode == 0
+
+
+@pytest.mark.parametrize("language", ["c++", "go"])
+def test_build_profile_guided(language):
+    directory = generate(language)
+    corpus = Path(tempfile.mkdtemp())
+    (corpus / "valid.json").write_text(VALID)
+    # inputs with errors are fine to train on
+    (corpus / "invalid.json").write_text(INVALID)
+    result = CliRunner().invoke(
+        cli, ["build", str(directory), "--profile-guided", str(corpus)]
+    )
+    assert result.exit_code == 0, result.output
+    assert parse(directory, VALID).returncode == 0
+    assert parse(directory, INVALID).returncode == 1
+
+
+def test_build_fused():
+    # the scanner is compiled into the parser so there's no lexer binary
+    directory = generate("c++", "--lexer", "fused")
+    result = CliRunner().invoke(cli, ["build", str(directory)])
+    assert result.exit_code == 0, result.output
+    assert [p.name for p in (directory / CACHE_DIR).iterdir()][0].startswith("parser")
+    assert not (directory / "lexer" / "lexer").exists()
+    assert parse(directory, VALID).returncode == 0
+    assert parse(directory, INVALID).returncode == 1
+
+
+def test_build_python():
+    # only the lexer needs compiling for a python parser
+    directory = generate("python")
+    result = CliRunner().invoke(cli, ["build", str(directory)])
+    assert result.exit_code == 0, result.output
+    assert [p.name for p in (directory / CACHE_DIR).iterdir()][0].startswith("lexer")
+    assert not (directory / "parser").exists()
+
+
+def test_build_nothing_generated():
+    result = CliRunner().invoke(cli, ["build", tempfile.mkdtemp()])
+    assert result.exit_code != 0
+    assert "no parser generated" in result.output
+
+
+def test_build_missing_tool():
+    directory = generate("python")
+    # none of the compilers can be found on an empty path
+    result = CliRunner().invoke(
+        cli, ["build", str(directory)], env={"PATH": tempfile.mkdtemp()}
+    )
+    assert result.exit_code != 0
+    assert isinstance(result.exception, SystemExit), result.exception
+    assert "couldn't run gcc" in result.output
+
+
+@pytest.mark.parametrize("language", ["c++", "go"])
+def test_build_library(language):
+    directory = generate(language, "--library")
+    result = CliRunner().invoke(cli, ["build", str(directory)])
+    assert result.exit_code != 0
+    assert "is a library" in result.output
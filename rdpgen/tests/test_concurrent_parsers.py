@@ -0,0 +1,71 @@
+import json
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from .common import generate
+
+RUNS = 16
+
+LANGUAGES = {
+    "python": {"build": None, "run": "python parser.py"},
+    "go": {"build": "go build -o parser_go parser.go", "run": "./parser_go"},
+    "c++": {"build": "g++ -o parser_cpp parser.cpp", "run": "./parser_cpp"},
+}
+
+
+def document(run: int) -> str:
+    """A document unique to the run, every other one has an error on a line
+    that depends on the run so output from another run's tokens is noticed"""
+    lines = [json.dumps({"run": run, "item": i}) + "," for i in range(run + 1)]
+    if run % 2:
+        lines[-1] = '{"run" ' + str(run) + "}"
+    else:
+        lines[-1] = lines[-1].rstrip(",")
+    return "[\n" + "\n".join(lines) + "\n]"
+
+
+@pytest.mark.parametrize("language", LANGUAGES)
+@pytest.mark.parametrize("flags", [[], ["--token-format", "binary"], ["--stream"]])
+def test_concurrent_parsers(language, flags):
+    directory = generate(language, *flags)
+    build = LANGUAGES[language]["build"]
+    if build is not None:
+        subprocess.run(build, shell=True, cwd=directory).check_returncode()
+
+    files = []
+    for run in range(RUNS):
+        f = tempfile.NamedTemporaryFile("w", suffix=".json", delete=False)
+        f.write(document(run))
+        f.close()
+        files.append(f.name)
+
+    # the lexer isn't built yet so the parsers race to build it too
+    def parse(file):
+        return subprocess.run(
+            f"{LANGUAGES[language]['run']} {file}",
+            shell=True,
+            cwd=directory,
+            capture_output=True,
+            text=True,
+        )
+
+    with ThreadPoolExecutor(max_workers=RUNS) as pool:
+        results = list(pool.map(parse, files))
+
+    for run, result in enumerate(results):
+        if run % 2:
+            assert result.returncode == 1
+            # the error is on the last item, after the opening bracket
+            assert f"line {run + 2}" in " ".join(result.stdout.split())
+        else:
+            assert result.returncode == 0, result.stdout + result.stderr
+
+    # nothing is left behind from building the lexer
+    assert sorted(p.name for p in (directory / "lexer").iterdir()) == [
+        "Makefile",
+        "lexer",
+        "prog.lex",
+    ]
@@ -7,6 +7,7 @@ import tempfile
 import click
 from click.testing import CliRunner
 import subprocess
+import shlex
 from rdpgen.cli import cli
 
 GRAMMAR_DIR = Path(os.path.realpath(__file__)).parent / "data" / "grammars"
@@ -41,7 +42,10 @@ def i_have_a_grammar(name):
     return str(GRAMMAR_DIR.joinpath(name).absolute()) + ".toml"
 
 
-@when(parsers.parse("I generate a parser in {language}"), target_fixture="directory")
+@when(
+    parsers.re(r"I generate a parser in (?P<language>[^ ]+)$"),
+    target_fixture="directory",
+)
 def i_generate_a_parser_in_language(language, grammar):
     """I generate a parser in {language}."""
     d = tempfile.mkdtemp()
@@ -50,6 +54,18 @@ def i_generate_a_parser_in_language(language, grammar):
     return Path(d)
 
 
+@when(
+    parsers.parse("I generate a parser in {language} with flags {flags}"),
+    target_fixture="directory",
+)
+def i_generate_a_parser_in_language_with_flags(language, flags, grammar):
+    """I generate a parser in {language} with flags {flags}."""
+    d = tempfile.mkdtemp()
+    runner = CliRunner()
+    result = runner.invoke(cli, [grammar, d, language, *shlex.split(flags)])
+    return Path(d)
+
+
 @then(parsers.parse("I see a file {file}"), target_fixture="file")
 def i_see_a_file(file, directory):
     """I see a file {file}."""
@@ -0,0 +1,105 @@
+import re
+import subprocess
+import tempfile
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from rdpgen.cli import cli
+
+from .common import GRAMMAR, INVALID, VALID, compile_parser, generate
+
+# a row of the report for a rule: its calls, and inclusive and exclusive time
+ROW = re.compile(r"(\w+) +(\d+) +([\d.]+) +([\d.]+)")
+FOLDED = re.compile(r"((?:\w+;)*\w+) (\d+)")
+
+
+def report(stderr: str):
+    """Calls to each rule in the report printed to stderr"""
+    return {
+        match.group(1): int(match.group(2))
+        for match in map(ROW.fullmatch, stderr.splitlines())
+        if match is not None
+    }
+
+
+def folded(directory: Path):
+    stacks = {}
+    for line in (directory / "profile.folded").read_text().splitlines():
+        match = FOLDED.fullmatch(line)
+        assert match is not None, line
+        stacks[match.group(1)] = int(match.group(2))
+    return stacks
+
+
+@pytest.mark.parametrize("language", ["python", "go", "c++"])
+def test_instrument_single_file(language):
+    directory = generate(language, "--lexer", "native", "--instrument")
+    run = compile_parser(directory, language)
+    (directory / "a.json").write_text(VALID)
+    (directory / "b.json").write_text(INVALID)
+
+    result = subprocess.run(
+        [*run, "a.json"], cwd=directory, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    calls = report(result.stderr)
+    assert calls["json"] == 1
+    assert calls["array"] == 2
+    assert calls["object"] == 1
+    # the lists are loops, only the value of each element is a call
+    assert calls["value"] == 6
+    assert "elements_tail" not in calls
+    stacks = folded(directory)
+    assert "json;array;elements;value;object;pairs;pair;value" in stacks
+    assert all(stack.startswith("json") for stack in stacks)
+
+    # the rules an error leaves open are still reported
+    result = subprocess.run(
+        [*run, "b.json"], cwd=directory, capture_output=True, text=True
+    )
+    assert result.returncode == 1
+    assert result.stdout.strip() == "Error: line 3 - expected :"
+    calls = report(result.stderr)
+    assert calls["json"] == 1
+    assert calls["pair"] == 2
+
+
+@pytest.mark.parametrize(
+    "language,jobs", [("python", "1"), ("python", "3"), ("go", "4"), ("c++", "4")]
+)
+def test_instrument_batch(language, jobs):
+    directory = generate(language, "--lexer", "native", "--instrument")
+    run = compile_parser(directory, language)
+    files = directory / "corpus"
+    files.mkdir()
+    for n in range(10):
+        (files / f"{n}.json").write_text(VALID if n % 2 else INVALID)
+
+    result = subprocess.run(
+        [*run, "-j", jobs, "corpus"], cwd=directory, capture_output=True, text=True
+    )
+    assert result.returncode == 1, result.stderr
+    # the profiles of every worker are added together
+    calls = report(result.stderr)
+    assert calls["json"] == 10
+    assert calls["value"] == 5 * 6 + 5 * 3
+    assert sum(folded(directory).values()) > 0
+
+
+def test_not_instrumented():
+    for language in ["python", "go", "c++"]:
+        directory = generate(language, "--lexer", "native")
+        source = next(directory.glob("parser.*")).read_text()
+        assert "profile" not in source.lower()
+
+
+@pytest.mark.parametrize("flags", [["--engine", "table"], ["--library"]])
+def test_instrument_needs_recursive_program(flags):
+    result = CliRunner().invoke(
+        cli,
+        [str(GRAMMAR), tempfile.mkdtemp(), "python", "--instrument", *flags],
+    )
+    assert result.exit_code != 0
+    assert "--instrument" in result.output
@@ -0,0 +1,121 @@
+import subprocess
+import tempfile
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from rdpgen.cli import cli
+
+from .common import GRAMMAR, INVALID, UNKNOWN, VALID, generate, load_parser
+
+# prints the number of tokens in each file or the line and message of its error
+GO_MAIN = """package main
+
+import (
+    "errors"
+    "fmt"
+    "os"
+
+    "example/parser"
+)
+
+func main() {
+    for _, file := range os.Args[1:] {
+        text, _ := os.ReadFile(file)
+        tokens, err := parser.Parse(text)
+        var parseError *parser.ParseError
+        if errors.As(err, &parseError) {
+            fmt.Printf("%d: %s\\n", parseError.Line, parseError.Message)
+        } else {
+            fmt.Println(tokens)
+        }
+    }
+}
+"""
+
+CPP_MAIN = """#include <fstream>
+#include <iostream>
+#include <sstream>
+#include "parser.hpp"
+
+int main(int argc, char* argv[]) {
+  for (int i = 1; i < argc; i++) {
+    std::ifstream file(argv[i]);
+    std::stringstream text;
+    text << file.rdbuf();
+    try {
+      int tokens = parse(text.str());
+      std::cout << tokens << std::endl;
+    } catch (const ParseError& e) {
+      std::cout << e.line << ": " << e.message << std::endl;
+    }
+  }
+  return 0;
+}
+"""
+
+EXPECTED = ["17", "3: expected :", "2: unknown item '@'"]
+
+
+def write_inputs(directory: Path):
+    files = []
+    for name, text in [("valid", VALID), ("invalid", INVALID), ("unknown", UNKNOWN)]:
+        files.append(directory / f"{name}.json")
+        files[-1].write_text(text)
+    return [str(f) for f in files]
+
+
+@pytest.mark.parametrize("engine", ["recursive", "table"])
+def test_python_library(engine):
+    directory = generate("python", "--library", "--engine", engine)
+    assert "__main__" not in (directory / "parser.py").read_text()
+    module = load_parser(directory)
+
+    assert module.parse(VALID.encode()) == 17
+    assert module.parse(VALID) == 17
+    with pytest.raises(module.ParseError) as error:
+        module.parse(INVALID.encode())
+    assert (error.value.line, error.value.message) == (3, "expected :")
+    assert str(error.value) == "line 3: expected :"
+    with pytest.raises(module.ParseError) as error:
+        module.parse(UNKNOWN)
+    assert (error.value.line, error.value.message) == (2, "unknown item '@'")
+    # the module keeps working after an error
+    assert module.parse(VALID) == 17
+
+
+def test_go_library():
+    directory = Path(tempfile.mkdtemp())
+    generate("go", "--library", directory=directory / "parser")
+    (directory / "go.mod").write_text("module example\n\ngo 1.18\n")
+    (directory / "main.go").write_text(GO_MAIN)
+    files = write_inputs(directory)
+    result = subprocess.run(
+        ["go", "run", ".", *files], cwd=directory, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.splitlines() == EXPECTED
+
+
+def test_cpp_library():
+    directory = generate("c++", "--library")
+    (directory / "main.cpp").write_text(CPP_MAIN)
+    subprocess.run(
+        ["g++", "-o", "main", "main.cpp", "parser.cpp"], cwd=directory, check=True
+    )
+    files = write_inputs(directory)
+    result = subprocess.run(
+        ["./main", *files], cwd=directory, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.splitlines() == EXPECTED
+
+
+def test_library_needs_native_lexer():
+    result = CliRunner().invoke(
+        cli,
+        [str(GRAMMAR), tempfile.mkdtemp(), "python", "--library", "--lexer", "flex"],
+    )
+    assert result.exit_code != 0
+    assert "native lexer" in result.output
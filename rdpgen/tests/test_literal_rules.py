@@ -0,0 +1,82 @@
+import subprocess
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from .common import compile_parser, generate
+
+# keywords the identifier rule matches and punctuation none of the tokens do
+GRAMMAR = """
+start = "program"
+
+[tokens]
+IDENTIFIER = "[a-zA-Z_][a-zA-Z0-9_]*"
+NUMBER = "[0-9]+"
+
+[grammar]
+program = 'statement*'
+statement = '"while" <IDENTIFIER> "{" statement* "}" | "print" <IDENTIFIER> ";" | <IDENTIFIER> ":=" <NUMBER> ";"'
+"""  # noqa: E501
+VALID = "x := 1;\nwhile x {\n  print x;\n  whilex := 22;\n}\n"
+INVALID = "x := 1;\nwhile := 2;\n"
+
+
+@pytest.mark.parametrize(
+    "language,lexer",
+    [
+        ("python", "native"),
+        ("python", "dfa"),
+        ("python", "flex"),
+        ("c++", "dfa"),
+        ("c++", "native"),
+        ("go", "dfa"),
+    ],
+)
+def test_literals_without_tokens(language, lexer):
+    grammar = Path(tempfile.mkdtemp()) / "grammar.toml"
+    grammar.write_text(GRAMMAR)
+    directory = generate(language, "--lexer", lexer, grammar=grammar)
+    run = compile_parser(directory, language)
+    (directory / "valid").write_text(VALID)
+    (directory / "invalid").write_text(INVALID)
+
+    result = subprocess.run([*run, "valid"], cwd=directory, capture_output=True)
+    assert result.returncode == 0, result.stdout
+    # a keyword isn't an identifier
+    result = subprocess.run(
+        [*run, "invalid"], cwd=directory, capture_output=True, text=True
+    )
+    assert result.returncode == 1
+    assert result.stdout.strip() == "Error: line 2 - expected IDENTIFIER"
+
+
+@pytest.mark.parametrize(
+    "language,lexer", [("python", "native"), ("c++", "dfa"), ("go", "dfa")]
+)
+def test_switch_consumes_the_keyword_it_chose(language, lexer):
+    # enough statements starting with a keyword for the rule to switch on them
+    grammar = Path(tempfile.mkdtemp()) / "grammar.toml"
+    grammar.write_text(
+        GRAMMAR.replace(
+            "statement = '", "statement = '\"if\" <IDENTIFIER> \"{\" statement* \"}\" | "
+        )
+    )
+    directory = generate(language, "--lexer", lexer, grammar=grammar)
+    if language == "python":
+        body = (directory / "parser.py").read_text().split("def statement(self):")[1]
+        body = body.split("def ")[0]
+        assert "switch_cases" in body
+        for keyword in ["if", "while", "print"]:
+            assert f"== literal_{keyword}" not in body
+    run = compile_parser(directory, language)
+    (directory / "valid").write_text(VALID.replace("while", "if", 1) + VALID)
+    (directory / "invalid").write_text(INVALID)
+
+    result = subprocess.run([*run, "valid"], cwd=directory, capture_output=True)
+    assert result.returncode == 0, result.stdout
+    result = subprocess.run(
+        [*run, "invalid"], cwd=directory, capture_output=True, text=True
+    )
+    assert result.returncode == 1
+    assert result.stdout.strip() == "Error: line 2 - expected IDENTIFIER"
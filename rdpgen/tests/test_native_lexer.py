@@ -0,0 +1,97 @@
+import subprocess
+import tempfile
+from pathlib import Path
+
+import pytest
+
+from .common import compile_parser, generate
+
+# far longer than std::regex, which recurses for each character it matches,
+# has the stack to match
+LONG = 100000
+LEXERS = ["native", "dfa"]
+
+
+@pytest.mark.parametrize("language", ["python", "go", "c++"])
+def test_long_tokens(language):
+    directory = generate(language, "--lexer", "native")
+    run = compile_parser(directory, language)
+    text = '["' + "x" * LONG + '", ' + "1" * LONG + ', "\\"' + "y" * LONG + '"]'
+    (directory / "long.json").write_text(text)
+    result = subprocess.run(
+        [*run, "long.json"], cwd=directory, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+
+    (directory / "invalid.json").write_text(text[:-1] + '\n"' + "z" * LONG + '"]')
+    result = subprocess.run(
+        [*run, "invalid.json"], cwd=directory, capture_output=True, text=True
+    )
+    assert result.returncode == 1
+    assert result.stdout.strip() == "Error: line 2 - expected ]"
+
+
+@pytest.mark.parametrize(
+    "language,lexer",
+    [(language, lexer) for language in ["python", "go", "c++"] for lexer in LEXERS],
+)
+def test_longest_alternative_of_a_rule_wins(language, lexer):
+    # the first alternative that matches isn't the longest, flex takes the longest
+    grammar = Path(tempfile.mkdtemp()) / "grammar.toml"
+    grammar.write_text("""
+[tokens]
+KW = "in|int"
+
+[grammar]
+words = '<KW> words | "¬"'
+""")
+    directory = generate(language, "--lexer", lexer, grammar=grammar)
+    run = compile_parser(directory, language)
+    (directory / "words").write_text("int in\nin int")
+    result = subprocess.run(
+        [*run, "words"], cwd=directory, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+
+
+@pytest.mark.parametrize(
+    "language,regex", [("python", "re.compile("), ("c++", "std::regex(")]
+)
+def test_rules_the_dfa_cant_match_use_regex(language, regex):
+    # a class of characters that aren't ascii isn't supported by the dfa
+    grammar = Path(tempfile.mkdtemp()) / "grammar.toml"
+    grammar.write_text("""
+[tokens]
+NUMBER = "[0-9]+"
+WORD = "[a-zé]+"
+
+[grammar]
+words = '<WORD> words | <NUMBER> words | "¬"'
+""")
+    directory = generate(language, "--lexer", "native", grammar=grammar)
+    source = next(directory.glob("parser.*")).read_text()
+    assert source.count(regex) == 1
+    run = compile_parser(directory, language)
+    (directory / "words").write_text("café 42 été\n" + "4" * LONG)
+    result = subprocess.run([*run, "words"], cwd=directory, capture_output=True)
+    assert result.returncode == 0, result.stdout
+
+
+@pytest.mark.parametrize("language", ["python", "go", "c++"])
+def test_input_is_loaded_as_it_is(language):
+    directory = generate(language, "--lexer", "native")
+    run = compile_parser(directory, language)
+    # the file has no newline for the error at its end to be after
+    (directory / "open.json").write_text("{")
+    result = subprocess.run(
+        [*run, "open.json"], cwd=directory, capture_output=True, text=True
+    )
+    assert result.returncode == 1
+    assert result.stdout.strip() == "Error: line 1 - expected }"
+
+    text = "[\n" + ",\n".join(["1"] * LONG) + "\n]"
+    (directory / "lines.json").write_text(text)
+    result = subprocess.run(
+        [*run, "lines.json"], cwd=directory, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
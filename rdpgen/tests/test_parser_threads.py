@@ -0,0 +1,132 @@
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from .common import generate, load_parser
+
+# each parser runs on its own thread and reports how many tokens it read
+GO_MAIN = """package main
+
+import (
+    "fmt"
+    "os"
+    "sync"
+)
+
+func main() {
+    files := os.Args[1:]
+    counts := make([]int, len(files))
+    var wg sync.WaitGroup
+    for i, file := range files {
+        wg.Add(1)
+        go func(i int, file string) {
+            defer wg.Done()
+            parser := &Parser{}
+            parser.parse(file)
+            counts[i] = parser.pos
+        }(i, file)
+    }
+    wg.Wait()
+    for _, count := range counts {
+        fmt.Println(count)
+    }
+}
+"""
+
+CPP_MAIN = """
+#include <thread>
+
+int main(int argc, char* argv[]) {
+  std::vector<size_t> counts(argc - 1);
+  std::vector<std::thread> threads;
+  for (int i = 1; i < argc; i++) {
+    threads.emplace_back([&counts, argv, i]() {
+      Parser parser;
+      parser.parse(argv[i]);
+      counts[i - 1] = parser.pos;
+    });
+  }
+  for (auto& thread : threads) {
+    thread.join();
+  }
+  for (auto count : counts) {
+    std::cout << count << std::endl;
+  }
+  return 0;
+}
+"""
+
+
+def documents(directory: Path, scale: int = 50):
+    """Documents of different sizes so each parser holds a different number of
+    tokens, with the number of tokens each should end up with"""
+    files, counts = [], []
+    for n in range(1, 17):
+        file = directory / f"doc{n}.json"
+        file.write_text("[" + ", ".join(['{"a": [1, true]}'] * n * scale) + "]")
+        files.append(str(file))
+        # 9 tokens per object, a comma between them, the brackets and EOF
+        counts.append(n * scale * 9 + n * scale - 1 + 3)
+    return files, counts
+
+
+@pytest.mark.parametrize("lexer", ["flex", "native"])
+def test_python_parsers_on_threads(lexer, monkeypatch):
+    directory = generate("python", "--lexer", lexer)
+    # each item in a list is parsed a level deeper, so keep under the recursion
+    # limit of python
+    files, counts = documents(directory, 5)
+    # the flex lexer is run from the directory the parser was generated in
+    monkeypatch.chdir(directory)
+    module = load_parser(directory)
+
+    def parse(file):
+        parser = module.Parser()
+        parser.parse(file)
+        return parser.pos
+
+    with ThreadPoolExecutor(8) as pool:
+        assert list(pool.map(parse, files)) == counts
+
+
+@pytest.mark.parametrize("lexer", ["flex", "native"])
+def test_go_parsers_on_threads(lexer):
+    directory = generate("go", "--lexer", lexer)
+    files, counts = documents(directory)
+    source = (directory / "parser.go").read_text()
+    (directory / "parser.go").write_text(
+        source.replace("func main()", "func parserMain()")
+    )
+    (directory / "threads.go").write_text(GO_MAIN)
+    subprocess.run(
+        ["go", "build", "-race", "-o", "threads", "parser.go", "threads.go"],
+        cwd=directory,
+        check=True,
+    )
+    result = subprocess.run(
+        ["./threads", *files], cwd=directory, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    assert [int(c) for c in result.stdout.split()] == counts
+
+
+@pytest.mark.parametrize("lexer", ["flex", "native", "fused"])
+def test_cpp_parsers_on_threads(lexer):
+    directory = generate("c++", "--lexer", lexer)
+    files, counts = documents(directory)
+    if lexer == "fused":
+        subprocess.run(["make", "--silent"], cwd=directory / "lexer", check=True)
+    source = (directory / "parser.cpp").read_text()
+    (directory / "parser.cpp").write_text(
+        source.replace("int main(", "int parser_main(") + CPP_MAIN
+    )
+    subprocess.run(
+        ["g++", "-pthread", "-o", "threads", "parser.cpp"], cwd=directory, check=True
+    )
+    result = subprocess.run(
+        ["./threads", *files], cwd=directory, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    assert [int(c) for c in result.stdout.split()] == counts
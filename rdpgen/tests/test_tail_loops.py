@@ -0,0 +1,69 @@
+import tempfile
+
+import pytest
+
+from .common import GRAMMARS, generate, load_parser
+
+# far more items than python's recursion limit would allow a call for each
+ITEMS = 100000
+
+
+def parser_for(grammar: str):
+    directory = generate("python", "--lexer", "native", grammar=GRAMMARS / grammar)
+    return load_parser(directory), (directory / "parser.py").read_text()
+
+
+def parse(module, text: str) -> int:
+    f = tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False)
+    f.write(text)
+    f.close()
+    parser = module.Parser()
+    parser.parse(f.name)
+    return parser.pos
+
+
+def test_rule_calling_itself_is_a_loop():
+    # expression_star ::= expression expression_star | "¬"
+    module, source = parser_for("math.toml")
+    body = source.split("def expression_star(self):")[1].split("def ")[0]
+    assert "while True" in body
+    assert "self.expression_star()" not in body
+
+    # an expression is an int and a ; then EOF
+    assert parse(module, "1;\n" * ITEMS) == ITEMS * 2 + 1
+    with pytest.raises(module.ParseError) as error:
+        parse(module, "1;\n" * ITEMS + "1 2;")
+    assert error.value.line == ITEMS + 1
+
+
+def test_rules_calling_each_other_are_loops():
+    # elements ::= value elements_tail | "¬"
+    # elements_tail ::= "," elements | "¬"
+    module, source = parser_for("json.toml")
+    for rule, callee in [("elements", "elements_tail"), ("elements_tail", "elements")]:
+        body = source.split(f"def {rule}(self):")[1].split("def ")[0]
+        assert "while True" in body
+        assert f"self.{callee}()" not in body
+
+    # the brackets, the items, the commas between them and EOF
+    assert parse(module, "[" + ", ".join(["1"] * ITEMS) + "]") == ITEMS * 2 + 2
+    pairs = ", ".join(f'"k{i}": [{i}]' for i in range(ITEMS))
+    assert parse(module, "{" + pairs + "}") == ITEMS * 6 + 2
+    with pytest.raises(module.ParseError) as error:
+        parse(module, "[" + ", ".join(["1"] * ITEMS) + " 2]")
+    assert error.value.message == "expected ]"
+
+
+def test_ebnf_repetitions_are_loops():
+    # array ::= "[" (value ("," value)*)? "]"
+    module, source = parser_for("json_ebnf.toml")
+    body = source.split("def array(self):")[1].split("def ")[0]
+    assert "while True" in body
+    # no functions for the rules the repetitions stand for
+    assert "def array_" not in source and "def object_" not in source
+
+    assert parse(module, "[" + ", ".join(["1"] * ITEMS) + "]") == ITEMS * 2 + 2
+    assert parse(module, "[]") == 3
+    with pytest.raises(module.ParseError) as error:
+        parse(module, "[" + ", ".join(["1"] * ITEMS) + ",]")
+    assert error.value.line == 1
@@ -0,0 +1,51 @@
+import subprocess
+import tempfile
+
+import pytest
+from click.testing import CliRunner
+
+from rdpgen.cli import cli
+
+from .common import GRAMMAR, INVALID, VALID, compile_parser, generate
+
+
+@pytest.mark.parametrize(
+    "language,view",
+    [("python", "memoryview"), ("go", "text []byte"), ("c++", "std::string_view")],
+)
+def test_zero_copy_source(language, view):
+    source = next(generate(language, "--zero-copy").glob("parser.*")).read_text()
+    assert view in source
+    assert "mmap" in source.lower()
+    source = next(generate(language).glob("parser.*")).read_text()
+    assert "mmap" not in source.lower()
+
+
+@pytest.mark.parametrize(
+    "language,flags",
+    [("python", []), ("go", []), ("c++", []), ("c++", ["--lexer", "fused"])],
+)
+def test_zero_copy_parse(language, flags):
+    directory = generate(language, "--zero-copy", *flags)
+    run = compile_parser(directory, language)
+    files = directory / "corpus"
+    files.mkdir()
+    (files / "empty.json").write_text("")
+    for n in range(4):
+        (files / f"{n}.json").write_text(VALID if n % 2 else INVALID)
+
+    # each file is mapped in turn, unmapping the one before
+    result = subprocess.run(
+        [*run, "-j", "1", "corpus"], cwd=directory, capture_output=True, text=True
+    )
+    assert result.returncode == 1, result.stderr
+    assert result.stdout.count("expected :") == 2
+
+
+@pytest.mark.parametrize("flags", [["--lexer", "native"], ["--stream"]])
+def test_zero_copy_needs_offsets(flags):
+    result = CliRunner().invoke(
+        cli, [str(GRAMMAR), tempfile.mkdtemp(), "python", "--zero-copy", *flags]
+    )
+    assert result.exit_code != 0
+    assert "--zero-copy" in result.output